@@ -1,27 +1,55 @@
 import requests
 import os
-import json
+import time
 
-def parse_menu_with_ollama(text: str, model: str = "gemma3:4b", host: str = None, image_path: str = None) -> dict:
+from core.serialization import loads as json_loads
+
+# Tempo que o Ollama mantém o modelo carregado entre requisições do lote
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+def _ns_to_s(value) -> float:
+    return (value or 0) / 1e9
+
+def warm_up_ollama(model: str = "gemma3:4b", host: str = None, keep_alive: str = OLLAMA_KEEP_ALIVE) -> float:
     """
-    Envia o texto (e opcionalmente uma imagem) do cardápio para o Ollama (MCP) e retorna o JSON estruturado.
+    Carrega o modelo no Ollama com uma requisição vazia, antes do primeiro RU.
+    Retorna o tempo de carga do modelo em segundos.
     """
     if host is None:
         host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
-    
-    # Importar validador JSON
+    start = time.monotonic()
+    # Prompt vazio apenas carrega o modelo; a carga inicial pode passar do timeout normal
+    response = requests.post(
+        f"{host}/api/generate",
+        json={"model": model, "prompt": "", "stream": False, "keep_alive": keep_alive},
+        timeout=600
+    )
+    response.raise_for_status()
+    load_time = _ns_to_s(response.json().get("load_duration")) or (time.monotonic() - start)
+    print(f"[OLLAMA] Modelo {model} carregado em {load_time:.1f}s (keep_alive={keep_alive})")
+    return load_time
+
+def release_ollama(model: str = "gemma3:4b", host: str = None) -> None:
+    """Descarrega o modelo do Ollama ao final do lote (keep_alive=0)."""
+    if host is None:
+        host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
     try:
-        from core.json_validator import extract_and_validate_json, create_fallback_response
-    except ImportError:
-        print("[AVISO] json_validator não encontrado, usando método básico")
-        extract_and_validate_json = None
-        create_fallback_response = None
-    
-    # Prompt melhorado com instruções mais claras
-    prompt = (
+        requests.post(
+            f"{host}/api/generate",
+            json={"model": model, "prompt": "", "stream": False, "keep_alive": 0},
+            timeout=30
+        )
+    except Exception as e:
+        print(f"[AVISO] Não foi possível descarregar o modelo {model}: {e}")
+
+def build_menu_prompt(text: str) -> str:
+    """
+    Monta o prompt de extração do cardápio, compartilhado por Ollama e Gemini.
+    """
+    return (
         "Você deve extrair e estruturar as informações de cardápio do restaurante universitário em formato JSON. "
         "Siga EXATAMENTE o formato especificado abaixo.\n\n"
-        
+
         "REGRAS IMPORTANTES:\n"
         "1. Use APENAS o formato YYYY-MM-DD para datas\n"
         "2. Cada dia deve ter: menu (array de arrays), timestamp (sempre 0), weekday (dia da semana em português)\n"
@@ -30,7 +58,7 @@ def parse_menu_with_ollama(text: str, model: str = "gemma3:4b", host: str = None
         "5. Capitalize adequadamente os nomes dos pratos\n"
         "6. Mantenha opções vegetarianas/veganas quando presentes\n"
         "7. Inclua acompanhamentos e saladas quando mencionados\n\n"
-        
+
         "FORMATO DE SAÍDA (JSON válido, sem comentários):\n"
         "{\n"
         '  "2025-06-05": {\n'
@@ -43,23 +71,43 @@ def parse_menu_with_ollama(text: str, model: str = "gemma3:4b", host: str = None
         '    "weekday": "Quinta-Feira"\n'
         '  }\n'
         "}\n\n"
-        
+
         "TEXTO DO CARDÁPIO A SER PROCESSADO:\n" + text + "\n\n"
-        
+
         "Retorne APENAS o JSON válido, sem texto adicional:"
     )
-    
+
+def parse_menu_with_ollama(text: str, model: str = "gemma3:4b", host: str = None, image_path: str = None, fallback: bool = True, keep_alive: str = OLLAMA_KEEP_ALIVE) -> dict:
+    """
+    Envia o texto (e opcionalmente uma imagem) do cardápio para o Ollama (MCP) e retorna o JSON estruturado.
+    Com fallback=False, falhas são propagadas como exceção em vez de gerar a resposta de fallback.
+    """
+    if host is None:
+        host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+
+    # Importar validador JSON
+    try:
+        from core.json_validator import extract_and_validate_json, create_fallback_response, is_fallback_response
+    except ImportError:
+        print("[AVISO] json_validator não encontrado, usando método básico")
+        extract_and_validate_json = None
+        create_fallback_response = None
+
+    # Prompt melhorado com instruções mais claras
+    prompt = build_menu_prompt(text)
+
     data = {
-        "model": model, 
-        "prompt": prompt, 
+        "model": model,
+        "prompt": prompt,
         "stream": False,
+        "keep_alive": keep_alive,
         "options": {
             "temperature": 0.1,  # Baixa temperatura para mais consistência
             "top_p": 0.8,
             "top_k": 40,
         }
     }
-    
+
     files = None
     if image_path:
         import base64
@@ -69,7 +117,7 @@ def parse_menu_with_ollama(text: str, model: str = "gemma3:4b", host: str = None
             data["images"] = [img_b64]
         except Exception as e:
             print(f"[AVISO] Erro ao carregar imagem {image_path}: {e}")
-    
+
     try:
         response = requests.post(
             f"{host}/api/generate",
@@ -77,14 +125,21 @@ def parse_menu_with_ollama(text: str, model: str = "gemma3:4b", host: str = None
             timeout=120
         )
         response.raise_for_status()
-        result = response.json()
-        
+        result = json_loads(response.content)
+
         response_text = result.get('response', '')
         print(f"[DEBUG] Resposta do Ollama: {response_text[:500]}...")
-        
+        print(f"[OLLAMA] Carga: {_ns_to_s(result.get('load_duration')):.1f}s | "
+              f"Prompt: {_ns_to_s(result.get('prompt_eval_duration')):.1f}s | "
+              f"Geração: {_ns_to_s(result.get('eval_duration')):.1f}s | "
+              f"Total: {_ns_to_s(result.get('total_duration')):.1f}s")
+
         # Usar validador se disponível
         if extract_and_validate_json:
-            return extract_and_validate_json(response_text)
+            parsed = extract_and_validate_json(response_text)
+            if not fallback and is_fallback_response(parsed):
+                raise ValueError("Nenhum JSON válido encontrado na resposta")
+            return parsed
         else:
             # Método básico de fallback
             json_start = response_text.find('{')
@@ -92,11 +147,92 @@ def parse_menu_with_ollama(text: str, model: str = "gemma3:4b", host: str = None
             if json_start == -1 or json_end == 0:
                 raise ValueError("Nenhum JSON encontrado na resposta")
             json_str = response_text[json_start:json_end]
-            return json.loads(json_str)
-            
+            return json_loads(json_str)
+
     except Exception as e:
         print(f"[ERRO] Falha no parsing com Ollama: {e}")
-        if create_fallback_response:
+        if fallback and create_fallback_response:
             return create_fallback_response()
         else:
             raise ValueError(f"Falha ao extrair JSON da resposta do Ollama: {e}\nResposta: {response_text if 'response_text' in locals() else 'N/A'}")
+
+# Gemini: função de parsing via Google AI
+
+def parse_menu_with_gemini(text: str, model: str = "gemini-pro", api_key: str = None, image_path: str = None, fallback: bool = True) -> dict:
+    """
+    Envia o texto (e opcionalmente uma imagem) do cardápio para a API Gemini e retorna o JSON estruturado.
+    Com fallback=False, falhas são propagadas como exceção em vez de gerar a resposta de fallback.
+    """
+    try:
+        import importlib
+        genai = importlib.import_module("google.generativeai")
+    except ImportError:
+        raise ImportError("google-generativeai não está instalado. Instale com 'pip install google-generativeai'.")
+
+    # Importar validador JSON
+    try:
+        from core.json_validator import extract_and_validate_json, create_fallback_response, is_fallback_response
+    except ImportError:
+        print("[AVISO] json_validator não encontrado, usando método básico")
+        extract_and_validate_json = None
+        create_fallback_response = None
+
+    if api_key is None:
+        api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY não definido. Configure no .env ou variável de ambiente.")
+
+    genai.configure(api_key=api_key)
+
+    # Prompt melhorado com instruções mais claras
+    prompt = build_menu_prompt(text)
+
+    # Configurar modelo com parâmetros otimizados
+    generation_config = {
+        "temperature": 0.1,  # Baixa temperatura para mais consistência
+        "top_p": 0.8,
+        "top_k": 40,
+        "max_output_tokens": 2048,
+    }
+
+    model_obj = genai.GenerativeModel(
+        model_name=model,
+        generation_config=generation_config
+    )
+
+    try:
+        if image_path:
+            try:
+                import importlib
+                pil = importlib.import_module("PIL.Image")
+            except ImportError:
+                raise ImportError("Pillow não está instalado. Instale com 'pip install pillow'.")
+            img = pil.open(image_path)
+            response = model_obj.generate_content([prompt, img])
+        else:
+            response = model_obj.generate_content(prompt)
+
+        result = response.text
+        print(f"[DEBUG] Resposta do Gemini: {result[:500]}...")
+
+        # Usar validador se disponível
+        if extract_and_validate_json:
+            parsed = extract_and_validate_json(result)
+            if not fallback and is_fallback_response(parsed):
+                raise ValueError("Nenhum JSON válido encontrado na resposta")
+            return parsed
+        else:
+            # Método básico de fallback
+            json_start = result.find('{')
+            json_end = result.rfind('}') + 1
+            if json_start == -1 or json_end == 0:
+                raise ValueError("Nenhum JSON encontrado na resposta")
+            json_str = result[json_start:json_end]
+            return json_loads(json_str)
+
+    except Exception as e:
+        print(f"[ERRO] Falha no parsing com Gemini: {e}")
+        if fallback and create_fallback_response:
+            return create_fallback_response()
+        else:
+            raise ValueError(f"Falha ao extrair JSON da resposta do Gemini: {e}\nResposta: {result if 'result' in locals() else 'N/A'}")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialização JSON: orjson (core.serialization) vs json padrão.
+Usa cardápios mensais sintéticos no formato dos arquivos em jsons/.
+
+Uso:
+    python -m core.benchmark_json [iterações]
+"""
+
+import json
+import sys
+import timeit
+from datetime import date, timedelta
+
+from core import serialization
+from core.json_validator import get_weekday_in_portuguese
+
+
+def sample_month(start: date = date(2025, 6, 1), days: int = 31) -> dict:
+    """Gera um cardápio mensal realista (3 refeições, pratos com acentos)."""
+    menu = {}
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        menu[day] = {
+            "menu": [
+                ["Pão francês", "Café com leite", "Mamão"],
+                ["Arroz branco", "Arroz integral", "Feijão carioca", "Frango à passarinho",
+                 "Opção vegana: strogonoff de grão-de-bico", "Salada de alface e tomate", "Mousse de maracujá"],
+                ["Sopa de legumes", "Carne moída refogada", "Purê de batata", "Salada verde"],
+            ],
+            "timestamp": 0,
+            "weekday": get_weekday_in_portuguese(day),
+            "approved": True,
+        }
+    return menu
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    data = sample_month()
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    raw = text.encode('utf-8')
+
+    benchmarks = {
+        "dumps json (indent=2)": lambda: json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
+        "dumps serialization (indent=2)": lambda: serialization.dumps_bytes(data, indent=2),
+        "loads json": lambda: json.loads(raw),
+        "loads serialization": lambda: serialization.loads(raw),
+    }
+
+    backend = "orjson" if serialization.HAS_ORJSON else "json (orjson não instalado)"
+    print(f"Backend: {backend} | {len(data)} dias, {len(raw) / 1024:.1f} KiB por arquivo, {iterations} iterações")
+    for name, func in benchmarks.items():
+        elapsed = timeit.timeit(func, number=iterations)
+        print(f"{name:32s} {elapsed / iterations * 1e6:9.1f} µs/arquivo")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,11 +18,13 @@ Exemplo de path: archive/menus/ufsc-blu/rus/blumenau/menus/2024-01-15
 """
 
 import os
-import json
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
 from datetime import datetime
 
+from core.serialization import dumps_bytes
+from core.menu_store import MenuStore, get_menu_store, menu_file_name
+
 try:
     import requests
 except ImportError:
@@ -44,7 +46,7 @@ def is_menu_fully_unavailable(menu):
         for period in menu
     )
 
-def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive: bool = True) -> bool:
+def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive: bool = True) -> Set[str]:
     """
     Faz upload de cardápio para o Firebase seguindo exatamente o padrão do UFPR.rb
     
@@ -71,7 +73,8 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
         use_archive: Se True, usa "archive/menus" como no UFRGS.rb (PADRÃO), senão "menus" como no UFPR.rb
     
     Returns:
-        True se o upload foi bem-sucedido, False caso contrário
+        Datas concluídas: enviadas com sucesso ou ignoradas por não terem refeições.
+        Vazio se nada foi enviado (falhas não entram, para serem reenviadas depois).
     """
     # Estrutura UFSC seguindo o modelo UFPR.rb:
     # data = {
@@ -95,7 +98,7 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
     if not city_code:
         print(f"[UPLOAD ERROR] RU '{ru_name}' não encontrado no mapeamento UFSC")
         print(f"[UPLOAD ERROR] RUs válidos: {list(UFSC_MAPPING.keys())}")
-        return False
+        return set()
     
     # Verificar variáveis de ambiente (mesmo padrão do Ruby)
     base_url = os.environ.get('BASE_URL')
@@ -104,14 +107,15 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
     if not base_url or not firebase_key:
         print("[UPLOAD ERROR] Variáveis de ambiente BASE_URL e FIREBASE_KEY não configuradas")
         print("[UPLOAD ERROR] Configure as variáveis no arquivo .env ou variáveis de ambiente do sistema")
-        return False
+        return set()
     
     if not requests:
         print("[UPLOAD ERROR] Biblioteca requests não instalada. Execute: pip install requests")
-        return False
+        return set()
     
     success_count = 0
     total_count = 0
+    completed = set()
     
     print(f"[GETTING DATA > {city_code} > {ru_name}] Starting upload...")
     
@@ -121,6 +125,7 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
             menu = day_data.get('menu', [])
             if is_menu_fully_unavailable(menu):
                 print(f"[GETTING DATA > {city_code} > {ru_name}] Dia {date_str} ignorado: todas as refeições indisponíveis.")
+                completed.add(date_str)
                 continue
             total_count += 1
             
@@ -160,11 +165,17 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
             # Fazer upload
             # UFPR.rb usa firebase.set() = PUT request
             # UFRGS.rb usa firebase.update() = PATCH request, mas para compatibilidade usaremos PUT
-            response = requests.put(firebase_url, json=firebase_data, timeout=30)
+            response = requests.put(
+                firebase_url,
+                data=dumps_bytes(firebase_data),
+                headers={'Content-Type': 'application/json'},
+                timeout=30
+            )
             
             if response.status_code == 200:
                 print(f"[GETTING DATA > {city_code} > {ru_name}] Response: {response.status_code}. Finished for {date_str}.")
                 success_count += 1
+                completed.add(date_str)
             else:
                 print(f"[GETTING DATA > {city_code} > {ru_name}] Response: {response.status_code}. Error for {date_str}.")
                 print(f"[GETTING DATA > {city_code} > {ru_name}] Error details: {response.text[:200]}...")
@@ -176,16 +187,17 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
             
     except Exception as e:
         print(f"[GETTING DATA > {city_code} > {ru_name}] Error during upload: {e}")
-        return False
+        return completed
     
     print(f"[GETTING DATA > {city_code} > {ru_name}] Upload summary:")
     print(f"[GETTING DATA > {city_code} > {ru_name}] Total days: {total_count}")
     print(f"[GETTING DATA > {city_code} > {ru_name}] Successful uploads: {success_count}")
     print(f"[GETTING DATA > {city_code} > {ru_name}] Failures: {total_count - success_count}")
     
-    return success_count > 0
+    return completed
 
-def upload_approved_menus(jsons_dir: Optional[str] = None, use_archive: bool = True) -> Dict[str, bool]:
+def upload_approved_menus(jsons_dir: Optional[str] = None, use_archive: bool = True,
+                          store: Optional[MenuStore] = None) -> Dict[str, bool]:
     """
     Faz upload de todos os cardápios aprovados para o Firebase
     Segue a lógica dos scripts Ruby de processar múltiplos RUs
@@ -197,58 +209,51 @@ def upload_approved_menus(jsons_dir: Optional[str] = None, use_archive: bool = T
     - ufsc-joi -> rus -> joinville
     
     Args:
-        jsons_dir: Diretório com arquivos JSON (default: jsons/)
+        jsons_dir: Diretório com arquivos JSON (default: jsons/); arquivos alterados
+            são importados antes e o de um RU sem dias pendentes é removido após o envio
         use_archive: Se True, usa "archive/menus" como no UFRGS.rb (padrão = True)
+        store: Banco de cardápios (padrão: MENU_STORE_DB)
     
     Returns:
         Dicionário com resultados do upload {arquivo: sucesso}
     """
     if jsons_dir is None:
         jsons_dir = os.path.join(os.path.dirname(__file__), "..", "jsons")
+    if store is None:
+        store = get_menu_store()
     
     results = {}
     
-    # Buscar arquivos JSON (equivalente ao loop pelos RUs no Ruby)
-    import glob
-    json_files = glob.glob(os.path.join(jsons_dir, "*.json"))
+    store.import_directory(jsons_dir)
+    # Consulta indexada: dias aprovados e ainda não enviados, por RU
+    approved_menus = store.approved_not_uploaded()
     
-    if not json_files:
-        print("[UPLOAD ERROR] Nenhum arquivo JSON encontrado")
+    if not approved_menus:
+        print("[UPLOAD ERROR] Nenhum cardápio aprovado pendente de envio")
         return results
     
-    print(f"[UPLOAD INFO] Encontrados {len(json_files)} arquivos JSON")
+    print(f"[UPLOAD INFO] Encontrados {len(approved_menus)} RUs com cardápios aprovados")
     
-    for json_file in json_files:
-        file_name = os.path.basename(json_file)
-        ru_name = file_name.replace('.json', '')
+    for ru_name, approved_days in approved_menus.items():
+        file_name = menu_file_name(ru_name)
         
         print(f"[GETTING DATA > UFSC] Starting {ru_name}...")
         
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                menu_data = json.load(f)
-            
-            # Verificar se há dados aprovados
-            approved_data = {}
-            for date_str, day_data in menu_data.items():
-                if day_data.get('approved', False):
-                    approved_data[date_str] = day_data
-            
-            if not approved_data:
-                print(f"[GETTING DATA > UFSC] No approved menus found for {ru_name}. Skipping...")
-                results[file_name] = False
-                continue
-            
-            print(f"[GETTING DATA > UFSC] Processing {ru_name} with {len(approved_data)} approved days...")
-            success = upload_menu_to_firebase(approved_data, ru_name, use_archive)
-            results[file_name] = success
+            print(f"[GETTING DATA > UFSC] Processing {ru_name} with {len(approved_days)} approved days...")
+            uploaded = upload_menu_to_firebase(approved_days, ru_name, use_archive)
+            # Só bem-sucedido se todos os dias foram concluídos; falhas continuam aprovadas e são reenviadas
+            results[file_name] = len(uploaded) == len(approved_days)
             
-            if success:
-                try:
-                    os.remove(json_file)
-                    print(f"[GETTING DATA > UFSC] Arquivo removido: {file_name}")
-                except Exception as e:
-                    print(f"[GETTING DATA > UFSC] Erro ao remover {file_name}: {e}")
+            if uploaded:
+                store.mark_uploaded(ru_name, uploaded)
+                json_file = os.path.join(jsons_dir, file_name)
+                if not store.get_menu(ru_name) and os.path.exists(json_file):
+                    try:
+                        os.remove(json_file)
+                        print(f"[GETTING DATA > UFSC] Arquivo removido: {file_name}")
+                    except Exception as e:
+                        print(f"[GETTING DATA > UFSC] Erro ao remover {file_name}: {e}")
             
             # Pausa entre RUs (mesmo padrão do Ruby)
             time.sleep(2)
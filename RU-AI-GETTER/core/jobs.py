@@ -0,0 +1,238 @@
+"""
+Fila de tarefas em segundo plano das interfaces de revisão.
+
+Cada ação demorada (regenerar, validar, enviar ao Firebase) vira um Job com
+id, etapa, progresso e tempos próprios, executado por um pool limitado de
+threads. Assim várias pessoas podem disparar ações ao mesmo tempo sem que uma
+sobrescreva o status da outra e sem sobrecarregar a máquina.
+
+O cancelamento é cooperativo: tarefas ainda na fila são descartadas; as que
+já estão rodando recebem o pedido e param na próxima chamada a
+job.check_cancelled() (ou job.update()).
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Threads que executam tarefas simultaneamente
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Quantidade de tarefas finalizadas mantidas para consulta
+JOB_RETENTION = 100
+# Tempo que uma tarefa finalizada continua consultável (segundos)
+JOB_TTL = 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """A tarefa foi cancelada enquanto rodava."""
+
+
+@dataclass
+class Job:
+    """Uma tarefa em segundo plano e seu progresso."""
+    id: str
+    kind: str
+    description: str
+    key: Optional[str] = None
+    state: str = QUEUED
+    stage: Optional[str] = None
+    message: str = ""
+    progress: Optional[float] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Optional[Future] = field(default=None, repr=False)
+    _manager: Optional["JobManager"] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def check_cancelled(self) -> None:
+        """Interrompe a tarefa (JobCancelled) se o cancelamento foi pedido."""
+        if self._cancel.is_set():
+            raise JobCancelled(f"Tarefa {self.id} cancelada")
+
+    def update(self, stage: Optional[str] = None, message: Optional[str] = None,
+               progress: Optional[float] = None) -> None:
+        """Registra o andamento e avisa os ouvintes; também é ponto de cancelamento."""
+        self.check_cancelled()
+        if stage is not None:
+            self.stage = stage
+        if message is not None:
+            self.message = message
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if self._manager is not None:
+            self._manager._notify(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'description': self.description,
+            'state': self.state,
+            'stage': self.stage,
+            'message': self.message,
+            'progress': self.progress,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed': self.elapsed,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class JobManager:
+    """
+    Executa tarefas em um pool limitado de threads e guarda o histórico recente.
+
+    Args:
+        max_workers: Tarefas rodando ao mesmo tempo no máximo
+        on_update: Chamada como on_update(job) a cada mudança de estado ou progresso
+        retention: Tarefas finalizadas mantidas no histórico
+        ttl: Segundos que uma tarefa finalizada continua no histórico
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS,
+                 on_update: Optional[Callable[[Job], None]] = None,
+                 retention: int = JOB_RETENTION, ttl: float = JOB_TTL):
+        self.on_update = on_update
+        self.retention = retention
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="review-job")
+
+    def submit(self, kind: str, func: Callable[[Job], Any], description: str = "",
+               key: Optional[str] = None) -> Job:
+        """
+        Enfileira func(job). O valor retornado vira job.result.
+
+        Se key for informada e já houver uma tarefa com a mesma chave na fila ou
+        rodando, ela é devolvida em vez de criar outra.
+        """
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and not job.finished:
+                        return job
+            job = Job(id=f"{kind}-{next(self._ids)}", kind=kind, description=description or kind, key=key)
+            job._manager = self
+            self._jobs[job.id] = job
+            self._prune()
+        self._notify(job)
+        job._future = self._executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job: Job, func: Callable[[Job], Any]) -> None:
+        if job.cancel_requested:
+            self._finish(job, CANCELLED, message="Cancelada")
+            return
+        job.state = RUNNING
+        job.started_at = time.time()
+        self._notify(job)
+        try:
+            result = func(job)
+        except Exception as e:
+            # A tarefa pode encapsular o JobCancelled em outra exceção
+            if job.cancel_requested:
+                self._finish(job, CANCELLED, message="Cancelada")
+            else:
+                self._finish(job, FAILED, error=str(e), message=f"Erro: {e}")
+        else:
+            self._finish(job, SUCCEEDED, result=result)
+
+    def _finish(self, job: Job, state: str, **fields: Any) -> None:
+        """
+        Registra o fim da tarefa. finished_at e o estado final mudam juntos sob o
+        lock, então _prune nunca vê uma tarefa finalizada sem finished_at.
+        """
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            if state == SUCCEEDED and job.progress is not None:
+                job.progress = 1.0
+            job.finished_at = time.time()
+            job.state = state
+        self._notify(job)
+
+    def _notify(self, job: Job) -> None:
+        if self.on_update is not None:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"[JOBS] Erro ao notificar andamento de {job.id}: {e}")
+
+    def _prune(self) -> None:
+        """Remove do histórico as tarefas finalizadas antigas (chamada com o lock)."""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - self.retention
+        for job in finished:
+            if excess > 0 or now - job.finished_at > self.ttl:
+                del self._jobs[job.id]
+                excess -= 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, state: Optional[str] = None) -> List[Job]:
+        """Tarefas conhecidas, da mais recente para a mais antiga."""
+        with self._lock:
+            self._prune()
+            jobs = list(self._jobs.values())
+        if state is not None:
+            jobs = [job for job in jobs if job.state == state]
+        return list(reversed(jobs))
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Pede o cancelamento de uma tarefa.
+
+        Returns:
+            bool: False se a tarefa não existe ou já terminou
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            # Ainda estava na fila: nunca vai rodar
+            self._finish(job, CANCELLED, message="Cancelada")
+        return True
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        if cancel_pending:
+            for job in self.list():
+                if not job.finished:
+                    self.cancel(job.id)
+        self._executor.shutdown(wait=False)
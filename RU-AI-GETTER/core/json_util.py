@@ -4,10 +4,11 @@ Utilitário para validar e normalizar JSONs de cardápios.
 Este script pode ser usado para processar arquivos JSON individuais ou em lote.
 """
 
-import json
 import sys
 import os
 import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # Adicionar o diretório atual ao path
@@ -19,6 +20,9 @@ from core.json_validator import (
     validate_json_format,
     NO_MEALS_TEXT
 )
+from core.storage import write_json_if_changed
+from core.serialization import load as load_json, dumps as dump_json
+from core.menu_store import MenuStore, get_menu_store, menu_file_name
 
 
 def validate_and_fix_json_file(file_path: str, output_path: str = None, verbose: bool = True) -> bool:
@@ -40,8 +44,7 @@ def validate_and_fix_json_file(file_path: str, output_path: str = None, verbose:
     
     try:
         # Carregar JSON
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json(file_path)
         
         if verbose:
             print(f"📁 Processando: {os.path.basename(file_path)}")
@@ -66,12 +69,13 @@ def validate_and_fix_json_file(file_path: str, output_path: str = None, verbose:
         if output_path is None:
             output_path = file_path  # Sobrescrever arquivo original
         
-        # Salvar JSON processado
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, ensure_ascii=False, indent=2)
+        # Salvar JSON processado (só reescreve se algo mudou)
+        changed = write_json_if_changed(output_path, processed_data)
         
         if verbose:
-            if output_path == file_path:
+            if not changed:
+                print(f"💾 Sem alterações: {os.path.basename(output_path)}")
+            elif output_path == file_path:
                 print(f"💾 Arquivo atualizado: {os.path.basename(file_path)}")
             else:
                 print(f"💾 Arquivo salvo: {os.path.basename(output_path)}")
@@ -84,7 +88,56 @@ def validate_and_fix_json_file(file_path: str, output_path: str = None, verbose:
         return False
 
 
-def process_directory(directory: str, pattern: str = "*.json", verbose: bool = True) -> dict:
+# Cache de validação por diretório: {arquivo: {mtime, sha256, valid}}
+VALIDATION_CACHE_NAME = ".validation_cache.json"
+
+
+def file_sha256(file_path: str) -> str:
+    """Calcula o hash SHA-256 do conteúdo de um arquivo."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_validation_cache(directory_path: Path) -> dict:
+    cache_path = directory_path / VALIDATION_CACHE_NAME
+    if not cache_path.exists():
+        return {}
+    try:
+        return load_json(str(cache_path))
+    except Exception:
+        return {}
+
+
+def save_validation_cache(directory_path: Path, cache: dict) -> None:
+    try:
+        write_json_if_changed(str(directory_path / VALIDATION_CACHE_NAME), cache)
+    except Exception as e:
+        print(f"⚠️  Não foi possível salvar o cache de validação: {e}")
+
+
+def is_unchanged(file_path: Path, entry: dict) -> bool:
+    """True se o arquivo não mudou desde a última validação bem-sucedida (mtime e depois hash)."""
+    if not entry or not entry.get('valid'):
+        return False
+    if entry.get('mtime') == file_path.stat().st_mtime_ns:
+        return True
+    # mtime mudou (cópia, checkout...): confirma pelo conteúdo
+    if entry.get('sha256') == file_sha256(str(file_path)):
+        entry['mtime'] = file_path.stat().st_mtime_ns
+        return True
+    return False
+
+
+def _validate_file_quietly(file_path: str) -> bool:
+    # Executado nos processos do pool: a saída detalhada se misturaria entre arquivos
+    return validate_and_fix_json_file(file_path, verbose=False)
+
+
+def process_directory(directory: str, pattern: str = "*.json", verbose: bool = True,
+                      workers: int = 1, skip_unchanged: bool = False) -> dict:
     """
     Processa todos os arquivos JSON em um diretório.
     
@@ -92,6 +145,8 @@ def process_directory(directory: str, pattern: str = "*.json", verbose: bool = T
         directory: Diretório para processar
         pattern: Padrão de arquivos a processar
         verbose: Se True, mostra informações detalhadas
+        workers: Número de processos em paralelo (0 = todos os núcleos)
+        skip_unchanged: Se True, pula arquivos já validados que não mudaram
     
     Returns:
         dict: Relatório com resultados {arquivo: sucesso}
@@ -102,25 +157,72 @@ def process_directory(directory: str, pattern: str = "*.json", verbose: bool = T
             print(f"❌ Diretório não encontrado: {directory}")
         return {}
     
-    json_files = list(directory_path.glob(pattern))
+    json_files = sorted(
+        path for path in directory_path.glob(pattern)
+        if path.name != VALIDATION_CACHE_NAME
+    )
     
     if not json_files:
         if verbose:
             print(f"❌ Nenhum arquivo JSON encontrado em: {directory}")
         return {}
     
+    results = {}
+    cache = load_validation_cache(directory_path) if skip_unchanged else {}
+    if skip_unchanged:
+        pending = []
+        for file_path in json_files:
+            if is_unchanged(file_path, cache.get(file_path.name)):
+                results[file_path.name] = True
+            else:
+                pending.append(file_path)
+        if verbose and len(pending) < len(json_files):
+            print(f"⏭️  {len(json_files) - len(pending)} arquivo(s) sem alterações desde a última validação")
+        json_files = pending
+    
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(json_files)) if json_files else 1
+    
     if verbose:
-        print(f"📂 Processando {len(json_files)} arquivos em: {directory}")
+        modo = f" ({workers} processos)" if workers > 1 else ""
+        print(f"📂 Processando {len(json_files)} arquivos em: {directory}{modo}")
         print("=" * 60)
     
-    results = {}
-    for file_path in json_files:
-        if verbose:
-            print(f"\n📄 {file_path.name}")
-            print("-" * 40)
-        
-        success = validate_and_fix_json_file(str(file_path), verbose=verbose)
-        results[file_path.name] = success
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_validate_file_quietly, str(path)): path for path in json_files}
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    success = future.result()
+                except Exception as e:
+                    if verbose:
+                        print(f"❌ {file_path.name}: {e}")
+                    success = False
+                if verbose:
+                    print(f"{'✅' if success else '❌'} {file_path.name}")
+                results[file_path.name] = success
+    else:
+        for file_path in json_files:
+            if verbose:
+                print(f"\n📄 {file_path.name}")
+                print("-" * 40)
+            
+            success = validate_and_fix_json_file(str(file_path), verbose=verbose)
+            results[file_path.name] = success
+    
+    if skip_unchanged:
+        for file_path in json_files:
+            if file_path.exists():
+                cache[file_path.name] = {
+                    'mtime': file_path.stat().st_mtime_ns,
+                    'sha256': file_sha256(str(file_path)),
+                    'valid': results[file_path.name],
+                }
+        save_validation_cache(directory_path, cache)
+    
+    # Relatório na ordem dos arquivos, independente da ordem de conclusão
+    results = dict(sorted(results.items()))
     
     if verbose:
         print("\n" + "=" * 60)
@@ -146,6 +248,56 @@ def process_directory(directory: str, pattern: str = "*.json", verbose: bool = T
     return results
 
 
+REVIEW_FIELDS = ('approved', 'approved_timestamp')
+
+
+def validate_store(store: MenuStore = None, verbose: bool = True) -> dict:
+    """
+    Valida e normaliza os cardápios do banco de trabalho.
+    
+    Só os dias que o validador alterou ou descartou são gravados, então os
+    demais mantêm a aprovação.
+    
+    Args:
+        store: Banco de cardápios (padrão: get_menu_store())
+        verbose: Se True, mostra informações detalhadas
+    
+    Returns:
+        dict: Relatório com resultados {arquivo: sucesso}
+    """
+    store = store or get_menu_store()
+    results = {}
+    for ru in store.list_menus():
+        file_name = menu_file_name(ru)
+        # Os campos de revisão não fazem parte do cardápio validado
+        current = {
+            date: {key: value for key, value in day.items() if key not in REVIEW_FIELDS}
+            for date, day in store.get_menu(ru).items()
+        }
+        try:
+            is_valid, processed_data, errors = comprehensive_json_validator(current)
+        except Exception as e:
+            if verbose:
+                print(f"❌ {file_name}: {e}")
+            results[file_name] = False
+            continue
+        
+        changed_days = {date: day for date, day in processed_data.items() if current.get(date) != day}
+        changed_days.update({date: None for date in current if date not in processed_data})
+        if changed_days:
+            store.patch_days(ru, changed_days)
+        results[file_name] = is_valid
+        
+        if verbose:
+            status = "✅" if is_valid else "⚠️ "
+            detalhe = f"{len(errors)} erro(s)" if errors else "válido"
+            print(f"{status} {file_name}: {detalhe}, {len(changed_days)} dia(s) corrigido(s)")
+    
+    if verbose and not results:
+        print("❌ Nenhum cardápio pendente no banco")
+    return results
+
+
 def validate_ai_response(response_text: str, verbose: bool = True) -> dict:
     """
     Valida uma resposta de IA e extrai JSON estruturado.
@@ -219,6 +371,15 @@ Exemplos de uso:
   # Processar diretório silenciosamente
   python3 json_util.py --dir jsons/ --quiet
 
+  # Revalidar em paralelo (todos os núcleos), pulando arquivos inalterados
+  python3 json_util.py --dir jsons/ --jobs 0 --changed-only
+
+  # Importar jsons/ para o banco de cardápios e validar o banco
+  python3 json_util.py --import-dir jsons/ --store
+
+  # Exportar o banco no formato JSON (com approved/approved_timestamp)
+  python3 json_util.py --export-dir exportados/
+
   # Testar resposta de IA (modo interativo)
   python3 json_util.py --ai-response
         """
@@ -246,6 +407,37 @@ Exemplos de uso:
         help='Modo silencioso (menos output)'
     )
     
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Processos em paralelo para --dir (0 = todos os núcleos)'
+    )
+    
+    parser.add_argument(
+        '--changed-only',
+        action='store_true',
+        help='Pula arquivos que não mudaram desde a última validação'
+    )
+    
+    parser.add_argument(
+        '--store',
+        action='store_true',
+        help='Valida os cardápios do banco (MENU_STORE_DB) em vez de arquivos'
+    )
+    
+    parser.add_argument(
+        '--import-dir',
+        metavar='DIR',
+        help='Importa os JSONs alterados de DIR para o banco antes de validar'
+    )
+    
+    parser.add_argument(
+        '--export-dir',
+        metavar='DIR',
+        help='Exporta cada cardápio do banco para DIR/<ru>.json ao final'
+    )
+    
     parser.add_argument(
         '--ai-response',
         action='store_true',
@@ -278,15 +470,32 @@ Exemplos de uso:
             
             if result:
                 print("\n📄 JSON processado:")
-                print(json.dumps(result, ensure_ascii=False, indent=2))
+                print(dump_json(result, indent=2))
             else:
                 print("\n❌ Não foi possível processar a resposta")
         else:
             print("❌ Nenhuma resposta fornecida")
     
+    elif args.store or args.import_dir or args.export_dir:
+        store = get_menu_store()
+        if args.import_dir:
+            changed = store.import_directory(args.import_dir)
+            if verbose:
+                print(f"📥 {len(changed)} cardápio(s) importado(s) de {args.import_dir}")
+        results = validate_store(store, verbose=verbose) if args.store else {}
+        if args.export_dir:
+            os.makedirs(args.export_dir, exist_ok=True)
+            for ru in store.list_menus():
+                path = os.path.join(args.export_dir, menu_file_name(ru))
+                written = store.export_json(ru, path)
+                if verbose:
+                    print(f"💾 {'Exportado' if written else 'Sem alterações'}: {path}")
+        if not all(results.values()):
+            sys.exit(1)
+    
     elif args.dir:
         # Processar diretório
-        process_directory(args.dir, verbose=verbose)
+        process_directory(args.dir, verbose=verbose, workers=args.jobs, skip_unchanged=args.changed_only)
     
     elif args.file:
         # Processar arquivo único
@@ -300,7 +509,7 @@ Exemplos de uso:
         if os.path.exists(jsons_dir):
             if verbose:
                 print("📂 Nenhum arquivo especificado, processando diretório jsons/")
-            process_directory(jsons_dir, verbose=verbose)
+            process_directory(jsons_dir, verbose=verbose, workers=args.jobs, skip_unchanged=args.changed_only)
         else:
             parser.print_help()
 
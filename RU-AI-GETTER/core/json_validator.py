@@ -4,9 +4,11 @@ Módulo para validação e estruturação de JSON de cardápios dos RUs.
 
 import json
 import re
-from datetime import datetime
+import threading
+from datetime import date, datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 
 # Importação opcional do jsonschema
 try:
@@ -26,61 +28,95 @@ class MenuDay:
     weekday: str
 
 
+WEEKDAYS_PT = (
+    "Segunda-Feira", "Terça-Feira", "Quarta-Feira",
+    "Quinta-Feira", "Sexta-Feira", "Sábado", "Domingo"
+)
+
+# Intervalo de anos plausível para cardápios, pré-calculado na tabela abaixo
+CALENDAR_YEARS = (2020, 2040)
+
+
+def _build_calendar_table(first_year: int, last_year: int) -> Dict[str, str]:
+    """Monta a tabela {YYYY-MM-DD: dia da semana} para o intervalo de anos."""
+    table = {}
+    day = date(first_year, 1, 1)
+    last = date(last_year, 12, 31)
+    one_day = timedelta(days=1)
+    weekday = day.weekday()
+    while day <= last:
+        table[day.isoformat()] = WEEKDAYS_PT[weekday]
+        day += one_day
+        weekday = (weekday + 1) % 7
+    return table
+
+
+CALENDAR_TABLE = _build_calendar_table(*CALENDAR_YEARS)
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso_date(date_str: str) -> Optional[date]:
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
 def validate_date_format(date_str: str) -> bool:
     """Valida se a data está no formato YYYY-MM-DD correto."""
-    try:
-        datetime.strptime(date_str, "%Y-%m-%d")
+    if date_str in CALENDAR_TABLE:
         return True
-    except ValueError:
-        return False
+    return isinstance(date_str, str) and _parse_iso_date(date_str) is not None
+
 
+_DATE_CLEAN_REGEX = re.compile(r'[^\d/\-.]')
 
+# Padrões comuns de data
+_DATE_PATTERNS = [
+    re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'),  # YYYY-M-D ou YYYY-MM-DD
+    re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'),  # DD/MM/YYYY
+    re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})'), # DD.MM.YYYY
+    re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})'),  # DD-MM-YYYY
+]
+
+
+@lru_cache(maxsize=4096)
 def normalize_date_format(date_str: str) -> Optional[str]:
     """Normaliza diferentes formatos de data para YYYY-MM-DD."""
+    # Caso comum: a data já está no formato correto
+    if date_str in CALENDAR_TABLE:
+        return date_str
+
     # Remove espaços e caracteres especiais
-    date_str = re.sub(r'[^\d/\-.]', '', date_str.strip())
-    
-    # Padrões comuns de data
-    patterns = [
-        (r'(\d{4})-(\d{1,2})-(\d{1,2})', r'\1-\2-\3'),  # YYYY-M-D ou YYYY-MM-DD
-        (r'(\d{1,2})/(\d{1,2})/(\d{4})', r'\3-\2-\1'),  # DD/MM/YYYY
-        (r'(\d{1,2})\.(\d{1,2})\.(\d{4})', r'\3-\2-\1'), # DD.MM.YYYY
-        (r'(\d{1,2})-(\d{1,2})-(\d{4})', r'\3-\2-\1'),  # DD-MM-YYYY
-    ]
+    date_str = _DATE_CLEAN_REGEX.sub('', date_str.strip())
     
-    for pattern, replacement in patterns:
-        match = re.match(pattern, date_str)
+    for pattern in _DATE_PATTERNS:
+        match = pattern.match(date_str)
         if match:
-            try:
-                if len(match.groups()) == 3:
-                    year, month, day = match.groups()
-                    if len(year) == 4:
-                        formatted_date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                    else:
-                        # Se o primeiro grupo não for ano, reorganizar
-                        day, month, year = match.groups()
-                        formatted_date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                    
-                    # Validar a data
-                    if validate_date_format(formatted_date):
-                        return formatted_date
-            except:
-                continue
+            first, month, last = match.groups()
+            if len(first) == 4:
+                year, day = first, last
+            else:
+                # Se o primeiro grupo não for ano, reorganizar
+                day, year = first, last
+            formatted_date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+            
+            # Validar a data
+            if validate_date_format(formatted_date):
+                return formatted_date
     
     return None
 
 
 def get_weekday_in_portuguese(date_str: str) -> str:
     """Retorna o dia da semana em português para uma data."""
-    try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        weekdays = [
-            "Segunda-Feira", "Terça-Feira", "Quarta-Feira", 
-            "Quinta-Feira", "Sexta-Feira", "Sábado", "Domingo"
-        ]
-        return weekdays[date_obj.weekday()]
-    except:
+    weekday = CALENDAR_TABLE.get(date_str)
+    if weekday is not None:
+        return weekday
+    parsed = _parse_iso_date(date_str) if isinstance(date_str, str) else None
+    if parsed is None:
         return "Segunda-Feira"  # fallback
+    return WEEKDAYS_PT[parsed.weekday()]
 
 
 # Constante para o texto padrão quando não há refeições
@@ -91,48 +127,62 @@ def clean_menu_items(items: List[str]) -> List[str]:
     cleaned_items = []
     for item in items:
         if isinstance(item, str):
-            # Remove espaços extras e quebras de linha
-            clean_item = re.sub(r'\s+', ' ', item.strip())
-            # Remove caracteres especiais no início/fim
-            clean_item = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', clean_item)
+            clean_item = clean_menu_item(item)
             if clean_item:
-                # Normalizar variações do texto "sem refeições"
-                clean_item = normalize_no_meals_text(clean_item)
                 cleaned_items.append(clean_item)
     return cleaned_items
 
 
+_WHITESPACE_REGEX = re.compile(r'\s+')
+_EDGE_SYMBOLS_REGEX = re.compile(r'^[^\w\s]+|[^\w\s]+$')
+
+
+@lru_cache(maxsize=8192)
+def clean_menu_item(item: str) -> str:
+    """Limpa um item do menu; retorna string vazia se nada sobrar."""
+    # Remove espaços extras e quebras de linha
+    clean_item = _WHITESPACE_REGEX.sub(' ', item.strip())
+    # Remove caracteres especiais no início/fim
+    clean_item = _EDGE_SYMBOLS_REGEX.sub('', clean_item).strip()
+    if not clean_item:
+        return ''
+    # Normalizar variações do texto "sem refeições"
+    return normalize_no_meals_text(clean_item)
+
+
+# Padrões que indicam "sem refeições" (mais abrangentes)
+NO_MEALS_PATTERNS = [
+    r'sem\s+refei[çc][õo]es?\s+dispon[íi]veis?',
+    r'sem\s+refei[çc][õoão]es?\s+dispon[íi]veis?',
+    r'n[ãa]o\s+h[áa]\s+refei[çc][õoão]es?',
+    r'refei[çc][õoão]es?\s+n[ãa]o\s+dispon[íi]veis?',
+    r'card[áa]pio\s+n[ãa]o\s+dispon[íi]vel',
+    r'menu\s+n[ãa]o\s+dispon[íi]vel',
+    r'menu\s+indispon[íi]vel',
+    r'sem\s+informa[çc][õoão]es?',
+    r'n[ãa]o\s+informado',
+    r'dados\s+corrompidos?',
+    r'n[ãa]o\s+foi\s+poss[íi]vel\s+processar',
+    r'sem\s+refei[çc][ãa]o',
+    r'refei[çc][ãa]o\s+n[ãa]o\s+dispon[íi]vel',
+    r'sem\s+refei[cç]oes?\s+dispon[iv]veis?',
+    # Padrões mais específicos para capturar variações
+    r'^sem\s+refei[çc]oes?\s+disponiveis?$',
+    r'^sem\s+refei[çc][ãa]o\s+disponivel$',
+    r'^cardapio\s+indisponivel$',
+    r'^menu\s+indisponivel$'
+]
+
+# Uma única alternação compilada: cada item é varrido uma vez, não uma vez por padrão
+NO_MEALS_REGEX = re.compile('|'.join(f'(?:{pattern})' for pattern in NO_MEALS_PATTERNS))
+
+
+@lru_cache(maxsize=8192)
 def normalize_no_meals_text(text: str) -> str:
     """Normaliza variações do texto 'sem refeições disponíveis' para o formato padrão."""
-    text_lower = text.lower().strip()
-    
-    # Padrões que indicam "sem refeições" (mais abrangentes)
-    no_meals_patterns = [
-        r'sem\s+refei[çc][õo]es?\s+dispon[íi]veis?',
-        r'sem\s+refei[çc][õoão]es?\s+dispon[íi]veis?',
-        r'n[ãa]o\s+h[áa]\s+refei[çc][õoão]es?',
-        r'refei[çc][õoão]es?\s+n[ãa]o\s+dispon[íi]veis?',
-        r'card[áa]pio\s+n[ãa]o\s+dispon[íi]vel',
-        r'menu\s+n[ãa]o\s+dispon[íi]vel',
-        r'menu\s+indispon[íi]vel',
-        r'sem\s+informa[çc][õoão]es?',
-        r'n[ãa]o\s+informado',
-        r'dados\s+corrompidos?',
-        r'n[ãa]o\s+foi\s+poss[íi]vel\s+processar',
-        r'sem\s+refei[çc][ãa]o',
-        r'refei[çc][ãa]o\s+n[ãa]o\s+dispon[íi]vel',
-        r'sem\s+refei[cç]oes?\s+dispon[iv]veis?',
-        # Padrões mais específicos para capturar variações
-        r'^sem\s+refei[çc]oes?\s+disponiveis?$',
-        r'^sem\s+refei[çc][ãa]o\s+disponivel$',
-        r'^cardapio\s+indisponivel$',
-        r'^menu\s+indisponivel$'
-    ]
-    
-    for pattern in no_meals_patterns:
-        if re.search(pattern, text_lower):
-            return NO_MEALS_TEXT
-    
+    # Memoizado: os mesmos pratos se repetem em todos os dias e arquivos
+    if NO_MEALS_REGEX.search(text.lower().strip()):
+        return NO_MEALS_TEXT
     return text
 
 
@@ -141,56 +191,10 @@ def validate_menu_structure(menu_data: Dict[str, Any]) -> Dict[str, Any]:
     Valida e corrige a estrutura do JSON do cardápio.
     Garante que siga o formato esperado.
     """
-    validated_data = {}
-    
-    for date_key, day_data in menu_data.items():
-        # Normalizar data
-        normalized_date = normalize_date_format(date_key)
-        if not normalized_date:
-            print(f"[AVISO] Data inválida ignorada: {date_key}")
-            continue
-        
-        # Garantir estrutura básica
-        if not isinstance(day_data, dict):
-            print(f"[AVISO] Dados inválidos para {date_key}, usando estrutura padrão")
-            day_data = {
-                "menu": [[NO_MEALS_TEXT]],
-                "timestamp": 0,
-                "weekday": get_weekday_in_portuguese(normalized_date)
-            }
-        
-        # Validar e corrigir menu
-        menu = day_data.get("menu", [])
-        if not isinstance(menu, list):
-            menu = [[NO_MEALS_TEXT]]
-        
-        # Garantir que o menu tenha pelo menos uma refeição
-        if not menu:
-            menu = [[NO_MEALS_TEXT]]
-        
-        # Normalizar cada refeição
-        normalized_menu = []
-        for meal in menu:
-            if isinstance(meal, list):
-                cleaned_items = clean_menu_items(meal)
-                if not cleaned_items:
-                    cleaned_items = [NO_MEALS_TEXT]
-                normalized_menu.append(cleaned_items)
-            elif isinstance(meal, str):
-                # Se o item é uma string, transformar em lista
-                cleaned_items = clean_menu_items([meal])
-                normalized_menu.append(cleaned_items if cleaned_items else [NO_MEALS_TEXT])
-        
-        # Garantir estrutura mínima [café, almoço, jantar] ou pelo menos uma refeição
-        if len(normalized_menu) == 0:
-            normalized_menu = [[NO_MEALS_TEXT]]
-        
-        validated_data[normalized_date] = {
-            "menu": normalized_menu,
-            "timestamp": 0,  # Sempre 0 como especificado
-            "weekday": get_weekday_in_portuguese(normalized_date)
-        }
-    
+    validated_data, issues = validate_and_repair(menu_data)
+    for issue in issues:
+        if issue.is_critical:
+            print(f"[AVISO] {issue.message}")
     return validated_data
 
 
@@ -216,10 +220,7 @@ def create_json_schema() -> Dict[str, Any]:
                     },
                     "weekday": {
                         "type": "string",
-                        "enum": [
-                            "Segunda-Feira", "Terça-Feira", "Quarta-Feira",
-                            "Quinta-Feira", "Sexta-Feira", "Sábado", "Domingo"
-                        ]
+                        "enum": list(WEEKDAYS_PT)
                     }
                 },
                 "required": ["menu", "timestamp", "weekday"],
@@ -230,51 +231,137 @@ def create_json_schema() -> Dict[str, Any]:
     }
 
 
+def strip_json_comments(json_text: str) -> str:
+    """Remove comentários // e /* */ fora de strings (JSON não aceita comentários)."""
+    result = []
+    in_string = False
+    escape = False
+    i = 0
+    n = len(json_text)
+    segment_start = 0
+
+    while i < n:
+        char = json_text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '/' and i + 1 < n and json_text[i + 1] in '/*':
+            result.append(json_text[segment_start:i])
+            if json_text[i + 1] == '/':
+                end = json_text.find('\n', i)
+            else:
+                end = json_text.find('*/', i + 2)
+                end = -1 if end == -1 else end + 2
+            i = n if end == -1 else end
+            segment_start = i
+            continue
+        i += 1
+
+    result.append(json_text[segment_start:])
+    return ''.join(result)
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def find_json_objects(text: str) -> List[Tuple[int, int, bool]]:
+    """
+    Localiza os objetos JSON candidatos em uma única passagem linear.
+    Considera strings/escapes e pula comentários // e /* */ dentro dos objetos.
+
+    As chaves abertas ficam em uma pilha, então uma chave solta no texto em
+    volta (ex.: "use { como início") não esconde o objeto que vem depois.
+    Só os trechos balanceados maximais são devolvidos: eles não se sobrepõem,
+    e decodificar todos custa O(n).
+
+    Returns:
+        Lista de (início, fim, tem_comentário) de cada trecho com chaves balanceadas.
+    """
+    spans: List[Tuple[int, int, bool]] = []
+    opened: List[int] = []
+    comments: List[int] = []
+    in_string = False
+    escape = False
+    i = 0
+    n = len(text)
+
+    while i < n:
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif not opened:
+            # Fora de objetos só interessa o início do próximo
+            if char == '{':
+                opened.append(i)
+        elif char == '"':
+            in_string = True
+        elif char == '/' and i + 1 < n and text[i + 1] in '/*':
+            comments.append(i)
+            if text[i + 1] == '/':
+                end = text.find('\n', i)
+            else:
+                end = text.find('*/', i + 2)
+                end = -1 if end == -1 else end + 2
+            i = n if end == -1 else end
+            continue
+        elif char == '{':
+            opened.append(i)
+        elif char == '}':
+            start = opened.pop()
+            # Os trechos internos já registrados ficam dentro deste
+            while spans and spans[-1][0] > start:
+                spans.pop()
+            has_comment = bool(comments) and comments[-1] > start
+            spans.append((start, i + 1, has_comment))
+        i += 1
+
+    return spans
+
+
 def extract_and_validate_json(response_text: str) -> Dict[str, Any]:
     """
     Extrai JSON da resposta e valida sua estrutura.
-    Tenta múltiplas estratégias para extrair JSON válido.
+    Os objetos candidatos são localizados em uma passagem linear e testados do maior
+    para o menor; só os avisos do candidato escolhido são exibidos.
     """
-    # Estratégia 1: Buscar JSON entre chaves
-    json_pattern = r'\{[\s\S]*\}'
-    matches = re.findall(json_pattern, response_text)
-    
-    for match in matches:
-        try:
-            # Remover comentários JSON (que não são válidos em JSON)
-            clean_json = re.sub(r'//.*?\n', '\n', match)
-            clean_json = re.sub(r'/\*[\s\S]*?\*/', '', clean_json)
-            
-            parsed_json = json.loads(clean_json)
-            if isinstance(parsed_json, dict) and parsed_json:
-                # Validar e corrigir estrutura
-                validated_json = validate_menu_structure(parsed_json)
-                if validated_json:
-                    return validated_json
-        except json.JSONDecodeError:
-            continue
-    
-    # Estratégia 2: Buscar por blocos de código JSON
-    code_block_pattern = r'```(?:json)?\s*(\{[\s\S]*?\})\s*```'
-    code_matches = re.findall(code_block_pattern, response_text, re.IGNORECASE)
-    
-    for match in code_matches:
+    candidates = sorted(find_json_objects(response_text), key=lambda span: span[1] - span[0], reverse=True)
+
+    for start, end, has_comment in candidates:
         try:
-            clean_json = re.sub(r'//.*?\n', '\n', match)
-            clean_json = re.sub(r'/\*[\s\S]*?\*/', '', clean_json)
-            
-            parsed_json = json.loads(clean_json)
-            if isinstance(parsed_json, dict) and parsed_json:
-                validated_json = validate_menu_structure(parsed_json)
-                if validated_json:
-                    return validated_json
-        except json.JSONDecodeError:
+            if has_comment:
+                parsed_json = json.loads(strip_json_comments(response_text[start:end]))
+            else:
+                parsed_json, _ = _JSON_DECODER.raw_decode(response_text, start)
+        except ValueError:
             continue
+
+        if isinstance(parsed_json, dict) and parsed_json:
+            # Validar e corrigir estrutura
+            validated_json, issues = validate_and_repair(parsed_json)
+            if validated_json:
+                for issue in issues:
+                    if issue.is_critical:
+                        print(f"[AVISO] {issue.message}")
+                return validated_json
     
     # Se nenhuma estratégia funcionou, criar estrutura mínima
     return create_fallback_response()
 
 
+# Texto usado na resposta de fallback
+FALLBACK_TEXT = "Não foi possível processar o cardápio"
+
 def create_fallback_response() -> Dict[str, Any]:
     """Cria uma resposta de fallback quando não é possível extrair JSON válido."""
     today = datetime.now()
@@ -283,13 +370,23 @@ def create_fallback_response() -> Dict[str, Any]:
     
     return {
         date_str: {
-            "menu": [["Não foi possível processar o cardápio"]],
+            "menu": [[FALLBACK_TEXT]],
             "timestamp": 0,
             "weekday": weekday
         }
     }
 
 
+def is_fallback_response(json_data: Any) -> bool:
+    """Retorna True se o JSON for vazio ou a resposta de fallback (nenhum cardápio extraído)."""
+    if not isinstance(json_data, dict) or not json_data:
+        return True
+    if len(json_data) != 1:
+        return False
+    day_data = next(iter(json_data.values()))
+    return isinstance(day_data, dict) and day_data.get("menu") == [[FALLBACK_TEXT]]
+
+
 def validate_json_format(json_data: Dict[str, Any], strict: bool = False) -> Tuple[bool, List[str]]:
     """
     Valida se o JSON está no formato correto para cardápios.
@@ -362,11 +459,7 @@ def validate_json_format(json_data: Dict[str, Any], strict: bool = False) -> Tup
         
         # Validar weekday
         if 'weekday' in day_data:
-            valid_weekdays = [
-                "Segunda-Feira", "Terça-Feira", "Quarta-Feira",
-                "Quinta-Feira", "Sexta-Feira", "Sábado", "Domingo"
-            ]
-            if day_data['weekday'] not in valid_weekdays:
+            if day_data['weekday'] not in WEEKDAYS_PT:
                 errors.append(f"Dia da semana '{day_data['weekday']}' inválido para {date_key}")
             elif strict:
                 # Verificar se o dia da semana corresponde à data
@@ -377,42 +470,22 @@ def validate_json_format(json_data: Dict[str, Any], strict: bool = False) -> Tup
     return len(errors) == 0, errors
 
 
-def validate_with_jsonschema(json_data: Dict[str, Any]) -> Tuple[bool, List[str]]:
+_schema_validator = None
+_schema_lock = threading.Lock()
+
+def get_schema_validator():
     """
-    Valida JSON usando jsonschema para validação mais rigorosa (se disponível).
+    Retorna o validador do schema, compilado uma única vez por processo e
+    usado por validate_and_repair (pipeline, revisão e json_util).
     """
-    errors = []
-    
-    if not HAS_JSONSCHEMA:
-        # Fallback para validação básica se jsonschema não estiver disponível
-        return validate_json_format(json_data, strict=True)
-    
-    try:
-        schema = create_json_schema()
-        # Validar usando jsonschema
-        jsonschema.validate(json_data, schema)
-        
-        # Validação adicional específica do domínio
-        for date_key, day_data in json_data.items():
-            # Verificar se a data é válida
-            try:
-                datetime.strptime(date_key, "%Y-%m-%d")
-            except ValueError:
-                errors.append(f"Data '{date_key}' inválida")
-            
-            # Verificar se o dia da semana corresponde à data
-            expected_weekday = get_weekday_in_portuguese(date_key)
-            if day_data.get('weekday') != expected_weekday:
-                errors.append(f"Dia da semana inconsistente para {date_key}")
-        
-        return len(errors) == 0, errors
-        
-    except Exception as e:
-        if HAS_JSONSCHEMA and "ValidationError" in str(type(e)):
-            errors.append(f"Erro de schema: {e.message}")
-        else:
-            errors.append(f"Erro na validação: {str(e)}")
-        return False, errors
+    global _schema_validator
+    with _schema_lock:
+        if _schema_validator is None:
+            schema = create_json_schema()
+            validator_class = jsonschema.validators.validator_for(schema, default=jsonschema.Draft7Validator)
+            validator_class.check_schema(schema)
+            _schema_validator = validator_class(schema)
+        return _schema_validator
 
 
 def repair_json_format(json_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -472,57 +545,160 @@ def repair_json_format(json_data: Dict[str, Any]) -> Dict[str, Any]:
     return repaired_data if repaired_data else create_fallback_response()
 
 
-def comprehensive_json_validator(json_data: Dict[str, Any], auto_repair: bool = True) -> Tuple[bool, Dict[str, Any], List[str]]:
+# Severidade dos problemas encontrados na validação
+CRITICAL = "critical"
+WARNING = "warning"
+
+DAY_FIELDS = ("menu", "timestamp", "weekday")
+
+
+@dataclass
+class ValidationIssue:
+    """Problema encontrado (e, quando possível, corrigido) na validação."""
+    code: str
+    message: str
+    date: Optional[str] = None
+    meal: Optional[int] = None
+    severity: str = WARNING
+
+    @property
+    def is_critical(self) -> bool:
+        return self.severity == CRITICAL
+
+    def __str__(self) -> str:
+        label = "CRÍTICO" if self.is_critical else "AVISO"
+        return f"[{label}] {self.message}"
+
+
+def _repair_meal(meal: Any, date: str, index: int, issues: List[ValidationIssue]) -> Optional[List[str]]:
+    """Limpa uma refeição, registrando os problemas. Retorna None se for descartada."""
+    if isinstance(meal, str):
+        issues.append(ValidationIssue("MEAL_NOT_LIST", f"Refeição {index} para {date} era string, convertida em lista", date, index))
+        meal = [meal]
+    elif not isinstance(meal, list):
+        issues.append(ValidationIssue("INVALID_MEAL", f"Refeição {index} para {date} inválida, descartada", date, index, CRITICAL))
+        return None
+
+    cleaned = []
+    for item in meal:
+        if not isinstance(item, str):
+            issues.append(ValidationIssue("INVALID_ITEM", f"Item não textual da refeição {index} para {date} descartado", date, index))
+            continue
+        clean_item = clean_menu_item(item)
+        if clean_item:
+            cleaned.append(clean_item)
+        else:
+            issues.append(ValidationIssue("EMPTY_ITEM", f"Item vazio da refeição {index} para {date} removido", date, index))
+
+    if not cleaned:
+        issues.append(ValidationIssue("EMPTY_MEAL", f"Refeição {index} para {date} vazia, usando '{NO_MEALS_TEXT}'", date, index))
+        cleaned = [NO_MEALS_TEXT]
+    return cleaned
+
+
+def validate_and_repair(json_data: Any) -> Tuple[Dict[str, Any], List[ValidationIssue]]:
     """
-    Validador abrangente que combina múltiplas estratégias de validação.
-    
+    Valida e repara o cardápio em uma única passagem por dia. Com jsonschema
+    instalado, o resultado reparado ainda é conferido com create_json_schema().
+
+    Returns:
+        Tuple[Dict[str, Any], List[ValidationIssue]]: (dados_reparados, problemas).
+        Os dados podem ficar vazios se nenhuma data for aproveitável.
+    """
+    issues: List[ValidationIssue] = []
+    if not isinstance(json_data, dict):
+        issues.append(ValidationIssue("ROOT_NOT_OBJECT", "O JSON deve ser um objeto/dicionário", severity=CRITICAL))
+        return {}, issues
+
+    repaired: Dict[str, Any] = {}
+    for date_key, day_data in json_data.items():
+        date = normalize_date_format(str(date_key))
+        if not date:
+            issues.append(ValidationIssue("INVALID_DATE", f"Data '{date_key}' inválida, ignorada", str(date_key), severity=CRITICAL))
+            continue
+        if date != date_key:
+            issues.append(ValidationIssue("DATE_NORMALIZED", f"Data '{date_key}' normalizada para {date}", date))
+        if date in repaired:
+            issues.append(ValidationIssue("DUPLICATE_DATE", f"Data {date} repetida, mantida a última ocorrência", date))
+
+        expected_weekday = get_weekday_in_portuguese(date)
+        if not isinstance(day_data, dict):
+            issues.append(ValidationIssue("INVALID_DAY", f"Dados para {date} devem ser um objeto", date, severity=CRITICAL))
+            repaired[date] = {"menu": [[NO_MEALS_TEXT]], "timestamp": 0, "weekday": expected_weekday}
+            continue
+
+        for field in DAY_FIELDS:
+            if field not in day_data:
+                issues.append(ValidationIssue("MISSING_FIELD", f"Campo '{field}' faltando para {date}", date))
+        for field in day_data:
+            if field not in DAY_FIELDS:
+                issues.append(ValidationIssue("EXTRA_FIELD", f"Campo '{field}' desconhecido removido de {date}", date))
+
+        menu = day_data.get("menu", [])
+        if not isinstance(menu, list):
+            issues.append(ValidationIssue("MENU_NOT_LIST", f"Menu para {date} deve ser uma lista", date, severity=CRITICAL))
+            menu = []
+        elif not menu and "menu" in day_data:
+            issues.append(ValidationIssue("EMPTY_MENU", f"Menu para {date} vazio", date))
+
+        normalized_menu = []
+        for index, meal in enumerate(menu):
+            cleaned = _repair_meal(meal, date, index, issues)
+            if cleaned is not None:
+                normalized_menu.append(cleaned)
+        if not normalized_menu:
+            normalized_menu = [[NO_MEALS_TEXT]]
+
+        timestamp = day_data.get("timestamp", 0)
+        if "timestamp" in day_data and (not isinstance(timestamp, int) or isinstance(timestamp, bool) or timestamp != 0):
+            issues.append(ValidationIssue("TIMESTAMP_FIXED", f"Timestamp para {date} deve ser 0", date))
+
+        weekday = day_data.get("weekday")
+        if "weekday" in day_data and weekday != expected_weekday:
+            issues.append(ValidationIssue(
+                "WEEKDAY_FIXED",
+                f"Dia da semana '{weekday}' não corresponde à data {date} (esperado: {expected_weekday})",
+                date
+            ))
+
+        repaired[date] = {
+            "menu": normalized_menu,
+            "timestamp": 0,  # Sempre 0 como especificado
+            "weekday": expected_weekday
+        }
+
+    if not repaired:
+        issues.append(ValidationIssue("EMPTY_DOCUMENT", "Nenhuma data válida encontrada no JSON", severity=CRITICAL))
+    elif HAS_JSONSCHEMA:
+        # Conferência final do resultado com o schema do structured output
+        for error in get_schema_validator().iter_errors(repaired):
+            issues.append(ValidationIssue("SCHEMA_MISMATCH", f"Erro de schema: {error.message}", severity=CRITICAL))
+    return repaired, issues
+
+
+def comprehensive_json_validator(json_data: Dict[str, Any], auto_repair: bool = True) -> Tuple[bool, Dict[str, Any], List[ValidationIssue]]:
+    """
+    Valida e repara o cardápio (ver validate_and_repair).
+
     Args:
         json_data: JSON para validar
-        auto_repair: Se True, tenta reparar automaticamente
-    
+        auto_repair: Se False, retorna os dados originais sem reparo
+
     Returns:
-        Tuple[bool, Dict[str, Any], List[str]]: (é_válido, dados_processados, erros)
+        Tuple[bool, Dict[str, Any], List[ValidationIssue]]: (é_válido, dados_processados, erros).
+        É válido se não houver problemas críticos.
     """
-    original_errors = []
-    
-    # SEMPRE aplicar normalização primeiro
-    processed_data = validate_menu_structure(json_data)
-    
-    # Primeira validação - formato básico
-    is_valid_basic, basic_errors = validate_json_format(processed_data, strict=False)
-    original_errors.extend([f"[BÁSICO] {error}" for error in basic_errors])
-    
-    # Se auto_repair está ativado e há erros, tentar reparar
-    if auto_repair and not is_valid_basic:
-        print(f"[VALIDADOR] Tentando reparar {len(basic_errors)} erros...")
-        processed_data = repair_json_format(processed_data)
-        
-        # Validar novamente após reparo
-        is_valid_repaired, repaired_errors = validate_json_format(processed_data, strict=False)
-        if is_valid_repaired:
-            print("[VALIDADOR] Reparo bem-sucedido!")
-            return True, processed_data, original_errors
-        else:
-            original_errors.extend([f"[PÓS-REPARO] {error}" for error in repaired_errors])
-    
-    # Validação com jsonschema (se disponível)
-    try:
-        is_valid_schema, schema_errors = validate_with_jsonschema(processed_data)
-        if not is_valid_schema:
-            original_errors.extend([f"[SCHEMA] {error}" for error in schema_errors])
-    except Exception as e:
-        original_errors.append(f"[SCHEMA] Falha na validação por schema: {e}")
-    
-    # Validação estrita final
-    is_valid_strict, strict_errors = validate_json_format(processed_data, strict=True)
-    if not is_valid_strict:
-        original_errors.extend([f"[ESTRITO] {error}" for error in strict_errors])
-    
-    # Determinar se é válido o suficiente para uso
-    critical_errors = [error for error in original_errors if any(keyword in error.lower() for keyword in ['faltando', 'vazio', 'inválido', 'corrompido'])]
-    is_usable = len(critical_errors) == 0
-    
-    return is_usable, processed_data, original_errors
+    repaired, issues = validate_and_repair(json_data)
+    is_usable = not any(issue.is_critical for issue in issues)
+
+    if not auto_repair:
+        return is_usable, json_data, issues
+
+    if issues:
+        print(f"[VALIDADOR] {len(issues)} problema(s) corrigido(s) automaticamente")
+    if not repaired:
+        repaired = create_fallback_response()
+    return is_usable, repaired, issues
 
 
 def test_json_validator():
@@ -0,0 +1,130 @@
+"""
+Observa a pasta jsons/ e avisa quando arquivos são criados, alterados ou removidos.
+
+Usa watchdog (inotify/FSEvents/ReadDirectoryChangesW) quando disponível; sem ele,
+recai em uma varredura periódica com os.stat. Nos dois casos os eventos vêm da
+comparação de assinaturas (mtime, tamanho), então escritas atômicas
+(temporário + os.replace) geram um único "changed".
+"""
+
+import glob
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+# Importação opcional do watchdog
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+    class FileSystemEventHandler:  # type: ignore[no-redef]
+        pass
+
+# Agrupa rajadas de eventos do sistema de arquivos (segundos)
+DEBOUNCE_DELAY = 0.2
+# Intervalo da varredura quando watchdog não está instalado (segundos)
+POLL_INTERVAL = 1.0
+
+Signature = Tuple[int, int]
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "JsonsWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if not event.is_directory:
+            self.watcher.schedule_scan()
+
+
+class JsonsWatcher:
+    """
+    Observa os arquivos *.json de um diretório.
+
+    Args:
+        directory: Diretório observado
+        callback: Chamada como callback(tipo, nome_do_arquivo) com tipo
+            "added", "changed" ou "removed", a partir da thread do observador
+        pattern: Padrão dos arquivos observados
+    """
+
+    def __init__(self, directory: str, callback: Callable[[str, str], None], pattern: str = "*.json"):
+        self.directory = directory
+        self.callback = callback
+        self.pattern = pattern
+        self._signatures: Dict[str, Signature] = self._scan()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._stop = threading.Event()
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+
+    def _scan(self) -> Dict[str, Signature]:
+        signatures = {}
+        # glob ignora arquivos ocultos (temporários e caches de validação)
+        for path in glob.glob(os.path.join(self.directory, self.pattern)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures[os.path.basename(path)] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def check(self) -> None:
+        """Compara o estado atual com o anterior e emite os eventos."""
+        with self._lock:
+            current = self._scan()
+            previous = self._signatures
+            self._signatures = current
+
+        for name, signature in current.items():
+            if name not in previous:
+                self._emit("added", name)
+            elif previous[name] != signature:
+                self._emit("changed", name)
+        for name in previous:
+            if name not in current:
+                self._emit("removed", name)
+
+    def _emit(self, event_type: str, name: str) -> None:
+        try:
+            self.callback(event_type, name)
+        except Exception as e:
+            print(f"[WATCHER] Erro ao tratar evento {event_type} de {name}: {e}")
+
+    def schedule_scan(self) -> None:
+        """Agenda uma verificação, agrupando eventos próximos."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(DEBOUNCE_DELAY, self.check)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(POLL_INTERVAL):
+            self.check()
+
+    def start(self) -> "JsonsWatcher":
+        os.makedirs(self.directory, exist_ok=True)
+        if HAS_WATCHDOG:
+            self._observer = Observer()
+            self._observer.schedule(_ChangeHandler(self), self.directory, recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        else:
+            self._poll_thread = threading.Thread(target=self._poll, name="jsons-watcher", daemon=True)
+            self._poll_thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
@@ -0,0 +1,231 @@
+"""
+Roteador de LLMs para o parsing dos cardápios.
+
+Distribui as requisições entre vários backends (modelos locais do Ollama e
+modelos do Gemini), acompanhando a latência e a taxa de falhas observadas de
+cada um. Se o backend principal passar do seu p95 de latência, uma segunda
+requisição (hedge) é enviada ao próximo backend e vence o primeiro resultado
+válido. Falhas passam para o próximo backend em vez de gerar um cardápio de
+fallback.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from core.ai_parse import parse_menu_with_ollama, parse_menu_with_gemini, warm_up_ollama, release_ollama
+from core.json_validator import is_fallback_response
+
+# Atraso padrão antes do hedge enquanto não há amostras suficientes (segundos)
+DEFAULT_HEDGE_DELAY = 30.0
+# Número mínimo de amostras para usar o p95 observado
+MIN_SAMPLES = 5
+# Janela de amostras de latência guardadas por backend
+LATENCY_WINDOW = 50
+
+
+class RouterError(Exception):
+    """Nenhum backend retornou um cardápio válido."""
+
+
+@dataclass
+class LLMBackend:
+    """Um modelo em um provedor (ollama ou gemini)."""
+    provider: str
+    model: str
+    api_key: Optional[str] = None
+    host: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    def parse(self, text: str, image_path: Optional[str] = None) -> Dict[str, Any]:
+        if self.provider == "ollama":
+            return parse_menu_with_ollama(text, model=self.model, host=self.host, image_path=image_path, fallback=False)
+        if self.provider == "gemini":
+            return parse_menu_with_gemini(text, model=self.model, api_key=self.api_key, image_path=image_path, fallback=False)
+        raise ValueError(f"Provedor desconhecido: {self.provider}")
+
+
+@dataclass
+class BackendStats:
+    """Latências e falhas observadas de um backend."""
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    successes: int = 0
+    failures: int = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        if ok:
+            self.successes += 1
+            self.latencies.append(latency)
+        else:
+            self.failures += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    @property
+    def failure_rate(self) -> float:
+        total = self.successes + self.failures
+        return self.failures / total if total else 0.0
+
+
+def parse_backend_specs(specs: str, api_key: Optional[str] = None) -> List[LLMBackend]:
+    """
+    Converte uma lista "provedor:modelo" separada por vírgulas em backends.
+    Ex: "ollama:gemma3:4b,gemini:gemma-3-27b-it"
+    """
+    backends = []
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec or ":" not in spec:
+            continue
+        provider, model = spec.split(":", 1)
+        provider = provider.strip().lower()
+        backends.append(LLMBackend(provider, model.strip(), api_key=api_key if provider == "gemini" else None))
+    return backends
+
+
+class LLMRouter:
+    """
+    Roteador com requisições hedged e fallback por latência/falhas.
+
+    Args:
+        backends: Backends em ordem de preferência inicial
+        hedge_quantile: Quantil de latência que dispara o hedge (0.95 = p95)
+        default_hedge_delay: Atraso do hedge enquanto não há amostras
+        max_workers: Requisições simultâneas no máximo
+    """
+
+    def __init__(self, backends: List[LLMBackend], hedge_quantile: float = 0.95,
+                 default_hedge_delay: float = DEFAULT_HEDGE_DELAY, max_workers: int = 4):
+        if not backends:
+            raise ValueError("O roteador precisa de pelo menos um backend")
+        self.backends = list(backends)
+        self.hedge_quantile = hedge_quantile
+        self.default_hedge_delay = default_hedge_delay
+        self.stats: Dict[str, BackendStats] = {b.name: BackendStats() for b in self.backends}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+
+    @classmethod
+    def from_env(cls, api_key: Optional[str] = None) -> "LLMRouter":
+        """Cria o roteador a partir de LLM_ROUTER_BACKENDS."""
+        specs = os.environ.get("LLM_ROUTER_BACKENDS", "ollama:gemma3:4b,gemini:gemma-3-27b-it")
+        return cls(parse_backend_specs(specs, api_key=api_key))
+
+    def ranked_backends(self) -> List[LLMBackend]:
+        """Ordena os backends por taxa de falhas e depois pela latência mediana."""
+        def score(backend: LLMBackend):
+            stats = self.stats[backend.name]
+            median = stats.quantile(0.5)
+            # Sem amostras suficientes, mantém a ordem de preferência
+            return (round(stats.failure_rate, 1), median if median is not None else 0.0)
+        with self._lock:
+            order = {b.name: i for i, b in enumerate(self.backends)}
+            return sorted(self.backends, key=lambda b: (score(b), order[b.name]))
+
+    def hedge_delay(self, backend: LLMBackend) -> float:
+        with self._lock:
+            observed = self.stats[backend.name].quantile(self.hedge_quantile)
+        return observed if observed is not None else self.default_hedge_delay
+
+    def _run(self, backend: LLMBackend, text: str, image_path: Optional[str]) -> Dict[str, Any]:
+        start = time.monotonic()
+        ok = False
+        try:
+            result = backend.parse(text, image_path=image_path)
+            ok = not is_fallback_response(result)
+            if not ok:
+                raise ValueError("Resposta sem cardápio válido")
+            return result
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.stats[backend.name].record(elapsed, ok)
+
+    def parse(self, text: str, image_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Faz o parsing do cardápio pelo melhor backend, com hedge e fallback.
+
+        Raises:
+            RouterError: Se nenhum backend retornar um cardápio válido
+        """
+        queue = self.ranked_backends()
+        pending = {}
+        errors = []
+
+        def launch():
+            backend = queue.pop(0)
+            print(f"[ROUTER] Enviando para {backend.name}...")
+            pending[self._executor.submit(self._run, backend, text, image_path)] = backend
+            return backend
+
+        current = launch()
+        while pending:
+            # Só espera o hedge enquanto houver backend reserva disponível
+            timeout = self.hedge_delay(current) if queue else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                print(f"[ROUTER] {current.name} passou de {timeout:.1f}s, enviando hedge...")
+                current = launch()
+                continue
+
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{backend.name}: {e}")
+                    print(f"[ROUTER] Falha em {backend.name}: {e}")
+                    continue
+                print(f"[ROUTER] Resultado válido de {backend.name}")
+                return result
+
+            # Todas as requisições concluídas falharam: tenta o próximo backend
+            if not pending and queue:
+                current = launch()
+
+        raise RouterError("Nenhum backend retornou cardápio válido: " + "; ".join(errors))
+
+    def report(self) -> str:
+        """Resumo de latência e falhas por backend."""
+        lines = []
+        with self._lock:
+            for backend in self.backends:
+                stats = self.stats[backend.name]
+                p50 = stats.quantile(0.5)
+                p95 = stats.quantile(0.95)
+                lines.append(
+                    f"{backend.name}: {stats.successes} ok, {stats.failures} falhas, "
+                    f"p50={'%.1fs' % p50 if p50 is not None else '-'}, "
+                    f"p95={'%.1fs' % p95 if p95 is not None else '-'}"
+                )
+        return "\n".join(lines)
+
+    def warm_up(self) -> None:
+        """Carrega os modelos locais do Ollama antes do primeiro RU."""
+        for backend in self.backends:
+            if backend.provider != "ollama":
+                continue
+            try:
+                warm_up_ollama(backend.model, host=backend.host)
+            except Exception as e:
+                print(f"[ROUTER] Falha ao carregar {backend.name}: {e}")
+
+    def close(self) -> None:
+        # Requisições perdedoras do hedge não são aguardadas
+        self._executor.shutdown(wait=False)
+        for backend in self.backends:
+            if backend.provider == "ollama":
+                release_ollama(backend.model, host=backend.host)
@@ -0,0 +1,345 @@
+"""
+Banco de trabalho dos cardápios (SQLite).
+
+Cada dia de cada RU é uma linha (ru, data) com as refeições, o estado na
+revisão (pending → approved → uploaded), o hash do conteúdo e os horários de
+criação, alteração, aprovação e envio. Índices em (ru, data) e em
+(status, ru, data) deixam consultas como "aprovados e ainda não enviados"
+a uma busca indexada, em vez de ler todos os arquivos de jsons/.
+
+As ações da revisão (aprovar, remover aprovação, aprovar todos, editar) são
+pequenas transações por dia (set_approval, patch_days), sem reescrever o JSON
+inteiro; aprovar todos os RUs é uma única transação.
+
+jsons/<ru>.json continua existindo como formato de troca: o pipeline grava o
+JSON e o importa (import_json), e export_json gera o arquivo no formato antigo
+(com approved/approved_timestamp). Um arquivo só é reimportado quando seus
+bytes mudam, então reimportar o mesmo arquivo não desfaz aprovações.
+
+As chaves dos RUs são os nomes dos arquivos sem extensão ("cca", "trindade").
+"""
+
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from core.serialization import dumps, dumps_bytes, loads
+from core.storage import write_bytes_if_changed
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MENU_STORE_DB = os.environ.get("MENU_STORE_DB", os.path.join(BASE_DIR, "menus.sqlite3"))
+
+PENDING = "pending"
+APPROVED = "approved"
+UPLOADED = "uploaded"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    ru TEXT NOT NULL,
+    date TEXT NOT NULL,
+    meals TEXT NOT NULL,
+    weekday TEXT,
+    timestamp INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    content_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    approved_at INTEGER,
+    uploaded_at REAL,
+    PRIMARY KEY (ru, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS days_status ON days (status, ru, date);
+CREATE TABLE IF NOT EXISTS menus (
+    ru TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL DEFAULT 0,
+    source_hash TEXT,
+    updated_at REAL
+) WITHOUT ROWID;
+"""
+
+
+def ru_key(file_name: str) -> str:
+    """Chave de um RU a partir do nome do arquivo (ex.: "jsons/cca.json" → "cca")."""
+    base_name = os.path.basename(file_name)
+    return base_name[:-5] if base_name.endswith('.json') else base_name
+
+
+def menu_file_name(ru: str) -> str:
+    """Nome do arquivo de troca de um RU (ex.: "cca" → "cca.json")."""
+    return f"{ru}.json"
+
+
+def day_content_hash(day: Mapping[str, Any]) -> str:
+    """Hash do conteúdo de um dia (refeições e dia da semana), sem os campos de revisão."""
+    content = dumps([day.get('menu', []), day.get('weekday')])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class MenuStore:
+    """
+    Repositório dos cardápios em SQLite.
+
+    Args:
+        path: Arquivo do banco (padrão: MENU_STORE_DB ou menus.sqlite3)
+    """
+
+    def __init__(self, path: str = MENU_STORE_DB):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Uma conexão por thread (sqlite3 não compartilha conexões entre threads)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Transação de escrita (BEGIN IMMEDIATE): tudo ou nada, sem corrida entre processos."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, ru: str, source_hash: Optional[str] = None) -> None:
+        conn.execute(
+            "INSERT INTO menus (ru, revision, source_hash, updated_at) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT(ru) DO UPDATE SET revision = revision + 1, updated_at = excluded.updated_at, "
+            "source_hash = COALESCE(excluded.source_hash, source_hash)",
+            (ru, source_hash, time.time())
+        )
+
+    # --- Leitura ---
+
+    def revision(self, ru: str) -> int:
+        """Contador incrementado a cada escrita no RU (para invalidar caches)."""
+        row = self._connection().execute("SELECT revision FROM menus WHERE ru = ?", (ru,)).fetchone()
+        return row[0] if row else 0
+
+    def updated_at(self, ru: str) -> Optional[float]:
+        row = self._connection().execute("SELECT updated_at FROM menus WHERE ru = ?", (ru,)).fetchone()
+        return row[0] if row else None
+
+    def list_menus(self) -> List[str]:
+        """RUs com dias ainda não enviados."""
+        rows = self._connection().execute(
+            "SELECT DISTINCT ru FROM days WHERE status != ? ORDER BY ru", (UPLOADED,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _day_from_row(meals: str, weekday: Optional[str], timestamp: int, status: str,
+                      approved_at: Optional[int]) -> Dict[str, Any]:
+        day = {'menu': loads(meals), 'weekday': weekday, 'timestamp': timestamp}
+        if status != PENDING:
+            day['approved'] = True
+            day['approved_timestamp'] = approved_at
+        return day
+
+    def get_menu(self, ru: str, include_uploaded: bool = False) -> Dict[str, Any]:
+        """Cardápio de um RU no formato dos JSONs ({data: {menu, weekday, timestamp, ...}})."""
+        query = "SELECT date, meals, weekday, timestamp, status, approved_at FROM days WHERE ru = ?"
+        params: tuple = (ru,)
+        if not include_uploaded:
+            query += " AND status != ?"
+            params += (UPLOADED,)
+        rows = self._connection().execute(query + " ORDER BY date", params).fetchall()
+        return {row[0]: self._day_from_row(*row[1:]) for row in rows}
+
+    def approved_not_uploaded(self) -> Dict[str, Dict[str, Any]]:
+        """Dias aprovados e ainda não enviados, por RU (consulta no índice de status)."""
+        rows = self._connection().execute(
+            "SELECT ru, date, meals, weekday, timestamp, status, approved_at FROM days "
+            "WHERE status = ? ORDER BY ru, date", (APPROVED,)
+        ).fetchall()
+        result: Dict[str, Dict[str, Any]] = {}
+        for ru, date, *day in rows:
+            result.setdefault(ru, {})[date] = self._day_from_row(*day)
+        return result
+
+    # --- Escrita ---
+
+    def save_menu(self, ru: str, data: Mapping[str, Any], source_hash: Optional[str] = None) -> bool:
+        """
+        Substitui o cardápio de um RU pela saída do pipeline.
+
+        Dias com o mesmo conteúdo mantêm o estado (e a aprovação); dias alterados
+        voltam a pendente; dias que sumiram e ainda não foram enviados são removidos.
+        Dias marcados como aprovados no JSON entram como aprovados.
+
+        Returns:
+            bool: True se algo mudou
+        """
+        now = time.time()
+        changed = False
+        with self.transaction() as conn:
+            current = {
+                date: (content_hash, status)
+                for date, content_hash, status in conn.execute(
+                    "SELECT date, content_hash, status FROM days WHERE ru = ?", (ru,)
+                )
+            }
+            for date, day in data.items():
+                if not isinstance(day, dict):
+                    continue
+                content_hash = day_content_hash(day)
+                approved = bool(day.get('approved'))
+                previous = current.get(date)
+                if previous and previous[0] == content_hash and (previous[1] != PENDING or not approved):
+                    continue
+                status = APPROVED if approved else PENDING
+                conn.execute(
+                    "INSERT INTO days (ru, date, meals, weekday, timestamp, status, content_hash, "
+                    "created_at, updated_at, approved_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(ru, date) DO UPDATE SET meals = excluded.meals, weekday = excluded.weekday, "
+                    "timestamp = excluded.timestamp, status = excluded.status, "
+                    "content_hash = excluded.content_hash, updated_at = excluded.updated_at, "
+                    "approved_at = excluded.approved_at, uploaded_at = NULL",
+                    (ru, date, dumps(day.get('menu', [])), day.get('weekday'), day.get('timestamp', 0) or 0,
+                     status, content_hash, now, now, day.get('approved_timestamp') if approved else None)
+                )
+                changed = True
+            stale = [(ru, date) for date, (_, status) in current.items() if date not in data and status != UPLOADED]
+            if stale:
+                conn.executemany("DELETE FROM days WHERE ru = ? AND date = ?", stale)
+                changed = True
+            if changed or source_hash is not None:
+                self._bump(conn, ru, source_hash)
+        return changed
+
+    def patch_days(self, ru: str, days: Mapping[str, Optional[Dict[str, Any]]]) -> None:
+        """Edita dias de um RU ({data: dia}); None remove o dia. Dias editados mantêm o estado."""
+        now = time.time()
+        with self.transaction() as conn:
+            for date, day in days.items():
+                if day is None:
+                    conn.execute("DELETE FROM days WHERE ru = ? AND date = ?", (ru, date))
+                    continue
+                conn.execute(
+                    "INSERT INTO days (ru, date, meals, weekday, timestamp, content_hash, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(ru, date) DO UPDATE SET meals = excluded.meals, weekday = excluded.weekday, "
+                    "timestamp = excluded.timestamp, content_hash = excluded.content_hash, "
+                    "updated_at = excluded.updated_at",
+                    (ru, date, dumps(day.get('menu', [])), day.get('weekday'), day.get('timestamp', 0) or 0,
+                     day_content_hash(day), now, now)
+                )
+            self._bump(conn, ru)
+
+    def set_approval(self, approvals: Mapping[str, Iterable[str]], approved: bool = True,
+                     timestamp: Optional[int] = None) -> int:
+        """
+        Aprova (ou remove a aprovação de) dias de vários RUs em uma única transação.
+
+        Args:
+            approvals: {ru: [datas]}
+            approved: True para aprovar, False para voltar a pendente
+
+        Returns:
+            int: Quantidade de dias alterados
+        """
+        if timestamp is None:
+            timestamp = int(time.time())
+        now = time.time()
+        count = 0
+        with self.transaction() as conn:
+            for ru, dates in approvals.items():
+                if approved:
+                    rows = [(APPROVED, timestamp, now, ru, date, PENDING) for date in dates]
+                else:
+                    rows = [(PENDING, None, now, ru, date, APPROVED) for date in dates]
+                if not rows:
+                    continue
+                cursor = conn.executemany(
+                    "UPDATE days SET status = ?, approved_at = ?, updated_at = ? "
+                    "WHERE ru = ? AND date = ? AND status = ?",
+                    rows
+                )
+                if cursor.rowcount:
+                    self._bump(conn, ru)
+                    count += cursor.rowcount
+        return count
+
+    def mark_uploaded(self, ru: str, dates: Iterable[str]) -> None:
+        """Marca dias como enviados ao Firebase (deixam de aparecer na revisão)."""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.executemany(
+                "UPDATE days SET status = ?, uploaded_at = ?, updated_at = ? WHERE ru = ? AND date = ?",
+                [(UPLOADED, now, now, ru, date) for date in dates]
+            )
+            self._bump(conn, ru)
+
+    def delete_menu(self, ru: str) -> None:
+        """Remove os dias ainda não enviados de um RU."""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM days WHERE ru = ? AND status != ?", (ru, UPLOADED))
+            self._bump(conn, ru)
+
+    # --- Importação e exportação JSON ---
+
+    def import_json(self, path: str) -> bool:
+        """
+        Importa jsons/<ru>.json se os bytes mudaram desde a última importação/exportação.
+
+        Returns:
+            bool: True se o cardápio do RU mudou
+        """
+        with open(path, 'rb') as f:
+            content = f.read()
+        source_hash = hashlib.sha256(content).hexdigest()
+        ru = ru_key(path)
+        row = self._connection().execute("SELECT source_hash FROM menus WHERE ru = ?", (ru,)).fetchone()
+        if row and row[0] == source_hash:
+            return False
+        data = loads(content)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: o JSON deve ser um objeto {{data: dia}}")
+        return self.save_menu(ru, data, source_hash=source_hash)
+
+    def import_directory(self, directory: str, pattern: str = "*.json") -> List[str]:
+        """Importa os arquivos alterados de um diretório. Retorna os RUs que mudaram."""
+        changed = []
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            try:
+                if self.import_json(path):
+                    changed.append(ru_key(path))
+            except Exception as e:
+                print(f"[STORE] Erro ao importar {os.path.basename(path)}: {e}")
+        return changed
+
+    def export_json(self, ru: str, path: str) -> bool:
+        """Grava o cardápio do RU no formato JSON antigo. Retorna True se o arquivo mudou."""
+        content = dumps_bytes(self.get_menu(ru), indent=2)
+        written = write_bytes_if_changed(path, content)
+        with self.transaction() as conn:
+            conn.execute("UPDATE menus SET source_hash = ? WHERE ru = ?", (hashlib.sha256(content).hexdigest(), ru))
+        return written
+
+
+_default_store: Optional[MenuStore] = None
+_default_lock = threading.Lock()
+
+
+def get_menu_store() -> MenuStore:
+    """Banco padrão (MENU_STORE_DB), compartilhado pelo processo."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = MenuStore()
+        return _default_store
@@ -0,0 +1,303 @@
+"""
+Pipeline de obtenção do cardápio de um RU, executado no próprio processo.
+
+coleta (scraper) → compactação/limpeza → parsing (Ollama, Gemini ou roteador)
+→ validação → gravação em jsons/ e no banco de cardápios (core.menu_store). O main.py usa este módulo no lote completo;
+as interfaces de revisão usam a mesma instância para regenerar um único RU,
+reaproveitando o modelo já carregado no Ollama, as estatísticas do roteador
+e os caches do validador em vez de executar o main.py do zero.
+
+O progresso de cada etapa é informado por callback(etapa, mensagem, nível),
+com nível "info", "success", "warning", "error" ou "debug" (prévias longas).
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from scrapers import (
+    BlumenauScraper,
+    CuritibanosScraper,
+    FlorianopolisCCAScraper,
+    FlorianopolisTrindadeScraper,
+    JoinvilleScraper,
+)
+from core.postprocess import clean_menu_text, compact_menu_text
+from core.storage import write_json_if_changed
+from core.serialization import load as load_json, dumps as dump_json
+from core.ai_parse import parse_menu_with_ollama, parse_menu_with_gemini, warm_up_ollama, release_ollama
+from core.json_validator import comprehensive_json_validator
+from core.menu_store import get_menu_store
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JSONS_DIR = os.path.join(BASE_DIR, "jsons")
+LAST_RUNS_FILE = os.path.join(BASE_DIR, "last_runs.json")
+
+# RUs disponíveis, na ordem apresentada ao usuário
+RUS_DISPONIVEIS: List[Tuple[str, Type]] = [
+    ("Blumenau", BlumenauScraper),
+    ("Curitibanos", CuritibanosScraper),
+    ("CCA", FlorianopolisCCAScraper),
+    ("Trindade", FlorianopolisTrindadeScraper),
+    ("Joinville", JoinvilleScraper),
+]
+
+# Etapas informadas ao callback de progresso
+STAGES = ("coleta", "compactação", "parsing", "validação", "gravação")
+
+# Modelo padrão por método quando RU_PARSE_MODEL não está definido
+DEFAULT_MODELS = {
+    "ollama": "gemma3:4b",
+    "gemini": "gemma-3-27b-it",
+    "router": "ollama:gemma3:4b,gemini:gemma-3-27b-it",
+}
+
+ProgressCallback = Callable[[str, str, str], None]
+
+
+def ru_json_filename(ru_name: str) -> str:
+    """Nome do arquivo JSON gerado para um RU (ex.: "CCA" → "cca.json")."""
+    return f"{ru_name.lower().replace(' ', '_')}.json"
+
+
+def ru_name_from_filename(file_name: str) -> Optional[str]:
+    """RU correspondente a um arquivo de jsons/, ou None se não houver scraper."""
+    base_name = os.path.basename(file_name)
+    for ru_name, _ in RUS_DISPONIVEIS:
+        if ru_json_filename(ru_name) == base_name:
+            return ru_name
+    return None
+
+
+def load_last_runs() -> Dict[str, str]:
+    if os.path.exists(LAST_RUNS_FILE):
+        try:
+            return load_json(LAST_RUNS_FILE)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_last_run(ru_nome: str) -> None:
+    last_runs = load_last_runs()
+    last_runs[ru_nome] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    write_json_if_changed(LAST_RUNS_FILE, last_runs)
+
+
+def _print_progress(stage: str, message: str, level: str) -> None:
+    if level != "debug":
+        print(f"[{stage.upper()}] {message}")
+
+
+class RegenerationError(Exception):
+    """Falha em uma etapa do pipeline; guarda a etapa em que ocorreu."""
+
+    def __init__(self, ru_name: str, stage: str, cause: Exception):
+        super().__init__(f"{ru_name}: falha na etapa de {stage}: {cause}")
+        self.ru_name = ru_name
+        self.stage = stage
+        self.cause = cause
+
+
+@dataclass
+class RegenerationResult:
+    """Resultado da obtenção do cardápio de um RU."""
+    ru_name: str
+    json_path: str
+    data: Dict[str, Any]
+    written: bool
+    errors: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.timings.values())
+
+
+class MenuPipeline:
+    """
+    Executa o pipeline de um RU por vez, mantendo os clientes aquecidos entre execuções.
+
+    Args:
+        metodo: "ollama", "gemini" ou "router"
+        modelo: Modelo (ou especificação dos backends, para o roteador)
+        api_key: Chave do Gemini (None usa GEMINI_API_KEY)
+        jsons_dir: Pasta onde os JSONs são gravados
+    """
+
+    def __init__(self, metodo: str = "gemini", modelo: Optional[str] = None,
+                 api_key: Optional[str] = None, jsons_dir: str = JSONS_DIR):
+        if metodo not in DEFAULT_MODELS:
+            raise ValueError(f"Método de parsing desconhecido: {metodo}")
+        self.metodo = metodo
+        self.modelo = modelo or DEFAULT_MODELS[metodo]
+        self.api_key = api_key
+        self.jsons_dir = jsons_dir
+        self.router = None
+        self._warm = False
+        self._lock = threading.Lock()
+        # Um RU não é regenerado duas vezes ao mesmo tempo
+        self._ru_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def from_env(cls, jsons_dir: str = JSONS_DIR) -> "MenuPipeline":
+        """Cria o pipeline a partir de RU_PARSE_METHOD e RU_PARSE_MODEL (usado pelas interfaces)."""
+        metodo = os.environ.get("RU_PARSE_METHOD", "gemini").strip().lower()
+        modelo = os.environ.get("RU_PARSE_MODEL")
+        if metodo == "router" and not modelo:
+            modelo = os.environ.get("LLM_ROUTER_BACKENDS")
+        return cls(metodo, modelo, jsons_dir=jsons_dir)
+
+    def warm_up(self) -> None:
+        """Carrega o modelo local / cria o roteador uma única vez."""
+        with self._lock:
+            if self._warm:
+                return
+            if self.metodo == "router":
+                from core.llm_router import LLMRouter, parse_backend_specs
+                self.router = LLMRouter(parse_backend_specs(self.modelo, api_key=self.api_key))
+                self.router.warm_up()
+            elif self.metodo == "ollama":
+                # Carrega o modelo uma vez e o mantém carregado entre as execuções
+                try:
+                    warm_up_ollama(self.modelo)
+                except Exception as e:
+                    print(f"[OLLAMA] Falha no pré-carregamento de {self.modelo}: {e}")
+            self._warm = True
+
+    def close(self) -> None:
+        """Libera o modelo do Ollama e as threads do roteador."""
+        with self._lock:
+            if not self._warm:
+                return
+            if self.router is not None:
+                self.router.close()
+                self.router = None
+            elif self.metodo == "ollama":
+                release_ollama(self.modelo)
+            self._warm = False
+
+    def report(self) -> Optional[str]:
+        """Latência e falhas por backend (apenas no modo roteador)."""
+        return self.router.report() if self.router is not None else None
+
+    def parse(self, text: str, image_path: Optional[str] = None) -> Dict[str, Any]:
+        if self.metodo == "ollama":
+            return parse_menu_with_ollama(text, model=self.modelo, image_path=image_path)
+        if self.metodo == "router":
+            return self.router.parse(text, image_path=image_path)
+        return parse_menu_with_gemini(text, model=self.modelo, api_key=self.api_key, image_path=image_path)
+
+    def _ru_lock(self, ru_name: str) -> threading.Lock:
+        with self._lock:
+            return self._ru_locks.setdefault(ru_name, threading.Lock())
+
+    def run_ru(self, ru_name: str, scraper_class: Optional[Type] = None,
+               progress: Optional[ProgressCallback] = None) -> RegenerationResult:
+        """
+        Obtém, interpreta, valida e grava o cardápio de um único RU.
+
+        Args:
+            ru_name: Nome do RU (ver RUS_DISPONIVEIS)
+            scraper_class: Scraper a usar; por padrão o registrado para o RU
+            progress: callback(etapa, mensagem, nível)
+
+        Raises:
+            RegenerationError: Com a etapa em que a execução falhou
+        """
+        progress = progress or _print_progress
+        if scraper_class is None:
+            scraper_class = dict(RUS_DISPONIVEIS).get(ru_name)
+            if scraper_class is None:
+                raise ValueError(f"RU desconhecido: {ru_name}")
+
+        self.warm_up()
+        timings: Dict[str, float] = {}
+        stage = STAGES[0]
+        started = time.perf_counter()
+
+        def finish_stage(next_stage: Optional[str] = None) -> None:
+            nonlocal stage, started
+            now = time.perf_counter()
+            timings[stage] = now - started
+            started = now
+            if next_stage:
+                stage = next_stage
+
+        with self._ru_lock(ru_name):
+            try:
+                progress(stage, f"Obtendo texto do cardápio de {ru_name}...", "info")
+                scraper = scraper_class()
+                menu = scraper.get_menu_text()
+                finish_stage("compactação")
+
+                # Período da semana atual em diante, sem cabeçalhos/rodapés e boilerplate
+                hoje = datetime.now().date()
+                menu, compact_report = compact_menu_text(menu, ru_name=ru_name, start_date=hoje - timedelta(days=hoje.weekday()))
+                progress(stage, str(compact_report), "info")
+                menu_clean = clean_menu_text(menu)
+                lines = menu_clean.splitlines()
+                progress(stage, "Texto limpo (primeiras 3 linhas):\n" + '\n'.join(lines[:3]) + ("\n..." if len(lines) > 3 else ""), "debug")
+                finish_stage("parsing")
+
+                backend = {"ollama": "Ollama", "router": "roteador de LLMs"}.get(self.metodo, "Gemini")
+                progress(stage, f"Enviando para o {backend}...", "info")
+                image_path = getattr(scraper, 'get_menu_image_path', lambda: None)()
+                parsed = self.parse(menu_clean, image_path=image_path)
+                finish_stage("validação")
+
+                progress(stage, "Verificando formato do JSON...", "info")
+                is_valid, parsed, errors = comprehensive_json_validator(parsed)
+                if is_valid:
+                    progress(stage, "JSON válido!", "success")
+                else:
+                    progress(stage, f"{len(errors)} problema(s) encontrado(s); usando JSON corrigido automaticamente", "warning")
+                    for err in errors[:5]:
+                        progress(stage, f"   - {err}", "error")
+                    if len(errors) > 5:
+                        progress(stage, f"   ... e mais {len(errors) - 5} erros", "warning")
+                json_preview = dump_json(parsed, indent=2).splitlines()[:5]
+                progress(stage, "JSON final (primeiras 5 linhas):\n" + '\n'.join(json_preview) + ("\n..." if len(json_preview) == 5 else ""), "debug")
+                finish_stage("gravação")
+
+                os.makedirs(self.jsons_dir, exist_ok=True)
+                json_path = os.path.join(self.jsons_dir, ru_json_filename(ru_name))
+                written = write_json_if_changed(json_path, parsed)
+                # O banco de trabalho recebe o cardápio novo; dias iguais mantêm a aprovação
+                get_menu_store().import_json(json_path)
+                if written:
+                    progress(stage, f"JSON salvo em {json_path}", "success")
+                else:
+                    progress(stage, f"{json_path} já estava atualizado", "info")
+                save_last_run(ru_name)
+                finish_stage()
+            except Exception as e:
+                progress(stage, str(e), "error")
+                raise RegenerationError(ru_name, stage, e) from e
+
+        return RegenerationResult(ru_name, json_path, parsed, written, [str(err) for err in errors], timings)
+
+
+_shared_pipeline: Optional[MenuPipeline] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_pipeline(jsons_dir: str = JSONS_DIR) -> MenuPipeline:
+    """Instância única usada pelas interfaces de revisão (configurada por variáveis de ambiente)."""
+    global _shared_pipeline
+    with _shared_lock:
+        if _shared_pipeline is None:
+            _shared_pipeline = MenuPipeline.from_env(jsons_dir=jsons_dir)
+        return _shared_pipeline
+
+
+def close_shared_pipeline() -> None:
+    """Libera os clientes da instância compartilhada, se ela chegou a ser criada."""
+    global _shared_pipeline
+    with _shared_lock:
+        if _shared_pipeline is not None:
+            _shared_pipeline.close()
+            _shared_pipeline = None
@@ -1,4 +1,6 @@
 import re
+from dataclasses import dataclass
+from datetime import date
 
 def clean_menu_text(text: str) -> str:
     """
@@ -70,6 +72,192 @@ def associate_dates_weekdays(text: str) -> list:
         blocks.append((current_date, current_weekday, '\n'.join(buffer).strip()))
     return blocks
 
+# Separador de páginas usado na extração de texto dos PDFs
+PAGE_BREAK = '\f'
+
+# Boilerplate comum a todos os RUs (rodapés, avisos e tabelas nutricionais).
+# Cada padrão descreve a linha inteira: linhas de pratos que só mencionam
+# um nutriente ou as calorias (ex.: "Frango ao molho 350 kcal") são mantidas.
+COMMON_BOILERPLATE = [
+    r'card[áa]pio\s+sujeito\s+a\s+altera[çc][õo]es',
+    r'universidade\s+federal\s+de\s+santa\s+catarina',
+    r'restaurante\s+universit[áa]rio\s*[-–]?\s*(ru)?',
+    r'informa[çc][ãa]o\s+nutricional(\s+\S+)?',
+    r'(valor\s+energ[ée]tico\s*[:=-]?\s*)?\d+([.,]\d+)?\s*(kcal|kj)(\s*/\s*\d+([.,]\d+)?\s*(kcal|kj))?',
+    r'valor\s+energ[ée]tico',
+    r'(carboidratos?|prote[íi]nas?|gorduras?\s+(totais|saturadas|trans)|fibra\s+alimentar|s[óo]dio)'
+    r'\s*[:=-]?\s*\d+([.,]\d+)?\s*(g|mg|%)?(\s*\(?\d+([.,]\d+)?\s*%\)?)?',
+    r'nutricionistas?(\s+respons[áa]ve(l|is))?(\s*[:-]\s*.*)?',
+    r'(.*\s)?crn[-\s]?\d+.*',
+    r'p[áa]gina\s+\d+(\s+de\s+\d+)?',
+    r'https?://\S+',
+]
+
+# Boilerplate específico de cada RU (nome exibido em main.py)
+RU_BOILERPLATE = {
+    'Blumenau': [r'ru\s+blumenau', r'campus\s+blumenau'],
+    'Curitibanos': [r'campus\s+curitibanos'],
+    'CCA': [r'centro\s+de\s+ci[êe]ncias\s+agr[áa]rias'],
+    'Trindade': [r'campus\s+(reitor\s+jo[ãa]o\s+david\s+ferreira\s+lima|trindade)'],
+    'Joinville': [r'campus\s+joinville', r'restaurante\s+universit[áa]rio\s+joinville'],
+}
+
+# Datas com ou sem ano (dd/mm/aaaa, dd-mm-aa, dd/mm)
+_DATE_RE = re.compile(r'\b(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?\b')
+# O que pode acompanhar as datas em um cabeçalho de dia ("SEGUNDA-FEIRA 13/10", "Semana de 13/10 a 17/10")
+_HEADER_WORDS_RE = re.compile(
+    r'(segunda|ter[çc]a|terca|quarta|quinta|sexta|s[áa]bado|domingo)(\s*-?\s*feira)?'
+    r'|\b(dia|de|da|do|a|at[ée]|e|semana|card[áa]pio)\b',
+    re.IGNORECASE
+)
+# Abaixo desta fração do texto original, a compactação é considerada um erro
+MIN_KEPT_RATIO = 0.2
+_BOILERPLATE_CACHE = {}
+
+
+def _boilerplate_regex(ru_name=None):
+    """Compila (uma vez por RU) uma única alternação que precisa casar com a linha inteira."""
+    if ru_name not in _BOILERPLATE_CACHE:
+        patterns = COMMON_BOILERPLATE + RU_BOILERPLATE.get(ru_name, [])
+        alternation = '|'.join(f'(?:{p})' for p in patterns)
+        # Pontuação nas bordas ("* Cardápio sujeito a alterações.") não impede o casamento
+        _BOILERPLATE_CACHE[ru_name] = re.compile(rf'[\W_]*(?:{alternation})[\W_]*', re.IGNORECASE)
+    return _BOILERPLATE_CACHE[ru_name]
+
+
+def _infer_year(day, month, reference):
+    """Ano de uma data sem ano: o que a deixa mais próxima da data de referência."""
+    candidates = []
+    for year in (reference.year - 1, reference.year, reference.year + 1):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:
+            continue
+    if not candidates:
+        return None
+    return min(candidates, key=lambda d: abs((d - reference).days))
+
+
+def _header_dates(line, reference=None):
+    """
+    Datas de uma linha de cabeçalho de dia (ex.: "SEGUNDA 13/10", "14/10/2025 - Terça").
+    Linhas com outro conteúdo ("atualizado em 02/09/2025", "Arroz 1/2 concha") retornam [].
+    """
+    matches = _DATE_RE.findall(line)
+    if not matches:
+        return []
+    rest = _HEADER_WORDS_RE.sub('', _DATE_RE.sub('', line))
+    if re.search(r'[^\W\d_]', rest):
+        return []
+    reference = reference or date.today()
+    dates = []
+    for day, month, year in matches:
+        try:
+            if year:
+                year = int(year)
+                dates.append(date(year + 2000 if year < 100 else year, int(month), int(day)))
+            else:
+                inferred = _infer_year(int(day), int(month), reference)
+                if inferred:
+                    dates.append(inferred)
+        except ValueError:
+            continue
+    return dates
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token em português)."""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class CompactionReport:
+    """Resumo do que a compactação removeu do texto."""
+    original_tokens: int = 0
+    compacted_tokens: int = 0
+    out_of_range_lines: int = 0
+    repeated_lines: int = 0
+    boilerplate_lines: int = 0
+    fallback: bool = False
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+    def __str__(self):
+        if self.fallback:
+            return f"~{self.original_tokens} tokens: compactação removeria quase todo o texto; usando o texto original"
+        pct = 100 * self.tokens_saved / self.original_tokens if self.original_tokens else 0
+        return (f"~{self.original_tokens} -> ~{self.compacted_tokens} tokens "
+                f"({self.tokens_saved} economizados, {pct:.0f}%): "
+                f"{self.out_of_range_lines} fora do período, {self.repeated_lines} cabeçalhos/rodapés repetidos, "
+                f"{self.boilerplate_lines} boilerplate")
+
+
+def compact_menu_text(text: str, ru_name: str = None, start_date: date = None, end_date: date = None):
+    """
+    Reduz o texto do cardápio antes de enviá-lo ao LLM.
+    - Remove seções de dias cujas datas estão todas fora do período [start_date, end_date]
+      (só cabeçalhos de dia abrem ou fecham uma seção)
+    - Remove cabeçalhos/rodapés repetidos entre páginas (separadas por '\\f')
+    - Remove linhas que são inteiramente boilerplate conhecido (comum e específico do RU)
+    - Se sobrar menos de MIN_KEPT_RATIO do texto, retorna o texto original
+    Retorna (texto_compactado, CompactionReport).
+    """
+    report = CompactionReport(original_tokens=estimate_tokens(text))
+    boilerplate = _boilerplate_regex(ru_name)
+
+    # Cabeçalhos/rodapés: primeiras e últimas linhas que se repetem em mais de uma página
+    pages = text.split(PAGE_BREAK)
+    edge_counts = {}
+    if len(pages) > 1:
+        for page in pages:
+            lines = [l.strip() for l in page.splitlines() if l.strip()]
+            for line in set(lines[:3] + lines[-3:]):
+                edge_counts[line] = edge_counts.get(line, 0) + 1
+    repeated_edges = {line for line, count in edge_counts.items() if count > 1}
+
+    kept = []
+    seen_edges = set()
+    section_in_range = True
+    for raw_line in text.replace(PAGE_BREAK, '\n').splitlines():
+        line = raw_line.strip()
+        if not line:
+            kept.append(raw_line)
+            continue
+
+        if line in repeated_edges:
+            if line in seen_edges:
+                report.repeated_lines += 1
+                continue
+            seen_edges.add(line)
+
+        # Um cabeçalho de dia abre uma nova seção; descarta a seção se todas as datas estão fora do período
+        dates = _header_dates(line, start_date or end_date)
+        if dates:
+            section_in_range = any(
+                (start_date is None or d >= start_date) and (end_date is None or d <= end_date)
+                for d in dates
+            )
+        if not section_in_range:
+            report.out_of_range_lines += 1
+            continue
+
+        if boilerplate.fullmatch(line):
+            report.boilerplate_lines += 1
+            continue
+
+        kept.append(raw_line)
+
+    compacted = '\n'.join(kept)
+    original_size = len(re.sub(r'\s', '', text))
+    if original_size and len(re.sub(r'\s', '', compacted)) < MIN_KEPT_RATIO * original_size:
+        # Provavelmente um cabeçalho ou padrão mal reconhecido: melhor enviar tudo ao LLM
+        report.fallback = True
+        compacted = text.replace(PAGE_BREAK, '\n')
+    report.compacted_tokens = estimate_tokens(compacted)
+    return compacted, report
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
@@ -0,0 +1,65 @@
+"""
+Serialização JSON do projeto.
+
+Usa orjson quando disponível e recai no módulo json da biblioteca padrão.
+A saída é sempre UTF-8 sem escapes ASCII (equivalente a ensure_ascii=False);
+com indent=2 os bytes gerados são os mesmos nos dois backends.
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+# Importação opcional do orjson
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# orjson.JSONDecodeError é subclasse de json.JSONDecodeError
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Desserializa JSON a partir de str ou bytes."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(data: Any, indent: Optional[int] = None, sort_keys: bool = False,
+                default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Serializa para bytes UTF-8.
+
+    Args:
+        data: Objeto a serializar
+        indent: None (compacto) ou 2; outros valores usam o json padrão
+        sort_keys: Ordena as chaves dos objetos
+        default: Conversor para tipos não suportados
+    """
+    if HAS_ORJSON and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, default=default, option=option)
+
+    separators = None if indent else (',', ':')
+    return json.dumps(
+        data, ensure_ascii=False, indent=indent, sort_keys=sort_keys,
+        separators=separators, default=default
+    ).encode('utf-8')
+
+
+def dumps(data: Any, indent: Optional[int] = None, sort_keys: bool = False,
+          default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serializa para str (ver dumps_bytes)."""
+    return dumps_bytes(data, indent=indent, sort_keys=sort_keys, default=default).decode('utf-8')
+
+
+def load(path: str) -> Any:
+    """Lê e desserializa um arquivo JSON."""
+    with open(path, 'rb') as f:
+        return loads(f.read())
@@ -0,0 +1,70 @@
+"""
+Escrita atômica dos arquivos JSON do projeto.
+
+O conteúdo é serializado uma única vez e comparado com os bytes atuais do
+arquivo; só há escrita quando algo mudou, sempre por arquivo temporário no
+mesmo diretório + os.replace. Assim o mtime só muda com o conteúdo e um
+processo interrompido nunca deixa um JSON pela metade.
+"""
+
+import os
+import tempfile
+from typing import Any
+
+from core.serialization import dumps_bytes
+
+
+def dump_json_bytes(data: Any, indent: int = 2) -> bytes:
+    """Serializa no formato usado pelos arquivos do projeto (UTF-8, sem escapes ASCII)."""
+    return dumps_bytes(data, indent=indent)
+
+
+def _current_umask_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_bytes_if_changed(path: str, content: bytes) -> bool:
+    """
+    Grava o conteúdo de forma atômica se ele for diferente do atual.
+
+    Returns:
+        bool: True se o arquivo foi escrito, False se já tinha o mesmo conteúdo
+    """
+    try:
+        if os.path.getsize(path) == len(content):
+            with open(path, 'rb') as f:
+                if f.read() == content:
+                    return False
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = _current_umask_mode()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    # Prefixo com ponto: glob('*.json') não enxerga o temporário
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def write_json_if_changed(path: str, data: Any, indent: int = 2) -> bool:
+    """
+    Serializa e grava o JSON de forma atômica, apenas se o conteúdo mudou.
+
+    Returns:
+        bool: True se o arquivo foi escrito
+    """
+    return write_bytes_if_changed(path, dump_json_bytes(data, indent=indent))
@@ -6,14 +6,14 @@ Permite aprovar, excluir ou obter novamente cada JSON dos cardápios.
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import json
 import os
-import glob
 from datetime import datetime
 from typing import Dict, Any, List
 import threading
 import subprocess
 import sys
+import queue
+import time
 
 # Importar o módulo de upload para Firebase
 try:
@@ -22,6 +22,14 @@ try:
 except ImportError:
     FIREBASE_AVAILABLE = False
 
+from core.serialization import dumps_bytes
+from core.menu_store import get_menu_store, ru_key, menu_file_name
+from core.jsons_watcher import JsonsWatcher
+from core.pipeline import get_shared_pipeline, close_shared_pipeline, ru_name_from_filename
+
+# Intervalo em que a GUI processa os eventos do observador de arquivos (ms)
+FILE_EVENTS_INTERVAL = 200
+
 class MenuReviewGUI:
     def __init__(self, root):
         self.root = root
@@ -37,11 +45,19 @@ class MenuReviewGUI:
         self.json_files = []
         self.current_json_index = 0
         self.current_json_data = {}
+        # Cardápios e aprovações ficam no banco de trabalho, compartilhado com a interface web
+        self.store = get_menu_store()
         
         # Criar interface
         self.create_widgets()
         self.load_json_files()
         
+        # Mudanças em jsons/ chegam pelo observador (em outra thread) e são
+        # aplicadas no loop do Tk, sem varrer a pasta a cada ação
+        self.file_events = queue.Queue()
+        self.watcher = JsonsWatcher(self.jsons_dir, lambda event_type, name: self.file_events.put((event_type, name))).start()
+        self.root.after(FILE_EVENTS_INTERVAL, self._process_file_events)
+        
     def create_widgets(self):
         # Frame principal
         main_frame = ttk.Frame(self.root, padding="10")
@@ -144,8 +160,8 @@ class MenuReviewGUI:
     def load_json_files(self):
         """Carrega a lista de arquivos JSON."""
         try:
-            json_pattern = os.path.join(self.jsons_dir, "*.json")
-            self.json_files = glob.glob(json_pattern)
+            self.store.import_directory(self.jsons_dir)
+            self.json_files = [os.path.join(self.jsons_dir, menu_file_name(ru)) for ru in self.store.list_menus()]
             
             # Atualizar combobox
             file_names = [os.path.basename(f) for f in self.json_files]
@@ -163,6 +179,61 @@ class MenuReviewGUI:
             messagebox.showerror("Erro", f"Erro ao carregar arquivos: {e}")
             self.status_var.set("Erro ao carregar arquivos")
     
+    def _process_file_events(self):
+        """Aplica os eventos de arquivos pendentes (executado no loop do Tk)."""
+        try:
+            while True:
+                event_type, file_name = self.file_events.get_nowait()
+                self._apply_file_event(event_type, file_name)
+        except queue.Empty:
+            pass
+        self.root.after(FILE_EVENTS_INTERVAL, self._process_file_events)
+    
+    def _apply_file_event(self, event_type, file_name):
+        file_path = os.path.join(self.jsons_dir, file_name)
+        file_names = list(self.file_combo['values'])
+        selected = self.file_combo.get()
+        
+        if event_type in ('added', 'changed') and os.path.exists(file_path):
+            try:
+                self.store.import_json(file_path)
+            except Exception as e:
+                print(f"[STORE] Erro ao importar {file_name}: {e}")
+        in_store = ru_key(file_name) in self.store.list_menus()
+        if event_type == 'removed' and in_store:
+            # Só o arquivo de troca saiu; o cardápio continua no banco
+            return
+        if not in_store:
+            # Removido ou todos os dias já enviados
+            event_type = 'removed'
+        
+        if event_type == 'added':
+            if file_path not in self.json_files:
+                self.json_files.append(file_path)
+                file_names.append(file_name)
+                self.file_combo['values'] = file_names
+            if not selected:
+                self.file_combo.current(file_names.index(file_name))
+                self.on_file_selected()
+            self.status_var.set(f"Novo cardápio: {file_name}")
+        elif event_type == 'removed':
+            if file_path in self.json_files:
+                self.json_files.remove(file_path)
+            if file_name in file_names:
+                file_names.remove(file_name)
+                self.file_combo['values'] = file_names
+            if selected == file_name:
+                if file_names:
+                    self.file_combo.current(0)
+                    self.on_file_selected()
+                else:
+                    self.file_combo.set('')
+                    self.clear_display()
+            self.status_var.set(f"Cardápio removido: {file_name}")
+        elif event_type == 'changed' and selected == file_name:
+            self.load_json_content(file_path)
+            self.status_var.set(f"Cardápio atualizado: {file_name}")
+    
     def on_file_selected(self, event=None):
         """Chamado quando um arquivo é selecionado."""
         if not self.file_combo.get():
@@ -174,8 +245,7 @@ class MenuReviewGUI:
     def load_json_content(self, file_path):
         """Carrega e exibe o conteúdo de um arquivo JSON."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.current_json_data = json.load(f)
+            self.current_json_data = self.store.get_menu(ru_key(file_path))
             
             self.display_json_content(file_path)
             self.status_var.set(f"Arquivo carregado: {os.path.basename(file_path)}")
@@ -192,8 +262,8 @@ class MenuReviewGUI:
         
         # Informações do arquivo
         file_name = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
-        file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
+        file_size = len(dumps_bytes(self.current_json_data, indent=2))
+        file_mtime = datetime.fromtimestamp(self.store.updated_at(ru_key(file_path)) or time.time())
         
         info_text = f"📁 Arquivo: {file_name}\n"
         info_text += f"📏 Tamanho: {file_size} bytes\n"
@@ -312,14 +382,9 @@ class MenuReviewGUI:
                 # Adicionar metadata de aprovação
                 file_path = os.path.join(self.jsons_dir, file_name)
                 
-                # Adicionar timestamp de aprovação
-                for day_data in self.current_json_data.values():
-                    day_data['approved'] = True
-                    day_data['approved_timestamp'] = int(datetime.now().timestamp())
-                
-                # Salvar arquivo atualizado
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.current_json_data, f, ensure_ascii=False, indent=2)
+                # Registrar a aprovação de cada dia
+                self.store.set_approval({ru_key(file_name): list(self.current_json_data)}, approved=True)
+                self.current_json_data = self.store.get_menu(ru_key(file_name))
                 
                 # Perguntar se deseja fazer upload para Firebase
                 if FIREBASE_AVAILABLE:
@@ -357,10 +422,12 @@ class MenuReviewGUI:
         if response:
             try:
                 file_path = os.path.join(self.jsons_dir, file_name)
-                os.remove(file_path)
+                self.store.delete_menu(ru_key(file_name))
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                self.file_events.put(('removed', file_name))
                 
                 messagebox.showinfo("Sucesso", f"Cardápio '{file_name}' excluído com sucesso!")
-                self.load_json_files()  # Recarregar lista
                 self.status_var.set(f"Cardápio excluído: {file_name}")
                 
             except Exception as e:
@@ -373,7 +440,10 @@ class MenuReviewGUI:
             return
         
         file_name = self.file_combo.get()
-        ru_name = file_name.replace('.json', '').replace('_', ' ').title()
+        ru_name = ru_name_from_filename(file_name)
+        if ru_name is None:
+            messagebox.showwarning("Aviso", f"Nenhum scraper associado a '{file_name}'")
+            return
         
         response = messagebox.askyesno("Confirmar Regeneração", 
                                      f"Deseja obter novamente o cardápio de '{ru_name}'?\n\n"
@@ -386,32 +456,21 @@ class MenuReviewGUI:
             thread.start()
     
     def _regenerate_worker(self, ru_name, file_name):
-        """Worker thread para regeneração do cardápio."""
+        """Worker thread que obtém novamente apenas este RU, no próprio processo."""
+        def progress(stage, message, level):
+            if level != 'debug':
+                self.root.after(0, lambda: self.status_var.set(f"{ru_name} [{stage}]: {message}"))
+        
         try:
-            self.status_var.set(f"Regenerando cardápio de {ru_name}...")
-            
-            # Executar o scraper principal
-            script_path = os.path.join(os.path.dirname(__file__), "main.py")
-            result = subprocess.run([sys.executable, script_path], 
-                                  capture_output=True, text=True, timeout=300)
+            self.root.after(0, lambda: self.status_var.set(f"Regenerando cardápio de {ru_name}..."))
+            result = get_shared_pipeline(self.jsons_dir).run_ru(ru_name, progress=progress)
             
-            if result.returncode == 0:
-                self.root.after(0, lambda: messagebox.showinfo("Sucesso", 
-                    f"Cardápio de '{ru_name}' regenerado com sucesso!"))
-                self.root.after(0, self.load_json_files)
-                self.root.after(0, lambda: self.status_var.set(f"Cardápio regenerado: {file_name}"))
-            else:
-                error_msg = result.stderr or result.stdout or "Erro desconhecido"
-                self.root.after(0, lambda: messagebox.showerror("Erro", 
-                    f"Erro ao regenerar cardápio:\n{error_msg}"))
-                self.root.after(0, lambda: self.status_var.set("Erro na regeneração"))
+            self.root.after(0, lambda: messagebox.showinfo("Sucesso", 
+                f"Cardápio de '{ru_name}' regenerado com sucesso em {result.total_time:.1f}s!"))
+            self.root.after(0, lambda: self.status_var.set(f"Cardápio regenerado: {file_name}"))
                 
-        except subprocess.TimeoutExpired:
-            self.root.after(0, lambda: messagebox.showerror("Erro", 
-                "Timeout na regeneração do cardápio"))
-            self.root.after(0, lambda: self.status_var.set("Timeout na regeneração"))
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Erro", 
+            self.root.after(0, lambda e=e: messagebox.showerror("Erro", 
                 f"Erro ao regenerar cardápio: {e}"))
             self.root.after(0, lambda: self.status_var.set("Erro na regeneração"))
     
@@ -479,8 +538,7 @@ class MenuReviewGUI:
                 ru_name = file_name.replace('.json', '')
                 self.root.after(0, lambda f=file_name, i=idx, t=total: self.status_var.set(f"Enviando {f} ({i}/{t})..."))
                 
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    menu_data = json.load(f)
+                menu_data = self.store.get_menu(ru_key(file_name))
                 
                 # Filtrar apenas dados aprovados
                 approved_data = {date_str: day_data for date_str, day_data in menu_data.items() 
@@ -491,8 +549,12 @@ class MenuReviewGUI:
                     continue
                 
                 # Fazer upload
-                success = upload_menu_to_firebase(approved_data, ru_name)
-                results[file_name] = success
+                uploaded = upload_menu_to_firebase(approved_data, ru_name)
+                results[file_name] = len(uploaded) == len(approved_data)
+                if uploaded:
+                    # Dias que falharam continuam aprovados para o próximo envio
+                    self.store.mark_uploaded(ru_key(file_name), uploaded)
+                    self.file_events.put(('changed', file_name))
                 
                 self.root.after(0, lambda v=idx: self.progress_bar.config(value=v))
                 self.root.update_idletasks()
@@ -522,7 +584,6 @@ class MenuReviewGUI:
                     "• Dados inválidos"))
                 self.root.after(0, lambda: self.status_var.set("Nenhum upload realizado"))
             
-            self.root.after(0, self.load_json_files)
             self.root.after(0, lambda: self.progress_bar.grid_remove())
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro durante upload: {e}"))
@@ -545,12 +606,15 @@ class MenuReviewGUI:
                 return
             
             # Fazer upload
-            success = upload_menu_to_firebase(approved_data, ru_name)
+            uploaded = upload_menu_to_firebase(approved_data, ru_name)
             
-            if success:
+            if uploaded:
+                # Dias que falharam continuam aprovados para o próximo envio
+                self.store.mark_uploaded(ru_key(file_name), uploaded)
+                self.file_events.put(('changed', file_name))
                 self.root.after(0, lambda: messagebox.showinfo("Upload Concluído", 
                     f"Upload de '{file_name}' realizado com sucesso!\n"
-                    f"Enviados {len(approved_data)} dias de cardápio."))
+                    f"Enviados {len(uploaded)} de {len(approved_data)} dias de cardápio."))
                 self.root.after(0, lambda: self.status_var.set(f"Upload concluído: {file_name}"))
             else:
                 self.root.after(0, lambda: messagebox.showerror("Erro no Upload", 
@@ -592,6 +656,8 @@ def main():
     # Configurar comportamento de fechamento
     def on_closing():
         if messagebox.askokcancel("Sair", "Deseja fechar o revisor de cardápios?"):
+            app.watcher.stop()
+            close_shared_pipeline()
             root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -5,14 +5,21 @@ Permite aprovar, excluir ou obter novamente cada JSON dos cardápios.
 """
 
 import os
-import json
 import glob
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-import subprocess
-import sys
+from datetime import datetime, timedelta
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import threading
 import time
+import queue
+import gzip
+
+# Servidor WSGI de produção (opcional, sem ele usa o servidor do Flask com threads)
+try:
+    from waitress import serve as waitress_serve
+    HAS_WAITRESS = True
+except ImportError:
+    HAS_WAITRESS = False
 
 # Importar o módulo do Firebase uploader
 try:
@@ -21,26 +28,204 @@ try:
 except ImportError:
     FIREBASE_AVAILABLE = False
 
+from core import serialization
+from core.jsons_watcher import JsonsWatcher
+from core.pipeline import get_shared_pipeline, ru_name_from_filename, STAGES
+from core.jobs import JobManager
+from core.menu_store import get_menu_store, ru_key, menu_file_name
+from core.json_validator import comprehensive_json_validator
+from core.json_util import REVIEW_FIELDS
+
+# Intervalo do keep-alive do stream de eventos (segundos)
+SSE_KEEPALIVE = 15
+# Threads do servidor; cada navegador conectado ao /api/events ocupa uma
+REVIEW_THREADS = int(os.environ.get("REVIEW_THREADS", "16"))
+# Conexões de eventos simultâneas; as demais recebem 503 e a página volta ao
+# polling, para que as abas abertas não ocupem todas as threads da API
+SSE_MAX_CLIENTS = int(os.environ.get("SSE_MAX_CLIENTS", max(1, REVIEW_THREADS // 2)))
+# Respostas menores que isso não compensam a compressão (bytes)
+GZIP_MIN_SIZE = 500
+GZIP_LEVEL = 6
+COMPRESSIBLE_MIMETYPES = ('text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript')
+# Semanas por página na visualização de um arquivo (padrão e máximo)
+WEEKS_PER_PAGE = 1
+MAX_WEEKS_PER_PAGE = 8
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify e request.get_json via core.serialization (orjson quando disponível)."""
+
+    def dumps(self, obj, **kwargs):
+        return serialization.dumps(
+            obj,
+            indent=kwargs.get('indent'),
+            sort_keys=kwargs.get('sort_keys', self.sort_keys),
+            default=kwargs.get('default', self.default)
+        )
+
+    def loads(self, s, **kwargs):
+        return serialization.loads(s)
+
 # Corrigir caminho absoluto para a pasta de templates
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 app = Flask(__name__, template_folder=TEMPLATES_DIR)
+app.json = FastJSONProvider(app)
+
+
+@app.after_request
+def compress_and_cache(response):
+    """
+    ETag + revalidação (304) para as páginas e a API, e gzip quando o cliente aceita.
+    Streams (SSE) e arquivos enviados diretamente passam sem alteração.
+    """
+    if response.direct_passthrough or response.is_streamed or response.status_code != 200:
+        return response
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    
+    if request.method == 'GET':
+        # ETag fraca: o mesmo conteúdo pode ir comprimido ou não
+        response.add_etag(weak=True)
+        if 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = 'no-cache'
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+    
+    accepts_gzip = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+    if accepts_gzip and 'Content-Encoding' not in response.headers:
+        data = response.get_data()
+        if len(data) >= GZIP_MIN_SIZE:
+            response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+            response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+class EventBroker:
+    """Distribui eventos (arquivos e status) para os navegadores conectados via SSE."""
+
+    def __init__(self, max_subscribers=None):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Registra um ouvinte; retorna None se o limite de conexões foi atingido."""
+        subscriber = queue.Queue(maxsize=100)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Cliente lento: descarta o evento em vez de travar o publicador
+                pass
+
+
+events = EventBroker(max_subscribers=SSE_MAX_CLIENTS)
+
 
 class MenuReviewApp:
     def __init__(self):
         self.jsons_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "jsons")
-        self.status = "Pronto"
-        
+        self._status = "Pronto"
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+        # Último estado de aprovação conhecido por arquivo, para emitir "approved"/"unapproved"
+        self._approval_state = {}
+        # Resumos por cardápio: {caminho: (revisão no banco, resumo)}
+        self._summaries = {}
+        self._summaries_lock = threading.Lock()
+        # Banco de trabalho dos cardápios, aberto no primeiro uso (ensure_store)
+        self._store = None
+        self._store_lock = threading.Lock()
+        
+    @property
+    def store(self):
+        return self.ensure_store()
+    
+    def ensure_store(self):
+        """Abre (uma vez) o banco de trabalho e importa os arquivos alterados de jsons/."""
+        if self._store is not None:
+            return self._store
+        with self._store_lock:
+            if self._store is None:
+                store = get_menu_store()
+                store.import_directory(self.jsons_dir)
+                self._store = store
+            return self._store
+    
+    @property
+    def status(self):
+        return self._status
+    
+    @status.setter
+    def status(self, value):
+        self._status = value
+        events.publish({'type': 'status', 'status': value})
+    
+    def ensure_watcher(self):
+        """Inicia (uma vez) o observador da pasta jsons/."""
+        with self._watcher_lock:
+            if self._watcher is None:
+                for file_path in self.get_json_files():
+                    summary = self.get_file_summary(file_path)
+                    if summary is not None:
+                        self._approval_state[os.path.basename(file_path)] = summary['is_approved']
+                self._watcher = JsonsWatcher(self.jsons_dir, self._on_file_event).start()
+    
+    def _on_file_event(self, event_type, file_name):
+        file_path = os.path.join(self.jsons_dir, file_name)
+        if event_type in ('added', 'changed') and os.path.exists(file_path):
+            # JSON novo do pipeline ou editado à mão: só é importado se os bytes mudaram
+            try:
+                self.store.import_json(file_path)
+            except Exception as e:
+                print(f"[STORE] Erro ao importar {file_name}: {e}")
+        self.invalidate(file_path)
+        event = {'type': event_type, 'file': file_name}
+        
+        if event_type == 'removed':
+            if ru_key(file_name) in self.store.list_menus():
+                # O cardápio continua no banco; só o arquivo de troca saiu
+                return
+            self._approval_state.pop(file_name, None)
+        else:
+            summary = self.get_file_summary(file_path)
+            if summary is None:
+                # Todos os dias já foram enviados: some da lista
+                self._approval_state.pop(file_name, None)
+                event['type'] = 'removed'
+            else:
+                was_approved = self._approval_state.get(file_name)
+                is_approved = summary['is_approved']
+                self._approval_state[file_name] = is_approved
+                event['approved'] = is_approved
+                if event_type == 'changed' and was_approved is not None and was_approved != is_approved:
+                    event['type'] = 'approved' if is_approved else 'unapproved'
+        events.publish(event)
+    
     def get_json_files(self):
-        """Retorna lista de arquivos JSON."""
-        json_pattern = os.path.join(self.jsons_dir, "*.json")
-        return glob.glob(json_pattern)
+        """Retorna os caminhos (jsons/<ru>.json) dos cardápios com dias ainda não enviados."""
+        return [os.path.join(self.jsons_dir, menu_file_name(ru)) for ru in self.store.list_menus()]
     
     def load_json_content(self, file_path):
-        """Carrega conteúdo de um arquivo JSON."""
+        """Carrega o cardápio do banco, no formato dos JSONs."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.store.get_menu(ru_key(file_path)) or None
         except Exception:
             return None
     
@@ -104,10 +289,93 @@ class MenuReviewApp:
                 issues.append(f"Campo 'weekday' ausente no dia {day}")
         
         return issues
+    
+    def group_days_by_week(self, data):
+        """
+        Agrupa as datas do cardápio por semana (segunda a domingo), em ordem.
+        Chaves que não são datas válidas ficam juntas em uma última página.
+        
+        Returns:
+            list: [(segunda-feira 'YYYY-MM-DD' ou None, [datas])]
+        """
+        weeks = {}
+        invalid = []
+        for day in sorted(data):
+            try:
+                date = datetime.strptime(day, '%Y-%m-%d')
+            except ValueError:
+                invalid.append(day)
+                continue
+            week_start = (date - timedelta(days=date.weekday())).strftime('%Y-%m-%d')
+            weeks.setdefault(week_start, []).append(day)
+        pages = sorted(weeks.items())
+        if invalid:
+            pages.append((None, invalid))
+        return pages
+    
+    def get_file_summary(self, file_path):
+        """
+        Retorna dados, estatísticas e problemas do cardápio, recalculados só quando
+        ele muda no banco (revisão). Retorna None se o RU não tem dias pendentes.
+        """
+        ru = ru_key(file_path)
+        key = self.store.revision(ru)
+        
+        with self._summaries_lock:
+            cached = self._summaries.get(file_path)
+        if cached and cached[0] == key:
+            return cached[1]
+        
+        data = self.load_json_content(file_path)
+        if not data:
+            self.invalidate(file_path)
+            return None
+        updated_at = self.store.updated_at(ru) or time.time()
+        
+        approval_timestamp = None
+        for day_data in data.values():
+            if day_data.get('approved_timestamp'):
+                approval_timestamp = day_data['approved_timestamp']
+                break
+        
+        summary = {
+            'data': data,
+            'stats': self.get_menu_stats(data),
+            'issues': self.validate_json_structure(data),
+            'weeks': self.group_days_by_week(data),
+            'is_approved': any(day_data.get('approved', False) for day_data in data.values()),
+            'approval_timestamp': approval_timestamp,
+            'file_size': len(serialization.dumps_bytes(data, indent=2)),
+            'modified': datetime.fromtimestamp(updated_at).strftime('%d/%m/%Y %H:%M:%S'),
+        }
+        with self._summaries_lock:
+            self._summaries[file_path] = (key, summary)
+        return summary
+    
+    def notify_store_change(self, file_name):
+        """Avisa as páginas abertas de uma aprovação/edição (que não altera o arquivo)."""
+        self._on_file_event('changed', file_name)
+    
+    def invalidate(self, file_path=None):
+        """Descarta o resumo de um arquivo (ou de todos) após uma escrita."""
+        with self._summaries_lock:
+            if file_path is None:
+                self._summaries.clear()
+            else:
+                self._summaries.pop(file_path, None)
 
-# Instância global da aplicação
+# Instância global da aplicação (o banco só é aberto no primeiro uso)
 review_app = MenuReviewApp()
 
+
+def _on_job_update(job):
+    events.publish({'type': 'job', 'job': job.to_dict()})
+    if job.message:
+        review_app.status = f"{job.description}: {job.message}"
+
+# Tarefas em segundo plano (regenerar, validar, upload) com concorrência limitada
+jobs = JobManager(on_update=_on_job_update)
+
 @app.route('/')
 def index():
     """Página principal."""
@@ -123,24 +391,17 @@ def index():
     
     for file_path in json_files:
         file_name = os.path.basename(file_path)
-        data = review_app.load_json_content(file_path)
-        if not data:
+        summary = review_app.get_file_summary(file_path)
+        if not summary:
             continue
         
-        is_approved = any(day_data.get('approved', False) for day_data in data.values())
-        approval_timestamp = None
-        for day_data in data.values():
-            if day_data.get('approved_timestamp'):
-                approval_timestamp = day_data['approved_timestamp']
-                break
-            
-        # Calcular estatísticas
-        stats = review_app.get_menu_stats(data)
-        issues = review_app.validate_json_structure(data)
+        is_approved = summary['is_approved']
+        approval_timestamp = summary['approval_timestamp']
+        stats = summary['stats']
         
         total_days += stats['total_days']
         total_meals += stats['total_meals']
-        if issues:
+        if summary['issues']:
             files_with_issues += 1
         
         # Formatar timestamp de aprovação
@@ -154,9 +415,9 @@ def index():
             'approval_timestamp': approval_timestamp,
             'approval_date': approval_date_formatted,
             'stats': stats,
-            'issues_count': len(issues),
-            'file_size': os.path.getsize(file_path),
-            'file_size_mb': round(os.path.getsize(file_path) / 1024 / 1024, 2)
+            'issues_count': len(summary['issues']),
+            'file_size': summary['file_size'],
+            'file_size_mb': round(summary['file_size'] / 1024 / 1024, 2)
         }
         
         if is_approved:
@@ -188,52 +449,69 @@ def view_file(filename):
     """Visualizar um arquivo específico."""
     file_path = os.path.join(review_app.jsons_dir, filename)
     
-    if not os.path.exists(file_path):
+    summary = review_app.get_file_summary(file_path)
+    if summary is None:
         return "Arquivo não encontrado", 404
     
-    data = review_app.load_json_content(file_path)
-    if data is None:
-        return "Erro ao carregar arquivo", 500
-    
-    file_info = review_app.get_file_info(file_path)
-    stats = review_app.get_menu_stats(data)
-    issues = review_app.validate_json_structure(data)
+    file_info = {
+        'name': filename,
+        'size': summary['file_size'],
+        'modified': summary['modified']
+    }
+    stats = summary['stats']
+    issues = summary['issues']
     
     # Verificar se está aprovado e formatar data
-    is_approved = any(day_data.get('approved', False) for day_data in data.values())
+    is_approved = summary['is_approved']
     approval_date = None
-    if is_approved:
-        for day_data in data.values():
-            if day_data.get('approved_timestamp'):
-                approval_date = datetime.fromtimestamp(day_data['approved_timestamp']).strftime('%d/%m/%Y %H:%M')
-                break
+    if is_approved and summary['approval_timestamp']:
+        approval_date = datetime.fromtimestamp(summary['approval_timestamp']).strftime('%d/%m/%Y %H:%M')
     
     return render_template('view_file.html', 
                          filename=filename,
                          file_info=file_info,
                          stats=stats,
                          issues=issues,
-                         data=data,
+                         total_pages=len(summary['weeks']),
                          is_approved=is_approved,
                          approval_date=approval_date)
 
+@app.route('/api/file/<filename>/days')
+def get_file_days(filename):
+    """Dias de um arquivo paginados por semana (?page=0&weeks=1)."""
+    file_path = os.path.join(review_app.jsons_dir, filename)
+    summary = review_app.get_file_summary(file_path)
+    if summary is None:
+        return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
+    
+    page = max(request.args.get('page', 0, type=int), 0)
+    weeks_per_page = min(max(request.args.get('weeks', WEEKS_PER_PAGE, type=int), 1), MAX_WEEKS_PER_PAGE)
+    weeks = summary['weeks']
+    pages = (len(weeks) + weeks_per_page - 1) // weeks_per_page
+    selected = weeks[page * weeks_per_page:(page + 1) * weeks_per_page]
+    
+    data = summary['data']
+    return jsonify({
+        'page': page,
+        'pages': pages,
+        'next_page': page + 1 if page + 1 < pages else None,
+        'weeks': [week_start for week_start, _ in selected],
+        'days': [{'date': day, **data[day]} for _, days in selected for day in days],
+    })
+
 @app.route('/api/approve/<filename>', methods=['POST'])
 def approve_file(filename):
     """Aprovar um arquivo."""
     try:
         file_path = os.path.join(review_app.jsons_dir, filename)
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Adicionar metadata de aprovação
-        for day_data in data.values():
-            day_data['approved'] = True
-            day_data['approved_timestamp'] = int(datetime.now().timestamp())
+        summary = review_app.get_file_summary(file_path)
+        if summary is None:
+            return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
         
-        # Salvar arquivo atualizado
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Registrar a aprovação de cada dia
+        review_app.store.set_approval({ru_key(filename): list(summary['data'])}, approved=True)
+        review_app.notify_store_change(filename)
         
         review_app.status = f"Cardápio aprovado: {filename}"
         return jsonify({'success': True, 'message': f'Cardápio {filename} aprovado com sucesso!'})
@@ -246,7 +524,11 @@ def delete_file(filename):
     """Excluir um arquivo."""
     try:
         file_path = os.path.join(review_app.jsons_dir, filename)
-        os.remove(file_path)
+        review_app.store.delete_menu(ru_key(filename))
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        review_app.invalidate(file_path)
+        review_app._on_file_event('removed', filename)
         
         review_app.status = f"Cardápio excluído: {filename}"
         return jsonify({'success': True, 'message': f'Cardápio {filename} excluído com sucesso!'})
@@ -256,79 +538,71 @@ def delete_file(filename):
 
 @app.route('/api/regenerate/<filename>', methods=['POST'])
 def regenerate_file(filename):
-    """Regenerar um arquivo."""
-    def regenerate_worker():
-        try:
-            review_app.status = f"Regenerando {filename}..."
-            
-            # Executar o scraper principal
-            script_path = os.path.join(os.path.dirname(__file__), "main.py")
-            result = subprocess.run([sys.executable, script_path], 
-                                  capture_output=True, text=True, timeout=300)
-            
-            if result.returncode == 0:
-                review_app.status = f"Cardápio regenerado: {filename}"
-            else:
-                review_app.status = "Erro na regeneração"
-                
-        except Exception:
-            review_app.status = "Erro na regeneração"
+    """Obter novamente apenas o RU deste arquivo, como tarefa em segundo plano."""
+    ru_name = ru_name_from_filename(filename)
+    if ru_name is None:
+        return jsonify({'success': False, 'message': f'Nenhum scraper associado a {filename}'}), 404
     
-    # Executar em thread separada
-    thread = threading.Thread(target=regenerate_worker)
-    thread.daemon = True
-    thread.start()
+    def regenerate_job(job):
+        def progress(stage, message, level):
+            if level != 'debug':
+                job.update(stage=stage, message=message, progress=STAGES.index(stage) / len(STAGES))
+        
+        result = get_shared_pipeline(review_app.jsons_dir).run_ru(ru_name, progress=progress)
+        review_app.invalidate(result.json_path)
+        job.update(message=f"Cardápio regenerado: {filename} ({result.total_time:.1f}s)")
+        return {
+            'file': filename,
+            'written': result.written,
+            'errors': result.errors,
+            'timings': result.timings,
+        }
     
-    return jsonify({'success': True, 'message': 'Regeneração iniciada...'})
+    job = jobs.submit('regenerate', regenerate_job, description=f"Regenerar {ru_name}", key=f"regenerate:{filename}")
+    return jsonify({'success': True, 'job_id': job.id, 'message': f'Regeneração de {ru_name} iniciada...'})
 
 @app.route('/api/validate_all', methods=['POST'])
 def validate_all():
-    """Validar todos os arquivos."""
-    def validate_worker():
-        try:
-            review_app.status = "Validando todos os arquivos..."
-            
-            # Usar o validador do projeto
-            script_path = os.path.join(os.path.dirname(__file__), "json_validator.py")
-            result = subprocess.run([sys.executable, script_path], 
-                                  capture_output=True, text=True, timeout=60)
-            
-            review_app.status = "Validação concluída"
-                
-        except Exception:
-            review_app.status = "Erro na validação"
-    
-    # Executar em thread separada
-    thread = threading.Thread(target=validate_worker)
-    thread.daemon = True
-    thread.start()
+    """Validar todos os arquivos, como tarefa em segundo plano."""
+    def validate_job(job):
+        file_paths = sorted(review_app.get_json_files())
+        results = {}
+        for i, file_path in enumerate(file_paths):
+            file_name = os.path.basename(file_path)
+            job.update(stage='validação', message=f"Validando {file_name}...", progress=i / max(len(file_paths), 1))
+            summary = review_app.get_file_summary(file_path)
+            if summary is None:
+                results[file_name] = {'valid': False, 'issues': ['Arquivo ilegível']}
+                continue
+            # Os campos de revisão não fazem parte do cardápio validado
+            menu_data = {
+                date: {key: value for key, value in day.items() if key not in REVIEW_FIELDS}
+                for date, day in summary['data'].items()
+            }
+            is_valid, _, issues = comprehensive_json_validator(menu_data)
+            results[file_name] = {'valid': is_valid, 'issues': [str(issue) for issue in issues]}
+        valid_count = sum(1 for result in results.values() if result['valid'])
+        job.update(message=f"Validação concluída: {valid_count}/{len(results)} arquivos válidos")
+        return results
     
-    return jsonify({'success': True, 'message': 'Validação iniciada...'})
+    job = jobs.submit('validate', validate_job, description="Validar todos", key='validate')
+    return jsonify({'success': True, 'job_id': job.id, 'message': 'Validação iniciada...'})
 
 @app.route('/api/approve_all', methods=['POST'])
 def approve_all():
-    """Aprovar todos os arquivos pendentes."""
+    """Aprovar todos os arquivos pendentes (uma única transação)."""
     try:
-        json_files = review_app.get_json_files()
-        approved_count = 0
-        
-        for file_path in json_files:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
+        pending = {}
+        for file_path in review_app.get_json_files():
+            summary = review_app.get_file_summary(file_path)
             # Verificar se já está aprovado
-            is_approved = any(day_data.get('approved', False) for day_data in data.values())
-            if not is_approved:
-                # Adicionar metadata de aprovação
-                for day_data in data.values():
-                    day_data['approved'] = True
-                    day_data['approved_timestamp'] = int(datetime.now().timestamp())
-                
-                # Salvar arquivo atualizado
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                
-                approved_count += 1
+            if summary is not None and not summary['is_approved']:
+                pending[os.path.basename(file_path)] = list(summary['data'])
+        
+        review_app.store.set_approval({ru_key(file_name): days for file_name, days in pending.items()}, approved=True)
+        for file_name in pending:
+            review_app.notify_store_change(file_name)
+        approved_count = len(pending)
         
         review_app.status = f"Aprovação em lote concluída: {approved_count} cardápios aprovados"
         return jsonify({'success': True, 'message': f'{approved_count} cardápios aprovados com sucesso!'})
@@ -342,19 +616,12 @@ def unapprove_file(filename):
     try:
         file_path = os.path.join(review_app.jsons_dir, filename)
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Remover metadata de aprovação
-        for day_data in data.values():
-            if 'approved' in day_data:
-                del day_data['approved']
-            if 'approved_timestamp' in day_data:
-                del day_data['approved_timestamp']
+        summary = review_app.get_file_summary(file_path)
+        if summary is None:
+            return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
         
-        # Salvar arquivo atualizado
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        review_app.store.set_approval({ru_key(filename): list(summary['data'])}, approved=False)
+        review_app.notify_store_change(filename)
         
         review_app.status = f"Aprovação removida: {filename}"
         return jsonify({'success': True, 'message': f'Aprovação do cardápio {filename} removida com sucesso!'})
@@ -362,45 +629,111 @@ def unapprove_file(filename):
     except Exception as e:
         return jsonify({'success': False, 'message': f'Erro ao remover aprovação: {e}'}), 500
 
+@app.route('/api/jobs')
+def list_jobs():
+    """Listar tarefas em segundo plano (opcionalmente filtradas por ?state=)."""
+    state = request.args.get('state')
+    return jsonify({'jobs': [job.to_dict() for job in jobs.list(state)]})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Consultar uma tarefa."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Tarefa não encontrada'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Pedir o cancelamento de uma tarefa."""
+    if not jobs.cancel(job_id):
+        return jsonify({'success': False, 'message': 'Tarefa não encontrada ou já finalizada'}), 404
+    return jsonify({'success': True, 'message': f'Cancelamento de {job_id} solicitado'})
+
 @app.route('/api/status')
 def get_status():
     """Obter status atual."""
     return jsonify({'status': review_app.status})
 
-@app.route('/api/edit/<filename>', methods=['POST'])
+@app.route('/api/events')
+def event_stream():
+    """Stream de eventos (Server-Sent Events): arquivos adicionados/alterados/aprovados e status."""
+    review_app.ensure_watcher()
+    subscriber = events.subscribe()
+    if subscriber is None:
+        # Cada conexão prende uma thread do servidor: acima do limite, a página usa polling
+        return jsonify({'success': False, 'message': 'Limite de conexões de eventos atingido'}), 503
+    
+    # waitress (com channel_request_lookahead) avisa quando o navegador fecha a aba
+    client_disconnected = request.environ.get('waitress.client_disconnected', lambda: False)
+    
+    def generate():
+        try:
+            yield f"data: {serialization.dumps({'type': 'status', 'status': review_app.status})}\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    if client_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {serialization.dumps(event)}\n\n"
+        finally:
+            events.unsubscribe(subscriber)
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Libera a vaga mesmo se o stream for fechado antes de começar
+    response.call_on_close(lambda: events.unsubscribe(subscriber))
+    return response
+
+@app.route('/api/edit/<filename>', methods=['POST', 'PATCH'])
 def edit_file(filename):
-    """Salvar edições de um arquivo."""
+    """
+    Salvar edições de um arquivo no registro de revisão (o JSON não é reescrito).
+    
+    POST recebe o documento inteiro; PATCH recebe {"days": {data: dia}} apenas com os
+    dias alterados (null remove o dia).
+    """
     try:
         file_path = os.path.join(review_app.jsons_dir, filename)
         
-        if not os.path.exists(file_path):
+        if review_app.get_file_summary(file_path) is None:
             return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
         
         # Obter dados editados do request
-        edited_data = request.get_json()
+        payload = request.get_json(silent=True)
+        if request.method == 'PATCH':
+            payload = payload.get('days') if isinstance(payload, dict) else None
         
-        if not edited_data:
+        if not payload or not isinstance(payload, dict):
             return jsonify({'success': False, 'message': 'Dados inválidos'}), 400
         
-        # Validar estrutura básica
-        issues = review_app.validate_json_structure(edited_data)
+        # Validar estrutura básica (no PATCH, apenas dos dias enviados)
+        issues = review_app.validate_json_structure({day: day_data for day, day_data in payload.items() if day_data is not None})
         if issues:
             return jsonify({
                 'success': False, 
                 'message': f'Estrutura inválida: {"; ".join(issues[:3])}'
             }), 400
         
-        # Fazer backup do arquivo original
-        backup_path = file_path + '.bak'
-        with open(file_path, 'r', encoding='utf-8') as f:
-            original_data = json.load(f)
+        if request.method == 'PATCH':
+            changed_days = payload
+        else:
+            # Documento inteiro: registra só os dias que mudaram em relação à versão revisada
+            current = review_app.get_file_summary(file_path)['data']
+            changed_days = {day: day_data for day, day_data in payload.items() if current.get(day) != day_data}
+            changed_days.update({day: None for day in current if day not in payload})
         
-        with open(backup_path, 'w', encoding='utf-8') as f:
-            json.dump(original_data, f, ensure_ascii=False, indent=2)
+        if not changed_days:
+            return jsonify({'success': True, 'message': f'Nenhuma alteração em {filename}'})
         
-        # Salvar dados editados
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(edited_data, f, ensure_ascii=False, indent=2)
+        review_app.store.patch_days(ru_key(filename), changed_days)
+        review_app.notify_store_change(filename)
         
         review_app.status = f"Cardápio editado: {filename}"
         return jsonify({'success': True, 'message': f'Cardápio {filename} editado com sucesso!'})
@@ -411,44 +744,34 @@ def edit_file(filename):
 @app.route('/api/upload_firebase', methods=['POST'])
 def upload_all_firebase():
     """Fazer upload de todos os cardápios aprovados para o Firebase."""
-    def upload_worker():
-        try:
-            review_app.status = "Testando conexão com Firebase..."
-            
-            if not FIREBASE_AVAILABLE:
-                review_app.status = "Erro: Módulo Firebase não disponível"
-                return
-            
-            # Testar conexão primeiro
-            if not test_firebase_connection():
-                review_app.status = "Erro: Falha na conexão com Firebase"
-                return
-            
-            review_app.status = "Fazendo upload dos cardápios aprovados para Firebase..."
-            
-            # Fazer upload usando o módulo
-            results = upload_approved_menus(review_app.jsons_dir, use_archive=True)
-            
-            success_count = sum(1 for success in results.values() if success)
-            total_count = len(results)
-            
-            if success_count > 0:
-                review_app.status = f"Upload concluído: {success_count}/{total_count} cardápios enviados"
-            else:
-                review_app.status = "Nenhum cardápio foi enviado para o Firebase"
-                
-        except Exception as e:
-            review_app.status = f"Erro no upload: {e}"
+    def upload_job(job):
+        job.update(stage='conexão', message="Testando conexão com Firebase...", progress=0.0)
+        
+        # Testar conexão primeiro
+        if not test_firebase_connection():
+            raise RuntimeError("Falha na conexão com Firebase")
+        
+        job.update(stage='upload', message="Fazendo upload dos cardápios aprovados para Firebase...", progress=0.5)
+        
+        # Fazer upload usando o módulo
+        results = upload_approved_menus(review_app.jsons_dir, use_archive=True, store=review_app.store)
+        # Arquivos enviados são removidos da pasta
+        review_app.invalidate()
+        
+        success_count = sum(1 for success in results.values() if success)
+        total_count = len(results)
+        
+        if success_count > 0:
+            job.update(message=f"Upload concluído: {success_count}/{total_count} cardápios enviados")
+        else:
+            job.update(message="Nenhum cardápio foi enviado para o Firebase")
+        return results
     
     if not FIREBASE_AVAILABLE:
         return jsonify({'success': False, 'message': 'Módulo Firebase não disponível. Verifique se o arquivo firebase_uploader.py existe e as dependências estão instaladas.'}), 500
     
-    # Executar em thread separada
-    thread = threading.Thread(target=upload_worker)
-    thread.daemon = True
-    thread.start()
-    
-    return jsonify({'success': True, 'message': 'Upload para Firebase iniciado. Acompanhe o progresso no status.'})
+    job = jobs.submit('upload', upload_job, description="Upload para Firebase", key='upload')
+    return jsonify({'success': True, 'job_id': job.id, 'message': 'Upload para Firebase iniciado. Acompanhe o progresso no status.'})
 
 @app.route('/api/upload_firebase/<filename>', methods=['POST'])
 def upload_single_firebase(filename):
@@ -459,15 +782,15 @@ def upload_single_firebase(filename):
         
         file_path = os.path.join(review_app.jsons_dir, filename)
         
-        if not os.path.exists(file_path):
+        if review_app.get_file_summary(file_path) is None:
             return jsonify({'success': False, 'message': 'Arquivo não encontrado'}), 404
         
         # Testar conexão primeiro
         if not test_firebase_connection():
             return jsonify({'success': False, 'message': 'Falha na conexão com Firebase. Verifique as variáveis BASE_URL e FIREBASE_KEY.'}), 500
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            menu_data = json.load(f)
+        summary = review_app.get_file_summary(file_path)
+        menu_data = summary['data'] if summary else {}
         
         # Filtrar apenas dados aprovados
         approved_data = {date_str: day_data for date_str, day_data in menu_data.items() 
@@ -477,11 +800,18 @@ def upload_single_firebase(filename):
             return jsonify({'success': False, 'message': f'Nenhum cardápio aprovado encontrado em {filename}'}), 400
         
         ru_name = filename.replace('.json', '')
-        success = upload_menu_to_firebase(approved_data, ru_name, use_archive=True)
+        uploaded = upload_menu_to_firebase(approved_data, ru_name, use_archive=True)
         
-        if success:
+        if uploaded:
+            # Só os dias enviados saem da revisão; os que falharam continuam aprovados
+            review_app.store.mark_uploaded(ru_key(filename), uploaded)
+            review_app.notify_store_change(filename)
+            failed = len(approved_data) - len(uploaded)
             review_app.status = f"Upload concluído: {filename}"
-            return jsonify({'success': True, 'message': f'Upload de {filename} realizado com sucesso! Enviados {len(approved_data)} dias de cardápio.'})
+            message = f'Upload de {filename} realizado com sucesso! Enviados {len(uploaded)} dias de cardápio.'
+            if failed:
+                message += f' {failed} dia(s) falharam e continuam aprovados para novo envio.'
+            return jsonify({'success': True, 'message': message})
         else:
             review_app.status = f"Falha no upload: {filename}"
             return jsonify({'success': False, 'message': f'Falha no upload de {filename}. Verifique a conexão e as credenciais do Firebase.'}), 500
@@ -489,12 +819,32 @@ def upload_single_firebase(filename):
     except Exception as e:
         return jsonify({'success': False, 'message': f'Erro no upload: {e}'}), 500
 
-if __name__ == '__main__':
-    # Criar templates se não existirem
-    templates_dir = os.path.join(os.path.dirname(__file__), 'templates')
-    os.makedirs(templates_dir, exist_ok=True)
+def serve(host='0.0.0.0', port=8080, threads=REVIEW_THREADS):
+    """
+    Executa a interface em modo de produção: waitress com várias threads quando
+    instalado; caso contrário, o servidor do Flask com uma thread por requisição.
+    """
+    # Importa jsons/ antes de aceitar requisições, e não ao importar o módulo
+    review_app.ensure_store()
+    if HAS_WAITRESS:
+        print(f"[WEB] waitress em {host}:{port} com {threads} threads")
+        waitress_serve(app, host=host, port=port, threads=threads, ident='menu-review',
+                       channel_request_lookahead=1)
+    else:
+        print("[WEB] waitress não instalado; usando o servidor do Flask (pip install waitress)")
+        app.run(debug=False, host=host, port=port, threaded=True, use_reloader=False)
 
+if __name__ == '__main__':
+    import argparse
     import socket
+    
+    parser = argparse.ArgumentParser(description="Interface web de revisão de cardápios")
+    parser.add_argument('--port', type=int, help="Porta (padrão: primeira livre entre 8080, 8081 e 8082)")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--threads', type=int, default=REVIEW_THREADS, help="Threads do servidor de produção")
+    parser.add_argument('--debug', action='store_true', help="Servidor de desenvolvimento do Flask com debug e reloader")
+    args = parser.parse_args()
+    
     def find_free_port(preferred_ports):
         for port in preferred_ports:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -505,8 +855,10 @@ if __name__ == '__main__':
                     continue
         raise RuntimeError("Nenhuma porta disponível para o servidor web.")
 
-    ports = [8080, 8081, 8082]
-    port = find_free_port(ports)
+    port = args.port or find_free_port([8080, 8081, 8082])
     print(f"Abrindo interface web de revisão de cardápios...")
     print(f"Acesse: http://localhost:{port}")
-    app.run(debug=True, host='0.0.0.0', port=port)
+    if args.debug:
+        app.run(debug=True, host=args.host, port=port)
+    else:
+        serve(host=args.host, port=port, threads=args.threads)
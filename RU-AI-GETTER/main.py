@@ -28,9 +28,6 @@ except ImportError:
     subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'requests'])
 # --- Fim do bloco ambiente virtual ---
 
-import json
-from datetime import datetime
-
 # Diretórios de trabalho
 DOWNLOADS_DIR = os.path.join(os.path.dirname(__file__), "downloaded_files")
 JSONS_DIR = os.path.join(os.path.dirname(__file__), "jsons")
@@ -39,15 +36,7 @@ JSONS_DIR = os.path.join(os.path.dirname(__file__), "jsons")
 os.makedirs(DOWNLOADS_DIR, exist_ok=True)
 os.makedirs(JSONS_DIR, exist_ok=True)
 
-from scrapers import (
-    BlumenauScraper,
-    CuritibanosScraper,
-    FlorianopolisCCAScraper,
-    FlorianopolisTrindadeScraper,
-    JoinvilleScraper,
-)
-from core.postprocess import clean_menu_text, extract_dates_and_weekdays, associate_dates_weekdays
-from core.ai_parse import parse_menu_with_ollama
+from core.pipeline import MenuPipeline, RUS_DISPONIVEIS, load_last_runs
 
 # Definição global das funções de log
 def success(x): return x
@@ -77,115 +66,6 @@ try:
 except ImportError:
     pass
 
-# Gemini: função de parsing via Google AI
-
-def parse_menu_with_gemini(text: str, model: str = "gemini-pro", api_key: str = None, image_path: str = None) -> dict:
-    """
-    Envia o texto (e opcionalmente uma imagem) do cardápio para a API Gemini e retorna o JSON estruturado.
-    """
-    import os
-    import json
-    try:
-        import importlib
-        genai = importlib.import_module("google.generativeai")
-    except ImportError:
-        raise ImportError("google-generativeai não está instalado. Instale com 'pip install google-generativeai'.")
-    
-    # Importar validador JSON
-    try:
-        from core.json_validator import extract_and_validate_json, create_json_schema, create_fallback_response
-    except ImportError:
-        print("[AVISO] json_validator não encontrado, usando método básico")
-        extract_and_validate_json = None
-        create_fallback_response = None
-    
-    if api_key is None:
-        api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY não definido. Configure no .env ou variável de ambiente.")
-    
-    genai.configure(api_key=api_key)
-    
-    # Prompt melhorado com instruções mais claras
-    prompt = (
-        "Você deve extrair e estruturar as informações de cardápio do restaurante universitário em formato JSON. "
-        "Siga EXATAMENTE o formato especificado abaixo.\n\n"
-        
-        "REGRAS IMPORTANTES:\n"
-        "1. Use APENAS o formato YYYY-MM-DD para datas\n"
-        "2. Cada dia deve ter: menu (array de arrays), timestamp (sempre 0), weekday (dia da semana em português)\n"
-        "3. O array 'menu' representa as refeições: [café da manhã/lanche, almoço, jantar]\n"
-        "4. Se não houver informação para uma refeição, use EXATAMENTE ['Sem refeições disponíveis']\n"
-        "5. Capitalize adequadamente os nomes dos pratos\n"
-        "6. Mantenha opções vegetarianas/veganas quando presentes\n"
-        "7. Inclua acompanhamentos e saladas quando mencionados\n\n"
-        
-        "FORMATO DE SAÍDA (JSON válido, sem comentários):\n"
-        "{\n"
-        '  "2025-06-05": {\n'
-        '    "menu": [\n'
-        '      ["Sem refeições disponíveis"],\n'
-        '      ["Bife acebolado", "Opção vegana: hambúrguer de feijão", "Arroz", "Feijão", "Salada verde"],\n'
-        '      ["Frango grelhado", "Opção vegetariana: lasanha de berinjela", "Purê de batata", "Salada mista"]\n'
-        '    ],\n'
-        '    "timestamp": 0,\n'
-        '    "weekday": "Quinta-Feira"\n'
-        '  }\n'
-        "}\n\n"
-        
-        "TEXTO DO CARDÁPIO A SER PROCESSADO:\n" + text + "\n\n"
-        
-        "Retorne APENAS o JSON válido, sem texto adicional:"
-    )
-    
-    # Configurar modelo com parâmetros otimizados
-    generation_config = {
-        "temperature": 0.1,  # Baixa temperatura para mais consistência
-        "top_p": 0.8,
-        "top_k": 40,
-        "max_output_tokens": 2048,
-    }
-    
-    model_obj = genai.GenerativeModel(
-        model_name=model,
-        generation_config=generation_config
-    )
-    
-    try:
-        if image_path:
-            try:
-                import importlib
-                pil = importlib.import_module("PIL.Image")
-            except ImportError:
-                raise ImportError("Pillow não está instalado. Instale com 'pip install pillow'.")
-            img = pil.open(image_path)
-            response = model_obj.generate_content([prompt, img])
-        else:
-            response = model_obj.generate_content(prompt)
-        
-        result = response.text
-        print(f"[DEBUG] Resposta do Gemini: {result[:500]}...")
-        
-        # Usar validador se disponível
-        if extract_and_validate_json:
-            return extract_and_validate_json(result)
-        else:
-            # Método básico de fallback
-            json_start = result.find('{')
-            json_end = result.rfind('}') + 1
-            if json_start == -1 or json_end == 0:
-                raise ValueError("Nenhum JSON encontrado na resposta")
-            json_str = result[json_start:json_end]
-            return json.loads(json_str)
-            
-    except Exception as e:
-        print(f"[ERRO] Falha no parsing com Gemini: {e}")
-        if extract_and_validate_json:
-            from core.json_validator import create_fallback_response
-            return create_fallback_response()
-        else:
-            raise ValueError(f"Falha ao extrair JSON da resposta do Gemini: {e}\nResposta: {result}")
-
 def parse_blumenau_table(menu_clean: str) -> dict:
     """
     Faz o parsing do texto tabular do cardápio de Blumenau e retorna um dicionário {data: texto_do_dia}
@@ -239,35 +119,18 @@ def parse_blumenau_table(menu_clean: str) -> dict:
         blocos[data] = "\n".join(bloco)
     return blocos
 
-LAST_RUNS_FILE = os.path.join(os.path.dirname(__file__), "last_runs.json")
-
-def load_last_runs():
-    if os.path.exists(LAST_RUNS_FILE):
-        try:
-            with open(LAST_RUNS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
-
-def save_last_run(ru_nome):
-    last_runs = load_last_runs()
-    last_runs[ru_nome] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LAST_RUNS_FILE, "w", encoding="utf-8") as f:
-        json.dump(last_runs, f, ensure_ascii=False, indent=2)
-
 def prompt_user_options():
     print("\n=== Configuração de Parsing dos Cardápios ===")
     last_runs = load_last_runs()
     # Escolha do método
     while True:
-        metodo = input("Escolha o método de parsing (1=Ollama, 2=Google Gemini, q=abandonar): ").strip().lower()
+        metodo = input("Escolha o método de parsing (1=Ollama, 2=Google Gemini, 3=Roteador Ollama+Gemini, q=abandonar): ").strip().lower()
         if metodo == "q":
             print("Operação cancelada pelo usuário.")
             exit(0)
-        if metodo in ("1", "2"): break
-        print("Opção inválida. Digite 1, 2 ou q.")
-    metodo = "ollama" if metodo == "1" else "gemini"
+        if metodo in ("1", "2", "3"): break
+        print("Opção inválida. Digite 1, 2, 3 ou q.")
+    metodo = {"1": "ollama", "2": "gemini", "3": "router"}[metodo]
     # Modelos pré-definidos para Gemini
     gemini_modelos = [
         "gemma-3-27b-it",
@@ -291,6 +154,13 @@ def prompt_user_options():
                 break
             else:
                 print("Seleção inválida.")
+    elif metodo == "router":
+        padrao = os.environ.get("LLM_ROUTER_BACKENDS", f"ollama:gemma3:4b,gemini:{gemini_modelos[0]}")
+        modelo = input(f"Backends do roteador em ordem de preferência (provedor:modelo, separados por vírgula) [{padrao}] ou q para abandonar: ").strip()
+        if modelo.lower() == "q":
+            print("Operação cancelada pelo usuário.")
+            exit(0)
+        modelo = modelo or padrao
     else:
         modelo = input("Informe o modelo a ser usado (ex: ollama/llama3) ou q para abandonar: ").strip()
         if modelo.lower() == "q":
@@ -299,20 +169,14 @@ def prompt_user_options():
         modelo = modelo or "llama3"
     # API key se Gemini
     api_key = None
-    if metodo == "gemini":
+    if metodo in ("gemini", "router"):
         api_key = input("Informe sua GEMINI_API_KEY (ou deixe em branco para usar variável de ambiente, ou q para abandonar): ").strip()
         if api_key.lower() == "q":
             print("Operação cancelada pelo usuário.")
             exit(0)
         api_key = api_key or None
     # Seleção dos RUs
-    rus_disponiveis = [
-        ("Blumenau", BlumenauScraper),
-        ("Curitibanos", CuritibanosScraper),
-        ("CCA", FlorianopolisCCAScraper),
-        ("Trindade", FlorianopolisTrindadeScraper),
-        ("Joinville", JoinvilleScraper),
-    ]
+    rus_disponiveis = RUS_DISPONIVEIS
     print("\nSelecione os RUs a serem processados (ex: 1,3,5 ou q para abandonar):")
     for i, (nome, _) in enumerate(rus_disponiveis, 1):
         data = last_runs.get(nome, "nunca")
@@ -355,74 +219,39 @@ def run_all_scrapers_interactive():
     
     metodo, modelo, api_key, rus_escolhidos = prompt_user_options()
     print(highlight("\n⏳ Coletando cardápios dos restaurantes selecionados..."))
-    # Importar validador
-    try:
-        from core.json_validator import comprehensive_json_validator, NO_MEALS_TEXT
-        use_validator = True
-        print(success("[INFO] Validador JSON carregado com sucesso"))
-    except ImportError:
-        use_validator = False
-        print(warning("[AVISO] Validador JSON não disponível"))
+    pipeline = MenuPipeline(metodo, modelo, api_key, jsons_dir=JSONS_DIR)
+    pipeline.warm_up()
+    cores = {"success": success, "warning": warning, "error": error, "info": info, "debug": lambda x: x}
+
+    def progress(stage, message, level):
+        if level != "debug":
+            message = f"[{stage.upper()}] {message}"
+        print(cores.get(level, info)(message))
+
     resultados = {}
     for nome, ScraperClass in rus_escolhidos:
-        scraper = ScraperClass()
+        print(highlight(f"\n===== {nome} ====="))
         try:
-            print(highlight(f"\n===== {nome} ====="))
-            print(info("Obtendo texto do cardápio..."))
-            menu = scraper.get_menu_text()
-            menu_clean = clean_menu_text(menu)
-            print(info("Texto limpo obtido (mostrando primeiras 3 linhas):"))
-            preview = '\n'.join(menu_clean.splitlines()[:3])
-            print(preview + ("\n..." if len(menu_clean.splitlines()) > 3 else ""))
-            # Parsing
-            if metodo == "ollama":
-                print(info("Enviando para o Ollama..."))
-                image_path = getattr(scraper, 'get_menu_image_path', lambda: None)()
-                parsed = parse_menu_with_ollama(menu_clean, model=modelo, image_path=image_path)
-            else:
-                print(info("Enviando para o Gemini..."))
-                image_path = getattr(scraper, 'get_menu_image_path', lambda: None)()
-                parsed = parse_menu_with_gemini(menu_clean, model=modelo, api_key=api_key, image_path=image_path)
-            # Validação
-            if use_validator:
-                print(info("[VALIDAÇÃO] Verificando formato do JSON..."))
-                is_valid, validated_json, errors = comprehensive_json_validator(parsed)
-                if is_valid:
-                    print(success("[VALIDAÇÃO] JSON válido!"))
-                    parsed = validated_json
-                else:
-                    print(warning(f"[VALIDAÇÃO] {len(errors)} problema(s) encontrado(s):"))
-                    for err in errors[:5]:
-                        print(error(f"   - {err}"))
-                    if len(errors) > 5:
-                        print(warning(f"   ... e mais {len(errors) - 5} erros"))
-                    parsed = validated_json
-                    print(warning("[VALIDAÇÃO] Usando JSON corrigido automaticamente"))
-            print(info("[IA] JSON final salvo (primeiras 5 linhas):"))
-            json_preview = json.dumps(parsed, ensure_ascii=False, indent=2).splitlines()[:5]
-            print('\n'.join(json_preview) + ("\n..." if len(json_preview) == 5 else ""))
-            # Salva o JSON
-            os.makedirs(os.path.join(os.path.dirname(__file__), "jsons"), exist_ok=True)
-            json_path = os.path.join(os.path.dirname(__file__), "jsons", f"{nome.lower().replace(' ', '_')}.json")
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(parsed, f, ensure_ascii=False, indent=2)
-            print(success(f"[SALVO] JSON salvo em {json_path}"))
-            save_last_run(nome)
-            resultados[nome] = parsed
+            result = pipeline.run_ru(nome, ScraperClass, progress=progress)
+            tempos = ", ".join(f"{etapa} {tempo:.1f}s" for etapa, tempo in result.timings.items())
+            print(info(f"[TEMPO] {tempos}"))
+            resultados[nome] = result.data
         except Exception as e:
             print(error(f"[ERRO] {e}"))
             resultados[nome] = None
+    if pipeline.router:
+        print(info("[ROUTER] Latência e falhas por backend:"))
+        print(pipeline.report())
+    pipeline.close()
     # Validação automática de todos os arquivos JSON salvos
-    import glob
     from core.json_validator import comprehensive_json_validator, NO_MEALS_TEXT
-    jsons_dir = os.path.join(os.path.dirname(__file__), "jsons")
-    json_files = glob.glob(os.path.join(jsons_dir, "*.json"))
-    print(highlight("\n[VALIDAÇÃO FINAL] Verificando todos os arquivos JSON salvos..."))
+    from core.menu_store import get_menu_store, menu_file_name
+    store = get_menu_store()
+    print(highlight("\n[VALIDAÇÃO FINAL] Verificando todos os cardápios do banco..."))
     algum_erro = False
-    for jf in json_files:
-        with open(jf, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        is_valid, processed, errors = comprehensive_json_validator(data)
+    for ru in store.list_menus():
+        jf = menu_file_name(ru)
+        is_valid, processed, errors = comprehensive_json_validator(store.get_menu(ru))
         if is_valid:
             print(success(f"✅ {os.path.basename(jf)}: JSON válido e padronizado!"))
         else:
@@ -460,10 +289,10 @@ def run_all_scrapers_interactive():
             raise RuntimeError("Nenhuma porta disponível para o servidor web.")
 
         def start_web_gui(port):
-            from interface.menu_review_web import app
+            from interface.menu_review_web import serve
             print(f"Acesse: http://localhost:{port}")
-            # Rodar sem debug para evitar erro de signal em thread secundária
-            app.run(debug=False, host='0.0.0.0', port=port)
+            # waitress (ou o servidor do Flask com threads), sem debug/reloader em thread secundária
+            serve(host='0.0.0.0', port=port)
         port = find_free_port([8080, 8081, 8082])
         thread = threading.Thread(target=start_web_gui, args=(port,))
         thread.daemon = False  # Não usar daemon para manter o processo vivo
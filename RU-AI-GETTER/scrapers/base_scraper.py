@@ -50,8 +50,9 @@ class RestaurantScraper:
         return io.BytesIO(resp.content)
 
     def extract_text_from_pdf(self, pdf_bytes):
+        # Páginas separadas por '\f' para que a compactação detecte cabeçalhos/rodapés repetidos
         with pdfplumber.open(pdf_bytes) as pdf:
-            text = "\n".join(page.extract_text() or '' for page in pdf.pages)
+            text = "\n\f\n".join(page.extract_text() or '' for page in pdf.pages)
         return text
 
     def get_downloads_dir(self):
@@ -40,18 +40,8 @@ echo ""
 echo "Para parar o servidor, pressione Ctrl+C"
 echo ""
 
-# Substituir porta no arquivo se necessário
-if [ $PORT -ne 8080 ]; then
-    sed -i.bak "s/port=8080/port=$PORT/g" menu_review_web.py
-fi
-
-# Iniciar servidor
-python3 menu_review_web.py
-
-# Restaurar porta original se foi alterada
-if [ $PORT -ne 8080 ] && [ -f "menu_review_web.py.bak" ]; then
-    mv menu_review_web.py.bak menu_review_web.py
-fi
+# Iniciar servidor (waitress, se instalado; --debug usa o servidor de desenvolvimento)
+python3 menu_review_web.py --port $PORT
 
 echo ""
 echo "✅ Servidor encerrado."
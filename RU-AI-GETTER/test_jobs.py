@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import threading
+import unittest
+from unittest import mock
+
+from core.jobs import FINISHED_STATES, Job, JobManager
+
+
+class JobManagerTests(unittest.TestCase):
+    def test_listing_jobs_while_one_is_finishing(self):
+        manager = JobManager(max_workers=1, ttl=0)
+        errors = []
+        listers = []
+
+        def list_jobs():
+            try:
+                manager.list()
+            except Exception as e:
+                errors.append(e)
+
+        def set_attr(job, name, value):
+            object.__setattr__(job, name, value)
+            # Lista as tarefas de outra thread assim que o estado final é gravado
+            if name == 'state' and value in FINISHED_STATES:
+                lister = threading.Thread(target=list_jobs)
+                lister.start()
+                lister.join(timeout=0.2)
+                listers.append(lister)
+
+        with mock.patch.object(Job, '__setattr__', set_attr):
+            job = manager.submit('test', lambda job: 'ok')
+            job._future.result(timeout=10)
+        for lister in listers:
+            lister.join(timeout=10)
+        manager.shutdown()
+
+        self.assertTrue(listers)
+        self.assertEqual(errors, [])
+        self.assertEqual(job.result, 'ok')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failed_job_records_error(self):
+        manager = JobManager(max_workers=1)
+
+        def fail(job):
+            raise ValueError("quebrou")
+
+        job = manager.submit('test', fail)
+        job._future.result(timeout=10)
+        manager.shutdown()
+
+        self.assertEqual(job.state, 'failed')
+        self.assertEqual(job.error, "quebrou")
+        self.assertIsNotNone(job.finished_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import threading
+import unittest
+
+from core.menu_store import MenuStore
+
+
+def day(dish, weekday="Segunda-Feira"):
+    return {"menu": [["Pão"], ["Arroz", dish], ["Sopa"]], "timestamp": 0, "weekday": weekday}
+
+
+WEEK = {
+    "2025-10-13": day("Frango", "Segunda-Feira"),
+    "2025-10-14": day("Carne", "Terça-Feira"),
+    "2025-10-15": day("Peixe", "Quarta-Feira"),
+}
+
+
+class MenuStoreReviewWritesTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = MenuStore(os.path.join(self.tmp.name, "menus.sqlite3"))
+        self.store.save_menu("cca", WEEK)
+        self.store.save_menu("trindade", WEEK)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_patch_changes_only_the_sent_days(self):
+        self.store.set_approval({"cca": ["2025-10-13", "2025-10-14"]})
+        revision = self.store.revision("cca")
+
+        self.store.patch_days("cca", {"2025-10-13": day("Lasanha"), "2025-10-15": None})
+
+        menu = self.store.get_menu("cca")
+        self.assertEqual(menu["2025-10-13"]["menu"][1], ["Arroz", "Lasanha"])
+        self.assertTrue(menu["2025-10-13"]["approved"])
+        self.assertTrue(menu["2025-10-14"]["approved"])
+        self.assertNotIn("2025-10-15", menu)
+        self.assertGreater(self.store.revision("cca"), revision)
+
+    def test_approve_all_is_one_write_across_menus(self):
+        count = self.store.set_approval({"cca": list(WEEK), "trindade": list(WEEK)})
+
+        self.assertEqual(count, 6)
+        self.assertEqual(set(self.store.approved_not_uploaded()), {"cca", "trindade"})
+
+        self.assertEqual(self.store.set_approval({"cca": list(WEEK)}, approved=False), 3)
+        self.assertNotIn("approved", self.store.get_menu("cca")["2025-10-13"])
+
+    def test_concurrent_reviewers_do_not_lose_updates(self):
+        def approve(date):
+            self.store.set_approval({"cca": [date]})
+
+        def edit():
+            self.store.patch_days("cca", {"2025-10-15": day("Feijoada", "Quarta-Feira")})
+
+        threads = [threading.Thread(target=approve, args=(date,)) for date in ("2025-10-13", "2025-10-14")]
+        threads.append(threading.Thread(target=edit))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        menu = self.store.get_menu("cca")
+        self.assertTrue(menu["2025-10-13"]["approved"])
+        self.assertTrue(menu["2025-10-14"]["approved"])
+        self.assertEqual(menu["2025-10-15"]["menu"][1], ["Arroz", "Feijoada"])
+
+
+if __name__ == "__main__":
+    unittest.main()
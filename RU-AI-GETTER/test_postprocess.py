@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import unittest
+from datetime import date
+
+from core.postprocess import compact_menu_text
+
+WEEK = date(2025, 10, 13)
+
+CURRENT_WEEK = """SEGUNDA 13/10
+Arroz e feijão
+Frango grelhado
+TERÇA 14/10
+Arroz integral
+Carne moída
+QUARTA 15/10
+Peixe assado"""
+
+
+class CompactMenuTextTests(unittest.TestCase):
+    def test_update_header_does_not_drop_following_week(self):
+        text = "Cardápio atualizado em 02/09/2025\n" + CURRENT_WEEK
+
+        compacted, report = compact_menu_text(text, start_date=WEEK)
+
+        self.assertIn("Frango grelhado", compacted)
+        self.assertIn("Peixe assado", compacted)
+        self.assertEqual(report.out_of_range_lines, 0)
+
+    def test_drops_past_day_sections_with_headers_without_year(self):
+        text = "SEXTA 10/10\nLasanha\nMacarrão ao sugo\nPudim\n" + CURRENT_WEEK
+
+        compacted, report = compact_menu_text(text, start_date=WEEK)
+
+        self.assertNotIn("Lasanha", compacted)
+        self.assertIn("SEGUNDA 13/10", compacted)
+        self.assertIn("Frango grelhado", compacted)
+        self.assertEqual(report.out_of_range_lines, 4)
+
+    def test_full_date_headers_switch_sections(self):
+        text = "10/10/2025 - Sexta-feira\nLasanha\n13/10/2025 - Segunda-feira\nFeijoada"
+
+        compacted, _ = compact_menu_text(text, start_date=WEEK)
+
+        self.assertNotIn("Lasanha", compacted)
+        self.assertIn("Feijoada", compacted)
+
+    def test_keeps_dishes_that_mention_nutrients_or_calories(self):
+        text = CURRENT_WEEK + "\nCarboidrato: Arroz integral 1 concha\nFrango ao molho de ervas 350 kcal"
+
+        compacted, _ = compact_menu_text(text, start_date=WEEK)
+
+        self.assertIn("Carboidrato: Arroz integral 1 concha", compacted)
+        self.assertIn("Frango ao molho de ervas 350 kcal", compacted)
+
+    def test_drops_lines_that_are_entirely_boilerplate(self):
+        text = CURRENT_WEEK + "\nCardápio sujeito a alterações.\nValor energético: 650 kcal\nProteínas 25 g\nNutricionista: Maria CRN-10 1234"
+
+        compacted, report = compact_menu_text(text, start_date=WEEK)
+
+        self.assertNotIn("sujeito", compacted)
+        self.assertNotIn("650 kcal", compacted)
+        self.assertNotIn("Proteínas", compacted)
+        self.assertNotIn("Nutricionista", compacted)
+        self.assertEqual(report.boilerplate_lines, 4)
+
+    def test_falls_back_to_original_text_when_almost_everything_is_removed(self):
+        text = "SEXTA 03/10\n" + "\n".join(f"Prato {i}" for i in range(10)) + "\nSEGUNDA 13/10\nSopa"
+
+        compacted, report = compact_menu_text(text, start_date=WEEK)
+
+        self.assertTrue(report.fallback)
+        self.assertEqual(compacted, text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark of menu validation paths.
+
+Compares the pydantic path (validate_menu_data) with the JSON schema from
+get_menu_json_schema validated by jsonschema, both compiled once and rebuilt
+on every call. jsonschema is optional and only needed for this script.
+
+Usage:
+    python benchmark_validation.py [iterations]
+"""
+
+import sys
+import timeit
+from datetime import date, timedelta
+
+from models import WEEKDAYS_PT, get_menu_json_schema, validate_menu_data
+
+try:
+    import jsonschema
+    HAS_JSONSCHEMA = True
+except ImportError:
+    HAS_JSONSCHEMA = False
+
+
+def sample_menu(days: int = 31) -> dict:
+    """Builds a month of valid menu data."""
+    start = date(2026, 8, 3)
+    menu = {}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        menu[day.isoformat()] = {
+            "menu": [
+                ["Sem refeições disponíveis"],
+                ["Arroz", "Feijão", "Frango grelhado", "Salada verde", "Opção vegana: grão-de-bico"],
+                ["Sopa de legumes", "Pão integral"],
+            ],
+            "timestamp": 0,
+            "weekday": WEEKDAYS_PT[day.weekday()],
+        }
+    return menu
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    data = sample_menu()
+
+    benchmarks = {"pydantic (validate_menu_data)": lambda: validate_menu_data(data)}
+
+    if HAS_JSONSCHEMA:
+        schema = get_menu_json_schema()
+        validator = jsonschema.Draft7Validator(schema)
+        benchmarks["jsonschema (compiled once)"] = lambda: validator.is_valid(data)
+        benchmarks["jsonschema (rebuilt per call)"] = lambda: jsonschema.validate(data, schema)
+    else:
+        print("[INFO] jsonschema not installed; only the pydantic path is measured")
+
+    print(f"{len(data)} days per document, {iterations} iterations")
+    for name, func in benchmarks.items():
+        elapsed = timeit.timeit(func, number=iterations)
+        print(f"{name:32s} {elapsed / iterations * 1000:8.3f} ms/document")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Gemini File Cache - Reutiliza arquivos já enviados para a File API do Gemini.
+Os arquivos são indexados pelo hash SHA-256 do conteúdo e reaproveitados
+enquanto não expiram, evitando novo upload em retentativas e regenerações.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+CACHE_PATH = Path(__file__).parent / ".gemini_file_cache.json"
+
+# Margem de segurança antes da expiração (a File API mantém arquivos por 48h)
+EXPIRY_MARGIN = 60 * 60
+
+
+def file_sha256(path: str) -> str:
+    """Calcula o hash SHA-256 do conteúdo de um arquivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def wait_until_active(client, file: Any, initial_delay: float = 0.5,
+                      max_delay: float = 8.0, timeout: float = 300) -> Any:
+    """
+    Aguarda o processamento de um arquivo com backoff exponencial.
+
+    Args:
+        client: Cliente do Gemini
+        file: Arquivo retornado pela File API
+        initial_delay: Primeira espera em segundos
+        max_delay: Espera máxima entre consultas
+        timeout: Tempo máximo total de espera
+
+    Returns:
+        Arquivo atualizado, já processado
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+
+    while file.state.name == "PROCESSING":
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Arquivo {file.name} ainda em processamento após {timeout:.0f}s")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+        file = client.files.get(name=file.name)
+
+    if file.state.name == "FAILED":
+        raise ValueError(f"Falha no processamento do arquivo: {file.state.name}")
+
+    return file
+
+
+def _expiration_timestamp(file: Any) -> float:
+    """Converte a expiração do arquivo para timestamp Unix (48h se ausente)."""
+    expiration = getattr(file, 'expiration_time', None)
+    if isinstance(expiration, datetime):
+        return expiration.timestamp()
+    return time.time() + 48 * 60 * 60
+
+
+class GeminiFileCache:
+    """Cache persistente {hash do conteúdo: arquivo na File API}."""
+
+    def __init__(self, cache_path: Path = CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save(self) -> None:
+        now = time.time()
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if entry.get('expires_at', 0) > now
+        }
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2)
+        except Exception as e:
+            print(f"[AVISO] Não foi possível salvar cache de arquivos: {e}")
+
+    def lookup(self, client, content_hash: str) -> Optional[Any]:
+        """Retorna o arquivo em cache se ainda estiver ativo na File API."""
+        entry = self.entries.get(content_hash)
+        if not entry or entry.get('expires_at', 0) - EXPIRY_MARGIN <= time.time():
+            return None
+
+        try:
+            file = client.files.get(name=entry['name'])
+        except Exception:
+            # Arquivo removido ou expirado no servidor
+            self.entries.pop(content_hash, None)
+            return None
+
+        if file.state.name == "FAILED":
+            self.entries.pop(content_hash, None)
+            return None
+        return file
+
+    def get_or_upload(self, client, path: str) -> Any:
+        """
+        Reutiliza o arquivo já enviado com o mesmo conteúdo ou faz o upload.
+
+        Args:
+            client: Cliente do Gemini
+            path: Caminho do arquivo local
+
+        Returns:
+            Arquivo processado e pronto para uso
+        """
+        content_hash = file_sha256(path)
+        file = self.lookup(client, content_hash)
+
+        if file is not None:
+            print(f"[OK] Reutilizando upload existente de {os.path.basename(path)}: {file.uri}")
+        else:
+            print(f"[INFO] Fazendo upload de {os.path.basename(path)} para Gemini...")
+            file = client.files.upload(file=path)
+            print(f"[OK] Upload concluído: {file.uri}")
+
+        file = wait_until_active(client, file)
+
+        self.entries[content_hash] = {
+            'name': file.name,
+            'uri': file.uri,
+            'mime_type': file.mime_type,
+            'expires_at': _expiration_timestamp(file),
+        }
+        self._save()
+        return file
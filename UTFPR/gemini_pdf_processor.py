@@ -14,10 +14,36 @@ from google.genai import types
 
 from models import get_menu_json_schema, validate_menu_data
 from pdf_text_extractor import extract_text_from_pdf
+from gemini_file_cache import GeminiFileCache
 
 
 DEFAULT_MODEL = "gemini-3.5-flash-lite"
 
+# Limite para envio inline de PDFs (acima disso usa File API)
+INLINE_PDF_LIMIT = 20 * 1024 * 1024
+
+# Batch API: intervalo entre consultas e tempo máximo de espera pelo job
+BATCH_POLL_INTERVAL = 30
+BATCH_TIMEOUT = 24 * 60 * 60
+BATCH_FINAL_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_PARTIALLY_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+_file_cache: Optional[GeminiFileCache] = None
+
+
+def get_file_cache() -> GeminiFileCache:
+    """Retorna o cache de uploads compartilhado pelo processo."""
+    global _file_cache
+    if _file_cache is None:
+        _file_cache = GeminiFileCache()
+    return _file_cache
+
 
 def get_current_year() -> int:
     """Returns the current year for dynamic date handling."""
@@ -30,6 +56,11 @@ def configure_gemini():
     if not api_key:
         raise ValueError("GEMINI_API_KEY ou GOOGLE_API_KEY não definida nas variáveis de ambiente")
     
+    # GEMINI_BASE_URL permite apontar para um servidor local (stub) em testes
+    base_url = os.environ.get('GEMINI_BASE_URL')
+    if base_url:
+        return genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=base_url))
+    
     return genai.Client(api_key=api_key)
 
 
@@ -99,6 +130,33 @@ def clean_response_text(text: str) -> str:
     return text.strip()
 
 
+def build_text_contents(text_content: str) -> list:
+    """Monta o conteúdo da requisição a partir do texto extraído do PDF."""
+    return [
+        types.Content(
+            role="user",
+            parts=[
+                types.Part.from_text(text=f"Extraia o cardápio do seguinte conteúdo:\n\n{text_content}")
+            ],
+        ),
+    ]
+
+
+def build_inline_pdf_contents(pdf_path: str) -> list:
+    """Monta o conteúdo da requisição com o PDF enviado inline (bytes)."""
+    # Ler PDF como bytes (não precisa de base64 com from_bytes)
+    with open(pdf_path, 'rb') as f:
+        pdf_data = f.read()
+    
+    # Criar conteúdo usando from_bytes (API correta para google-genai)
+    return [
+        types.Part.from_bytes(
+            data=pdf_data,
+            mime_type="application/pdf"
+        ),
+    ]
+
+
 def process_text_with_gemini(text_content: str, model_name: str = DEFAULT_MODEL) -> str:
     """
     Process extracted text with Gemini (cheaper than sending full PDF).
@@ -116,14 +174,7 @@ def process_text_with_gemini(text_content: str, model_name: str = DEFAULT_MODEL)
     print(f"[INFO] Tamanho do texto: {len(text_content)} caracteres")
     
     # Create content with text
-    contents = [
-        types.Content(
-            role="user",
-            parts=[
-                types.Part.from_text(text=f"Extraia o cardápio do seguinte conteúdo:\n\n{text_content}")
-            ],
-        ),
-    ]
+    contents = build_text_contents(text_content)
     
     # Configure with structured output
     generate_content_config = get_generate_content_config()
@@ -143,7 +194,8 @@ def process_text_with_gemini(text_content: str, model_name: str = DEFAULT_MODEL)
 
 def upload_pdf_to_gemini(client: genai.Client, pdf_path: str, display_name: str = None) -> Any:
     """
-    Faz upload de um PDF para a API File do Gemini.
+    Faz upload de um PDF para a API File do Gemini, reutilizando um upload
+    anterior do mesmo conteúdo enquanto ele não expira.
     
     Args:
         client: Cliente do Gemini
@@ -156,20 +208,8 @@ def upload_pdf_to_gemini(client: genai.Client, pdf_path: str, display_name: str
     if display_name is None:
         display_name = os.path.basename(pdf_path)
     
-    print(f"[INFO] Fazendo upload de {display_name} para Gemini...")
-    
-    # Upload do arquivo
-    file = client.files.upload(path=pdf_path)
-    print(f"[OK] Upload concluído: {file.uri}")
-    
-    # Aguardar processamento
-    print("[INFO] Aguardando processamento do arquivo...")
-    while file.state.name == "PROCESSING":
-        time.sleep(2)
-        file = client.files.get(name=file.name)
-    
-    if file.state.name == "FAILED":
-        raise ValueError(f"Falha no processamento do PDF: {file.state.name}")
+    print(f"[INFO] Preparando {display_name} na File API do Gemini...")
+    file = get_file_cache().get_or_upload(client, pdf_path)
     
     print(f"[OK] Arquivo processado e pronto para uso")
     return file
@@ -219,13 +259,7 @@ def process_pdf_with_gemini(pdf_path: str, model_name: str = DEFAULT_MODEL) -> s
     text = clean_response_text(response.text)
     print(f"[OK] Resposta recebida: {len(text)} caracteres")
     
-    # Deletar arquivo após uso
-    try:
-        client.files.delete(name=file.name)
-        print(f"[INFO] Arquivo temporário removido")
-    except Exception as e:
-        print(f"[AVISO] Não foi possível remover arquivo: {e}")
-    
+    # O arquivo não é removido: fica em cache para retentativas até expirar
     return text
 
 
@@ -253,7 +287,7 @@ def process_pdf_inline(pdf_path: str, model_name: str = DEFAULT_MODEL) -> str:
     # ESTRATÉGIA 2: Verificar tamanho do arquivo
     file_size = os.path.getsize(pdf_path)
     
-    if file_size > 20 * 1024 * 1024:  # 20 MB
+    if file_size > INLINE_PDF_LIMIT:
         print("[AVISO] Arquivo maior que 20MB, usando File API")
         return process_pdf_with_gemini(pdf_path, model_name)
     
@@ -262,17 +296,7 @@ def process_pdf_inline(pdf_path: str, model_name: str = DEFAULT_MODEL) -> str:
     
     client = configure_gemini()
     
-    # Ler PDF como bytes (não precisa de base64 com from_bytes)
-    with open(pdf_path, 'rb') as f:
-        pdf_data = f.read()
-    
-    # Criar conteúdo usando from_bytes (API correta para google-genai)
-    contents = [
-        types.Part.from_bytes(
-            data=pdf_data,
-            mime_type="application/pdf"
-        ),
-    ]
+    contents = build_inline_pdf_contents(pdf_path)
     
     generate_content_config = get_generate_content_config()
     
@@ -290,6 +314,111 @@ def process_pdf_inline(pdf_path: str, model_name: str = DEFAULT_MODEL) -> str:
     return text
 
 
+def build_batch_request(client: genai.Client, pdf_path: str, model_name: str = DEFAULT_MODEL) -> types.InlinedRequest:
+    """
+    Monta a requisição de um PDF para a Batch API, com a mesma estratégia
+    de process_pdf_inline (texto local -> PDF inline -> File API).
+    """
+    extracted_text = extract_text_from_pdf(pdf_path)
+    
+    if extracted_text:
+        contents = build_text_contents(extracted_text)
+    elif os.path.getsize(pdf_path) > INLINE_PDF_LIMIT:
+        uploaded_file = upload_pdf_to_gemini(client, pdf_path)
+        contents = [
+            types.Content(
+                role="user",
+                parts=[types.Part.from_uri(file_uri=uploaded_file.uri, mime_type=uploaded_file.mime_type)],
+            ),
+        ]
+    else:
+        contents = [types.Content(role="user", parts=build_inline_pdf_contents(pdf_path))]
+    
+    return types.InlinedRequest(
+        model=model_name,
+        contents=contents,
+        metadata={"pdf": os.path.basename(pdf_path)},
+        config=get_generate_content_config(),
+    )
+
+
+def wait_for_batch_job(client: genai.Client, job_name: str,
+                       poll_interval: float = BATCH_POLL_INTERVAL,
+                       timeout: float = BATCH_TIMEOUT) -> Any:
+    """Consulta o job da Batch API até atingir um estado final."""
+    deadline = time.monotonic() + timeout
+    job = client.batches.get(name=job_name)
+    
+    while job.state.name not in BATCH_FINAL_STATES:
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Job {job_name} não terminou em {timeout:.0f}s (estado: {job.state.name})")
+        print(f"[INFO] Job {job_name}: {job.state.name}. Aguardando {poll_interval:.0f}s...")
+        time.sleep(poll_interval)
+        job = client.batches.get(name=job_name)
+    
+    return job
+
+
+def process_pdfs_batch(pdf_paths: list[str], model_name: str = DEFAULT_MODEL,
+                       poll_interval: float = BATCH_POLL_INTERVAL,
+                       timeout: float = BATCH_TIMEOUT) -> Dict[str, Optional[str]]:
+    """
+    Processa vários PDFs em um único job da Batch API do Gemini.
+    
+    Mais lento que as chamadas síncronas, mas sem os limites de taxa
+    interativos e com custo reduzido - adequado para execuções agendadas.
+    
+    Args:
+        pdf_paths: Caminhos dos PDFs a processar
+        model_name: Nome do modelo Gemini a usar
+        poll_interval: Segundos entre consultas ao estado do job
+        timeout: Tempo máximo de espera pelo job
+    
+    Returns:
+        Dict {caminho_do_pdf: JSON do cardápio ou None em caso de falha}
+    """
+    results: Dict[str, Optional[str]] = {path: None for path in pdf_paths}
+    if not pdf_paths:
+        return results
+    
+    client = configure_gemini()
+    
+    batch_requests = []
+    request_paths = []
+    for pdf_path in pdf_paths:
+        try:
+            request = build_batch_request(client, pdf_path, model_name)
+        except Exception as e:
+            print(f"[ERRO] Falha ao preparar {os.path.basename(pdf_path)} para o batch: {e}")
+            continue
+        batch_requests.append(request)
+        request_paths.append(pdf_path)
+    
+    if not batch_requests:
+        return results
+    
+    print(f"[INFO] Enviando job em lote com {len(batch_requests)} PDF(s) para {model_name}...")
+    job = client.batches.create(
+        model=model_name,
+        src=batch_requests,
+        config=types.CreateBatchJobConfig(display_name=f"utfpr-menus-{datetime.now():%Y%m%d-%H%M%S}"),
+    )
+    print(f"[OK] Job criado: {job.name}")
+    
+    job = wait_for_batch_job(client, job.name, poll_interval, timeout)
+    print(f"[INFO] Job {job.name} finalizado: {job.state.name}")
+    
+    inlined_responses = (job.dest.inlined_responses if job.dest else None) or []
+    # As respostas inline mantêm a ordem das requisições enviadas
+    for pdf_path, inlined in zip(request_paths, inlined_responses):
+        if inlined.error or not inlined.response or not inlined.response.text:
+            print(f"[ERRO] Sem resposta para {os.path.basename(pdf_path)}: {inlined.error}")
+            continue
+        results[pdf_path] = clean_response_text(inlined.response.text)
+    
+    return results
+
+
 if __name__ == "__main__":
     import sys
     
@@ -30,10 +30,15 @@ def log_warning(msg):
 
 from utfpr_firebase_uploader import upload_utfpr_menu_to_firebase
 from google_drive_downloader import download_pdfs_from_folder
-from gemini_pdf_processor import process_pdf_inline
+from gemini_pdf_processor import process_pdf_inline, process_pdfs_batch
 from models import validate_menu_data
 
 
+def use_batch_mode() -> bool:
+    """Indica se os PDFs devem ser enviados em um único job da Batch API."""
+    return "--batch" in sys.argv[1:] or os.environ.get("GEMINI_BATCH_MODE") == "1"
+
+
 def process_pdf_menu(pdf_path: str) -> dict | None:
     """
     Processa um PDF de cardápio e retorna o JSON estruturado.
@@ -49,10 +54,55 @@ def process_pdf_menu(pdf_path: str) -> dict | None:
     try:
         log_info("Enviando para processamento (texto ou PDF)...")
         json_text = process_pdf_inline(pdf_path)
-        
-        # Parse JSON
+    except Exception as e:
+        log_error(f"Erro ao processar com Gemini: {e}")
+        return None
+    
+    return validate_menu_response(json_text)
+
+
+def process_pdf_menus_batch(pdf_paths: list[str]) -> dict[str, dict | None]:
+    """
+    Processa vários PDFs em um único job da Batch API.
+    
+    Args:
+        pdf_paths: Caminhos dos arquivos PDF
+    
+    Returns:
+        Dict {caminho_do_pdf: cardápio processado ou None}
+    """
+    log_info(f"Modo batch: enviando {len(pdf_paths)} PDF(s) em um único job...")
+    
+    try:
+        responses = process_pdfs_batch(pdf_paths)
+    except Exception as e:
+        log_error(f"Erro no job em lote do Gemini: {e}")
+        return {pdf_path: None for pdf_path in pdf_paths}
+    
+    menus = {}
+    for pdf_path in pdf_paths:
+        json_text = responses.get(pdf_path)
+        if json_text is None:
+            log_error(f"Sem resposta do batch para {os.path.basename(pdf_path)}")
+            menus[pdf_path] = None
+            continue
+        log_info(f"Validando resposta do batch para {os.path.basename(pdf_path)}")
+        menus[pdf_path] = validate_menu_response(json_text)
+    return menus
+
+
+def validate_menu_response(json_text: str) -> dict | None:
+    """
+    Converte e valida a resposta JSON do Gemini.
+    
+    Args:
+        json_text: Resposta do modelo
+    
+    Returns:
+        Dict com o cardápio validado ou None se rejeitado
+    """
+    try:
         menu_json = json.loads(json_text)
-        
     except Exception as e:
         log_error(f"Erro ao processar com Gemini: {e}")
         return None
@@ -112,14 +162,19 @@ def main():
     total_processed = 0
     total_uploaded = 0
     
+    batch_menus = process_pdf_menus_batch(pdf_files) if use_batch_mode() else None
+    
     for pdf_file in pdf_files:
         log_info(f"\n{'=' * 60}")
         log_info(f"Processando: {os.path.basename(pdf_file)}")
         log_info(f"{'=' * 60}")
         
         try:
-            # Processar PDF
-            menu_data = process_pdf_menu(pdf_file)
+            # Processar PDF (ou usar o resultado do job em lote)
+            if batch_menus is not None:
+                menu_data = batch_menus.get(pdf_file)
+            else:
+                menu_data = process_pdf_menu(pdf_file)
             
             if menu_data:
                 total_processed += 1
@@ -7,6 +7,7 @@ Ensures correct JSON format for Firebase database.
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Dict, List, Literal
 from datetime import datetime
+from functools import lru_cache
 
 
 Weekday = Literal[
@@ -79,10 +80,13 @@ class WeeklyMenu(BaseModel):
         return v
 
 
+@lru_cache(maxsize=None)
 def get_menu_json_schema() -> dict:
     """
     Returns a JSON schema for the menu structure that Gemini can use.
     This is a simplified schema for direct date-keyed output.
+
+    The schema is built once and shared; callers must not mutate it.
     """
     return {
         "type": "object",
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from gemini_file_cache import GeminiFileCache, wait_until_active
+
+
+def remote_file(name="files/abc", state="ACTIVE", hours=48):
+    return SimpleNamespace(
+        name=name,
+        uri=f"https://example.invalid/{name}",
+        mime_type="application/pdf",
+        state=SimpleNamespace(name=state),
+        expiration_time=datetime.now(timezone.utc) + timedelta(hours=hours),
+    )
+
+
+class GeminiFileCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "menu.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 cardapio")
+        self.cache_path = os.path.join(self.tmp.name, "cache.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reuses_live_upload_across_instances(self):
+        client = MagicMock()
+        client.files.upload.return_value = remote_file()
+        client.files.get.return_value = remote_file()
+
+        GeminiFileCache(self.cache_path).get_or_upload(client, self.pdf_path)
+        file = GeminiFileCache(self.cache_path).get_or_upload(client, self.pdf_path)
+
+        client.files.upload.assert_called_once()
+        self.assertEqual(file.name, "files/abc")
+
+    def test_uploads_again_when_cached_file_is_gone(self):
+        client = MagicMock()
+        client.files.upload.return_value = remote_file()
+        GeminiFileCache(self.cache_path).get_or_upload(client, self.pdf_path)
+
+        client.files.get.side_effect = RuntimeError("404")
+        client.files.upload.return_value = remote_file(name="files/new")
+        file = GeminiFileCache(self.cache_path).get_or_upload(client, self.pdf_path)
+
+        self.assertEqual(client.files.upload.call_count, 2)
+        self.assertEqual(file.name, "files/new")
+
+    def test_skips_entries_close_to_expiry(self):
+        client = MagicMock()
+        client.files.upload.return_value = remote_file(hours=0.5)
+        GeminiFileCache(self.cache_path).get_or_upload(client, self.pdf_path)
+        GeminiFileCache(self.cache_path).get_or_upload(client, self.pdf_path)
+
+        self.assertEqual(client.files.upload.call_count, 2)
+
+
+class WaitUntilActiveTests(unittest.TestCase):
+    @patch("gemini_file_cache.time.sleep")
+    def test_polls_with_exponential_backoff(self, sleep):
+        client = MagicMock()
+        client.files.get.side_effect = [remote_file(state="PROCESSING"), remote_file()]
+
+        file = wait_until_active(client, remote_file(state="PROCESSING"), initial_delay=0.5)
+
+        self.assertEqual(file.state.name, "ACTIVE")
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.5, 1.0])
+
+    def test_raises_when_processing_failed(self):
+        with self.assertRaises(ValueError):
+            wait_until_active(MagicMock(), remote_file(state="FAILED"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import gemini_pdf_processor
+from gemini_pdf_processor import process_pdfs_batch
+
+
+def inlined(text=None, error=None):
+    response = SimpleNamespace(text=text) if text is not None else None
+    return SimpleNamespace(response=response, error=error)
+
+
+def batch_job(state, responses=None):
+    dest = SimpleNamespace(inlined_responses=responses) if responses is not None else None
+    return SimpleNamespace(name="batches/123", state=SimpleNamespace(name=state), dest=dest)
+
+
+class ProcessPdfsBatchTests(unittest.TestCase):
+    @patch("gemini_pdf_processor.time.sleep")
+    @patch("gemini_pdf_processor.extract_text_from_pdf", return_value="Segunda: Arroz e feijão")
+    @patch("gemini_pdf_processor.configure_gemini")
+    def test_submits_one_job_and_maps_results_in_order(self, configure_gemini, extract_text, sleep):
+        client = MagicMock()
+        configure_gemini.return_value = client
+        client.batches.create.return_value = batch_job("JOB_STATE_PENDING")
+        client.batches.get.side_effect = [
+            batch_job("JOB_STATE_RUNNING"),
+            batch_job("JOB_STATE_SUCCEEDED", [inlined('```json\n{"a": 1}\n```'), inlined(error="boom")]),
+        ]
+
+        results = process_pdfs_batch(["a.pdf", "b.pdf"], poll_interval=0)
+
+        client.batches.create.assert_called_once()
+        self.assertEqual(len(client.batches.create.call_args.kwargs["src"]), 2)
+        self.assertEqual(results, {"a.pdf": '{"a": 1}', "b.pdf": None})
+
+    @patch("gemini_pdf_processor.configure_gemini")
+    def test_empty_input_does_not_create_job(self, configure_gemini):
+        self.assertEqual(process_pdfs_batch([]), {})
+        configure_gemini.assert_not_called()
+
+    @patch("gemini_pdf_processor.time.sleep")
+    @patch("gemini_pdf_processor.time.monotonic", side_effect=[0, 10])
+    def test_wait_for_batch_job_times_out(self, monotonic, sleep):
+        client = MagicMock()
+        client.batches.get.return_value = batch_job("JOB_STATE_RUNNING")
+
+        with self.assertRaises(TimeoutError):
+            gemini_pdf_processor.wait_for_batch_job(client, "batches/123", poll_interval=1, timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ import json
 import unittest
 from unittest.mock import patch
 
-from main import process_pdf_menu
+from main import process_pdf_menu, process_pdf_menus_batch
 
 
 class ProcessPdfMenuTests(unittest.TestCase):
@@ -41,5 +41,29 @@ class ProcessPdfMenuTests(unittest.TestCase):
         self.assertIsNone(process_pdf_menu("menu.pdf"))
 
 
+class ProcessPdfMenusBatchTests(unittest.TestCase):
+    @patch("main.process_pdfs_batch")
+    def test_maps_batch_responses_back_to_pdfs(self, process_pdfs_batch):
+        process_pdfs_batch.return_value = {
+            "a.pdf": json.dumps({
+                "2026-08-10": {
+                    "menu": [["Sem refeições disponíveis"], ["Arroz"], ["Sopa"]],
+                    "timestamp": 0,
+                    "weekday": "Segunda-Feira",
+                }
+            }),
+            "b.pdf": None,
+        }
+
+        result = process_pdf_menus_batch(["a.pdf", "b.pdf"])
+
+        self.assertEqual(list(result["a.pdf"]), ["2026-08-10"])
+        self.assertIsNone(result["b.pdf"])
+
+    @patch("main.process_pdfs_batch", side_effect=RuntimeError("quota"))
+    def test_batch_failure_yields_no_menus(self, process_pdfs_batch):
+        self.assertEqual(process_pdf_menus_batch(["a.pdf"]), {"a.pdf": None})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,7 +2,7 @@
 
 import unittest
 
-from models import validate_menu_data
+from models import get_menu_json_schema, validate_menu_data
 
 
 def valid_day(**overrides):
@@ -74,5 +74,10 @@ class MenuValidationTests(unittest.TestCase):
         self.assertTrue(errors)
 
 
+class MenuSchemaTests(unittest.TestCase):
+    def test_schema_is_built_once(self):
+        self.assertIs(get_menu_json_schema(), get_menu_json_schema())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,13 @@
 import json
 import firebase_admin
 from firebase_admin import db
+from array import array
 from collections import Counter
 import os
 from datetime import datetime
 
+from dish_dictionary import DishDictionary
+
 location_unit_list = [
     ("cwb", "ru-politecnico"),
     ("cwb", "ru-botanico"),
@@ -25,18 +28,19 @@ def init_firebase():
 
 def get_data():
     # Load firebase data
-    data = db.reference("archive/menus").get()
-
-    # Convert to JSON
-    data = json.loads(json.dumps(data))
-
-    return data
+    return db.reference("archive/menus").get()
 
 # Initialize Firebase
 init_firebase()
 data = get_data()
 
-def get_common_items_by_location_and_unit(data):
+# Dish name <-> id table; set DISH_DICTIONARY_PATH to keep ids stable between runs
+dish_dictionary = DishDictionary.load(os.environ.get("DISH_DICTIONARY_PATH"))
+
+MEAL_TYPES = ["coffee", "lunch", "dinner"]
+
+def get_common_items_by_location_and_unit(data, dictionary):
+    """Encode every meal of the archive as dish ids, grouped by location, unit and meal type."""
     common_items = {}
 
     for location, location_data in data.items():
@@ -44,66 +48,29 @@ def get_common_items_by_location_and_unit(data):
 
         for rus, rus_data in location_data.items():
             for unit, unit_data in rus_data.items():
-                common_items[location][unit] = {"coffee": [], "lunch": [], "dinner": []}
+                common_items[location][unit] = {meal_type: array("I") for meal_type in MEAL_TYPES}
 
                 for menus, menus_data in unit_data.items():
                     for date, date_data in menus_data.items():
-                        for menu, menu_items in date_data.items():
-                            if menu == "menu":
-                                for index, menu_item in enumerate(menu_items):
-                                    # Clean up menu item
-                                    replace_list = [
-                                        "\n",
-                                        "\t",
-                                        "\r",
-                                        "  ",
-                                        "vegano: ",
-                                        "saladas: ",
-                                        "fehado",
-                                        "sem refeições disponíveis",
-                                    ]
-                                    for i in range(len(menu_item)):
-                                        for replace in replace_list:
-                                            menu_item[i] = menu_item[i].replace(
-                                                replace, ""
-                                            )
-
-                                            # Remove spaces at the beginning and end of the string
-                                            menu_item[i] = menu_item[i].strip()
-
-                                            # Set all to lowercase
-                                            menu_item[i] = menu_item[i].lower()
-
-                                    # Remove empty items or items with only whitespace
-                                    menu_item = list(filter(None, menu_item))
-                                    menu_item = list(
-                                        filter(lambda x: x.strip(), menu_item)
-                                    )
-
-                                    # Add to the correct list
-                                    if index == 0:
-                                        common_items[location][unit]["coffee"].extend(
-                                            menu_item
-                                        )
-                                    elif index == 1:
-                                        common_items[location][unit]["lunch"].extend(
-                                            menu_item
-                                        )
-                                    elif index == 2:
-                                        common_items[location][unit]["dinner"].extend(
-                                            menu_item
-                                        )
+                        menu_items = date_data.get("menu") if isinstance(date_data, dict) else None
+                        if not isinstance(menu_items, list):
+                            continue
 
-    return common_items
+                        # Add to the correct list (coffee, lunch, dinner)
+                        for meal_type, menu_item in zip(MEAL_TYPES, menu_items):
+                            if isinstance(menu_item, list):
+                                common_items[location][unit][meal_type].extend(
+                                    dictionary.encode_meal(menu_item)
+                                )
 
+    return common_items
 
-def common_items_filter(data, meal_type, location, unit):
-    common_items = get_common_items_by_location_and_unit(data)
 
-    common_items = Counter(common_items[location][unit][meal_type]).most_common(50)
+def common_items_filter(encoded_items, dictionary, meal_type, location, unit):
+    common_items = Counter(encoded_items[location][unit][meal_type]).most_common(50)
 
     # Parse to a list of dictionaries
-    common_items = [{"name": item[0], "count": item[1]} for item in common_items]
+    common_items = [{"name": dictionary.decode(item[0]), "count": item[1]} for item in common_items]
 
     return common_items
 
@@ -125,6 +92,9 @@ def __main__():
     # using the filter function and store them in a dictionary
     common_items = {}
 
+    # Encode the archive once; every location/unit/meal is then counted over ids
+    encoded_items = get_common_items_by_location_and_unit(data, dish_dictionary)
+
     # Divide by location, unit and meal type
     for location, unit in location_unit_list:
         if location not in common_items:
@@ -133,9 +103,9 @@ def __main__():
         if unit not in common_items[location]:
             common_items[location][unit] = {}
             
-        for meal_type in ["coffee", "lunch", "dinner"]:
+        for meal_type in MEAL_TYPES:
             common_items[location][unit][meal_type] = common_items_filter(
-                data, meal_type, location, unit
+                encoded_items, dish_dictionary, meal_type, location, unit
             )
 
     # Print results as a full table
@@ -145,5 +115,8 @@ def __main__():
     # Upload data
     upload_data(common_items)
 
+    if os.environ.get("DISH_DICTIONARY_PATH"):
+        dish_dictionary.save(os.environ["DISH_DICTIONARY_PATH"])
+
 
 __main__()
@@ -0,0 +1,111 @@
+"""
+Dish dictionary: maps normalised dish names to small integer ids.
+
+Archived menus repeat the same few thousand dishes hundreds of thousands of
+times, so analysis keeps each meal as an array of ids instead of strings.
+The dictionary also works as a canonicalisation table: spelling variants can
+be registered as aliases of an existing dish.
+"""
+
+import json
+import os
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+# Fragments removed from every dish name before encoding
+REPLACE_LIST = [
+    "\n",
+    "\t",
+    "\r",
+    "  ",
+    "vegano: ",
+    "saladas: ",
+    "fehado",
+    "sem refeições disponíveis",
+]
+
+
+@lru_cache(maxsize=65536)
+def normalize_dish(name: str) -> str:
+    """Clean up a dish name (same rules the analysis always applied)."""
+    for replace in REPLACE_LIST:
+        name = name.replace(replace, "")
+
+        # Remove spaces at the beginning and end of the string
+        name = name.strip()
+
+        # Set all to lowercase
+        name = name.lower()
+    return name
+
+
+class DishDictionary:
+    """Incremental string <-> integer id table for dish names."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def encode(self, name: str) -> Optional[int]:
+        """Return the id for a dish, adding it if new. Empty names return None."""
+        if not isinstance(name, str):
+            return None
+        normalized = normalize_dish(name)
+        if not normalized:
+            return None
+        dish_id = self.ids.get(normalized)
+        if dish_id is None:
+            dish_id = len(self.names)
+            self.names.append(normalized)
+            self.ids[normalized] = dish_id
+        return dish_id
+
+    def encode_meal(self, items: Iterable[str]) -> array:
+        """Encode a meal (list of dishes) as an unsigned int array."""
+        encoded = array("I")
+        for item in items:
+            dish_id = self.encode(item)
+            if dish_id is not None:
+                encoded.append(dish_id)
+        return encoded
+
+    def decode(self, dish_id: int) -> str:
+        return self.names[dish_id]
+
+    def add_alias(self, variant: str, canonical: str) -> None:
+        """Make a spelling variant resolve to the id of the canonical name."""
+        canonical_id = self.encode(canonical)
+        normalized = normalize_dish(variant)
+        if canonical_id is not None and normalized:
+            self.ids[normalized] = canonical_id
+
+    def to_dict(self) -> dict:
+        aliases = {
+            name: dish_id for name, dish_id in self.ids.items()
+            if self.names[dish_id] != name
+        }
+        return {"names": self.names, "aliases": aliases}
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "DishDictionary":
+        dictionary = cls()
+        dictionary.names = list(content.get("names", []))
+        dictionary.ids = {name: dish_id for dish_id, name in enumerate(dictionary.names)}
+        dictionary.ids.update(content.get("aliases", {}))
+        return dictionary
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "DishDictionary":
+        """Load a saved dictionary so ids stay stable between runs (empty if missing)."""
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -1,20 +1,57 @@
 import base64
 import os
 import json
+import threading
+import time
 from google import genai
 from google.genai import types
 import env_config
+from gemini_file_cache import GeminiFileCache
 
-def format_menu_ai(content_text, pdf_paths=None, image_paths=None, system_instruction=None):
+MODEL = "gemini-3.1-flash-lite-preview"
+
+# Prazo de cada requisição ao Gemini (segundos); sem ele uma chamada travada
+# segura a thread do pool mesmo depois de main.AI_TIMEOUT abandonar o site
+REQUEST_TIMEOUT = int(os.environ.get('GEMINI_REQUEST_TIMEOUT', 240))
+
+# Batch API: intervalo entre consultas e estados finais do job
+BATCH_POLL_INTERVAL = 30
+BATCH_FINAL_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_PARTIALLY_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+_file_cache = None
+_file_cache_lock = threading.Lock()
+
+def get_file_cache():
+    global _file_cache
+    with _file_cache_lock:
+        if _file_cache is None:
+            _file_cache = GeminiFileCache()
+        return _file_cache
+
+def create_client():
     """
-    Recebe o conteúdo do cardápio (texto), lista de pdfs e imagens, envia para Gemini, retorna objeto formatado.
+    Cria o cliente Gemini com prazo por requisição (REQUEST_TIMEOUT).
+    GEMINI_BASE_URL permite apontar para um servidor local (stub) em testes.
     """
-    client = genai.Client(
-        api_key=getattr(env_config, 'GEMINI_API_KEY', None)
-    )
-
-    model = "gemini-3.1-flash-lite-preview"
+    api_key = getattr(env_config, 'GEMINI_API_KEY', None) or os.environ.get('GEMINI_API_KEY')
+    # HttpOptions.timeout é em milissegundos
+    http_options = types.HttpOptions(timeout=REQUEST_TIMEOUT * 1000)
+    base_url = os.environ.get('GEMINI_BASE_URL')
+    if base_url:
+        http_options.base_url = base_url
+    return genai.Client(api_key=api_key, http_options=http_options)
 
+def build_contents(client, content_text, pdf_paths=None, image_paths=None):
+    """
+    Monta o conteúdo da requisição: texto do cardápio seguido dos PDFs e imagens enviados via File API.
+    Uploads anteriores do mesmo conteúdo são reutilizados enquanto não expiram.
+    """
     # Garante que content_text seja string
     if isinstance(content_text, list):
         content_text = content_text[0] if content_text else ""
@@ -31,7 +68,7 @@ def format_menu_ai(content_text, pdf_paths=None, image_paths=None, system_instru
     for pdf_path in pdf_paths:
         if pdf_path:
             try:
-                uploaded_pdf = client.files.upload(file=pdf_path)
+                uploaded_pdf = get_file_cache().get_or_upload(client, pdf_path)
                 contents.append(uploaded_pdf)
             except Exception as e:
                 print(f"[AI_PARSE] Erro ao fazer upload do PDF {pdf_path}: {e}")
@@ -40,12 +77,15 @@ def format_menu_ai(content_text, pdf_paths=None, image_paths=None, system_instru
     for img_path in image_paths:
         if img_path:
             try:
-                uploaded_img = client.files.upload(file=img_path)
+                uploaded_img = get_file_cache().get_or_upload(client, img_path)
                 contents.append(uploaded_img)
             except Exception as e:
                 print(f"[AI_PARSE] Erro ao fazer upload da imagem {img_path}: {e}")
 
-    generate_content_config = types.GenerateContentConfig(
+    return contents
+
+def build_config(system_instruction=None):
+    return types.GenerateContentConfig(
         thinking_config=types.ThinkingConfig(
             thinking_budget=-1,
         ),
@@ -55,10 +95,32 @@ def format_menu_ai(content_text, pdf_paths=None, image_paths=None, system_instru
         ],
     )
 
+def parse_response(response_str):
+    """
+    Converte a resposta do modelo em objeto JSON (ou None se inválida).
+    """
+    try:
+        response_obj = json.loads(response_str)
+        if isinstance(response_obj, dict) and "response" in response_obj:
+            return json.loads(response_obj["response"])
+        return response_obj
+    except Exception as e:
+        print(f"[AI_PARSE] Erro ao converter resposta: {e}\nResposta recebida: {response_str}")
+        return None
+
+def format_menu_ai(content_text, pdf_paths=None, image_paths=None, system_instruction=None):
+    """
+    Recebe o conteúdo do cardápio (texto), lista de pdfs e imagens, envia para Gemini, retorna objeto formatado.
+    """
+    client = create_client()
+
+    contents = build_contents(client, content_text, pdf_paths, image_paths)
+    generate_content_config = build_config(system_instruction)
+
     response_str = ""
     try:
         for chunk in client.models.generate_content_stream(
-            model=model,
+            model=MODEL,
             contents=contents,
             config=generate_content_config,
         ):
@@ -69,11 +131,74 @@ def format_menu_ai(content_text, pdf_paths=None, image_paths=None, system_instru
         return None
 
     # Tenta converter para objeto JSON
+    return parse_response(response_str)
+
+def format_menus_batch(jobs, system_instruction=None, poll_interval=BATCH_POLL_INTERVAL, timeout=24 * 60 * 60):
+    """
+    Envia vários cardápios em um único job da Batch API do Gemini.
+    Mais lento que format_menu_ai, mas sem os limites de taxa interativos e com custo menor.
+
+    jobs: dict {ru_name: {"text": ..., "pdfs": [...], "images": [...]}}
+    Retorna dict {ru_name: objeto formatado ou None}.
+    """
+    results = {ru_name: None for ru_name in jobs}
+    if not jobs:
+        return results
+
+    client = create_client()
+    config = build_config(system_instruction)
+
+    ru_names = []
+    batch_requests = []
+    for ru_name, job in jobs.items():
+        contents = build_contents(client, job.get('text'), job.get('pdfs'), job.get('images'))
+        # No batch as partes precisam ser explícitas (arquivos enviados viram referências por URI)
+        parts = []
+        for item in contents:
+            if isinstance(item, str):
+                if item:
+                    parts.append(types.Part.from_text(text=item))
+            else:
+                parts.append(types.Part.from_uri(file_uri=item.uri, mime_type=item.mime_type))
+        if not parts:
+            print(f"[AI_PARSE] Nada para enviar no batch para {ru_name}")
+            continue
+        ru_names.append(ru_name)
+        batch_requests.append(types.InlinedRequest(
+            model=MODEL,
+            contents=[types.Content(role="user", parts=parts)],
+            metadata={"ru_name": ru_name},
+            config=config,
+        ))
+
+    if not batch_requests:
+        return results
+
     try:
-        response_obj = json.loads(response_str)
-        if isinstance(response_obj, dict) and "response" in response_obj:
-            return json.loads(response_obj["response"])
-        return response_obj
+        job = client.batches.create(
+            model=MODEL,
+            src=batch_requests,
+            config=types.CreateBatchJobConfig(display_name=f"ufsc-menus-{time.strftime('%Y%m%d-%H%M%S')}"),
+        )
+        print(f"[AI_PARSE] Job em lote criado: {job.name} ({len(batch_requests)} RUs)")
+
+        deadline = time.monotonic() + timeout
+        while job.state.name not in BATCH_FINAL_STATES:
+            if time.monotonic() >= deadline:
+                print(f"[AI_PARSE] Job {job.name} não terminou a tempo (estado: {job.state.name})")
+                return results
+            time.sleep(poll_interval)
+            job = client.batches.get(name=job.name)
+        print(f"[AI_PARSE] Job {job.name} finalizado: {job.state.name}")
     except Exception as e:
-        print(f"[AI_PARSE] Erro ao converter resposta: {e}\nResposta recebida: {response_str}")
-        return None
+        print(f"[AI_PARSE] Erro no job em lote: {e}")
+        return results
+
+    inlined_responses = (job.dest.inlined_responses if job.dest else None) or []
+    # As respostas inline mantêm a ordem das requisições enviadas
+    for ru_name, inlined in zip(ru_names, inlined_responses):
+        if inlined.error or not inlined.response or not inlined.response.text:
+            print(f"[AI_PARSE] Sem resposta do batch para {ru_name}: {inlined.error}")
+            continue
+        results[ru_name] = parse_response(inlined.response.text)
+    return results
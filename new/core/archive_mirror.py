@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+import env_config
+
+# Espelho local do archive do Firebase, indexado por unidade e data
+MIRROR_PATH = Path(os.environ.get('ARCHIVE_MIRROR_DB', Path(__file__).parent / '.archive_mirror.sqlite3'))
+
+# Por quanto tempo a última data conhecida dispensa consultar o Firebase (segundos)
+MIRROR_MAX_AGE = int(os.environ.get('ARCHIVE_MIRROR_MAX_AGE', 6 * 60 * 60))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menus (
+    city_code TEXT NOT NULL,
+    ru_name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    weekday TEXT,
+    menu TEXT,
+    timestamp INTEGER,
+    PRIMARY KEY (city_code, ru_name, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    city_code TEXT NOT NULL,
+    ru_name TEXT NOT NULL,
+    checked_at REAL,
+    synced_through TEXT,
+    PRIMARY KEY (city_code, ru_name)
+) WITHOUT ROWID;
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+def is_valid_date(date_str):
+    try:
+        datetime.strptime(date_str, '%Y-%m-%d')
+        return True
+    except Exception:
+        return False
+
+@contextmanager
+def connect(path=MIRROR_PATH):
+    """
+    Abre o espelho (uma conexão por chamada, seguro entre threads) e confirma ao sair.
+    """
+    conn = sqlite3.connect(str(path), timeout=30)
+    try:
+        with _schema_lock:
+            if str(path) not in _schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                _schema_ready.add(str(path))
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def menus_url(ru_name, city_code, use_archive=True):
+    base_url = os.environ.get('BASE_URL')
+    if use_archive:
+        firebase_path = f"archive/menus/{city_code}/rus/{ru_name}/menus.json"
+    else:
+        firebase_path = f"menus/{city_code}/rus/{ru_name}/menus.json"
+    return f"{base_url}/{firebase_path}"
+
+def firebase_get(ru_name, city_code, params, use_archive=True, timeout=30):
+    """
+    GET no nó de cardápios de um RU com parâmetros de consulta do Firebase REST.
+    Retorna o JSON da resposta ou None em caso de falha.
+    """
+    if not os.environ.get('BASE_URL') or not os.environ.get('FIREBASE_KEY'):
+        print("[ERROR] Variáveis BASE_URL e FIREBASE_KEY não configuradas")
+        return None
+    if requests is None:
+        print("[ERROR] Biblioteca requests não instalada. Execute: pip install requests")
+        return None
+    query = dict(params, auth=os.environ.get('FIREBASE_KEY'))
+    try:
+        resp = requests.get(menus_url(ru_name, city_code, use_archive), params=query, timeout=timeout)
+    except Exception as e:
+        print(f"[MIRROR] Falha ao consultar {ru_name}: {e}")
+        return None
+    if resp.status_code != 200:
+        print(f"[MIRROR] Falha ao consultar {ru_name}: {resp.status_code}")
+        return None
+    return resp.json()
+
+def fetch_remote_last_date(ru_name, city_code, use_archive=True):
+    """
+    Última data publicada no Firebase com uma única consulta pequena.
+
+    orderBy="$key"&limitToLast=1 devolve só o dia mais recente; se a consulta
+    for recusada (ou a última chave não for uma data), shallow=true devolve
+    apenas as chaves, sem os cardápios.
+    Retorna (data, dados do dia ou None), ou (None, None).
+    """
+    data = firebase_get(ru_name, city_code, {'orderBy': '"$key"', 'limitToLast': 1}, use_archive)
+    if isinstance(data, dict) and data:
+        dates = [d for d in data if is_valid_date(d)]
+        if dates:
+            last_date = max(dates)
+            return last_date, data[last_date]
+    if data is None or (isinstance(data, dict) and data):
+        data = firebase_get(ru_name, city_code, {'shallow': 'true'}, use_archive)
+        if isinstance(data, dict):
+            dates = [d for d in data if is_valid_date(d)]
+            if dates:
+                return max(dates), None
+    return None, None
+
+def store_days(ru_name, city_code, days, conn=None):
+    """
+    Grava dias ({data: {weekday, menu, timestamp}}) no espelho.
+    """
+    rows = []
+    for date_str, day in days.items():
+        if not is_valid_date(date_str):
+            continue
+        # Só a data é conhecida (ex.: resposta shallow): mantém o que já estiver gravado
+        day = day if isinstance(day, dict) else {}
+        menu = json.dumps(day['menu'], ensure_ascii=False) if 'menu' in day else None
+        rows.append((city_code, ru_name, date_str, day.get('weekday'), menu, day.get('timestamp')))
+    if not rows:
+        return 0
+    sql = ("INSERT INTO menus (city_code, ru_name, date, weekday, menu, timestamp) VALUES (?, ?, ?, ?, ?, ?) "
+           "ON CONFLICT(city_code, ru_name, date) DO UPDATE SET "
+           "weekday = COALESCE(excluded.weekday, menus.weekday), "
+           "menu = COALESCE(excluded.menu, menus.menu), "
+           "timestamp = COALESCE(excluded.timestamp, menus.timestamp)")
+    if conn is not None:
+        conn.executemany(sql, rows)
+    else:
+        with connect() as conn:
+            conn.executemany(sql, rows)
+    return len(rows)
+
+def local_last_date(ru_name, city_code, max_age=MIRROR_MAX_AGE):
+    """
+    Última data do espelho, se ele foi conferido com o Firebase há menos de max_age segundos.
+    """
+    with connect() as conn:
+        state = conn.execute(
+            "SELECT checked_at FROM sync_state WHERE city_code = ? AND ru_name = ?", (city_code, ru_name)
+        ).fetchone()
+        if not state or state[0] is None or time.time() - state[0] > max_age:
+            return None
+        row = conn.execute(
+            "SELECT MAX(date) FROM menus WHERE city_code = ? AND ru_name = ?", (city_code, ru_name)
+        ).fetchone()
+    return row[0] if row else None
+
+def mark_checked(ru_name, city_code, conn, synced_through=None):
+    conn.execute(
+        "INSERT INTO sync_state (city_code, ru_name, checked_at, synced_through) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(city_code, ru_name) DO UPDATE SET checked_at = excluded.checked_at, "
+        "synced_through = COALESCE(excluded.synced_through, sync_state.synced_through)",
+        (city_code, ru_name, time.time(), synced_through)
+    )
+
+def record_remote_check(ru_name, city_code, last_date, last_day=None):
+    """
+    Registra o resultado de uma consulta ao Firebase (a data mais recente e, se veio, o dia).
+    """
+    with connect() as conn:
+        if last_date:
+            store_days(ru_name, city_code, {last_date: last_day or {}}, conn=conn)
+        mark_checked(ru_name, city_code, conn)
+
+def sync_unit(ru_name, city_code, use_archive=True):
+    """
+    Sincroniza incrementalmente o espelho de um RU: baixa só as datas a partir
+    da última já sincronizada (orderBy="$key"&startAt=...). Retorna os dias baixados.
+    """
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT synced_through FROM sync_state WHERE city_code = ? AND ru_name = ?", (city_code, ru_name)
+        ).fetchone()
+    synced_through = row[0] if row else None
+    params = {'orderBy': '"$key"'}
+    if synced_through:
+        # O último dia sincronizado é baixado de novo, pois pode ter sido corrigido
+        params['startAt'] = f'"{synced_through}"'
+    data = firebase_get(ru_name, city_code, params, use_archive)
+    if not isinstance(data, dict):
+        return 0
+    dates = [d for d in data if is_valid_date(d)]
+    with connect() as conn:
+        count = store_days(ru_name, city_code, data, conn=conn)
+        mark_checked(ru_name, city_code, conn, synced_through=max(dates) if dates else synced_through)
+    print(f"[MIRROR] {ru_name}: {count} dia(s) sincronizado(s)")
+    return count
+
+def get_days(ru_name, city_code, start_date=None, end_date=None):
+    """
+    Dias do espelho entre start_date e end_date (inclusive), pela chave (unidade, data).
+    """
+    query = "SELECT date, weekday, menu, timestamp FROM menus WHERE city_code = ? AND ru_name = ?"
+    params = [city_code, ru_name]
+    if start_date:
+        query += " AND date >= ?"
+        params.append(start_date)
+    if end_date:
+        query += " AND date <= ?"
+        params.append(end_date)
+    with connect() as conn:
+        rows = conn.execute(query + " ORDER BY date", params).fetchall()
+    return {
+        date_str: {'weekday': weekday, 'menu': json.loads(menu) if menu else None, 'timestamp': timestamp}
+        for date_str, weekday, menu, timestamp in rows
+    }
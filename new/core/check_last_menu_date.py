@@ -1,51 +1,4 @@
-import env_config
-def is_valid_date(date_str):
-    try:
-        datetime.strptime(date_str, '%Y-%m-%d')
-        return True
-    except Exception:
-        return False
-
-def get_last_menu_date(ru_name, city_code, use_archive=True):
-    BASE_URL = getattr(env_config, 'BASE_URL', None)
-    FIREBASE_KEY = getattr(env_config, 'FIREBASE_KEY', None)
-    if not BASE_URL or not FIREBASE_KEY:
-        print("[ERROR] Variáveis BASE_URL e FIREBASE_KEY não configuradas")
-        return None
-    if use_archive:
-        firebase_path = f"archive/menus/{city_code}/rus/{ru_name}/menus.json"
-    else:
-        firebase_path = f"menus/{city_code}/rus/{ru_name}/menus.json"
-    firebase_url = f"{BASE_URL}/{firebase_path}?auth={FIREBASE_KEY}"
-    try:
-        resp = requests.get(firebase_url, timeout=30)
-        if resp.status_code != 200:
-            print(f"[ERROR] Falha ao buscar menus de {ru_name}: {resp.status_code}")
-            return None
-        data = resp.json()
-        if not data:
-            return None
-        dates = [d for d in data.keys() if is_valid_date(d)]
-        if not dates:
-            return None
-        last_date = sorted(dates)[-1]
-        return last_date
-    except Exception as e:
-        print(f"[ERROR] Falha ao buscar menus de {ru_name}: {e}")
-        return None
-import os
-import requests
-from datetime import datetime
-
-# Carrega variáveis do .env se disponível
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
-
-BASE_URL = os.environ.get('BASE_URL')
-FIREBASE_KEY = os.environ.get('FIREBASE_KEY')
+import archive_mirror
 
 UFSC_MAPPING = {
     'blumenau': 'ufsc-blu',
@@ -55,4 +8,34 @@ UFSC_MAPPING = {
     'joinville': 'ufsc-joi'
 }
 
+def get_last_menu_date(ru_name, city_code, use_archive=True, max_age=archive_mirror.MIRROR_MAX_AGE):
+    """
+    Última data de cardápio publicada para o RU.
+
+    Com use_archive, consulta primeiro o espelho local (nenhuma requisição se
+    ele foi conferido há menos de max_age segundos); caso contrário faz uma
+    única consulta pequena ao Firebase (limitToLast=1, ou shallow) em vez de
+    baixar todo o histórico do RU.
+    """
+    if use_archive:
+        try:
+            last_date = archive_mirror.local_last_date(ru_name, city_code, max_age=max_age)
+            if last_date:
+                return last_date
+        except Exception as e:
+            print(f"[MIRROR] Espelho local indisponível: {e}")
+
+    last_date, last_day = archive_mirror.fetch_remote_last_date(ru_name, city_code, use_archive=use_archive)
+    if use_archive and last_date:
+        try:
+            archive_mirror.record_remote_check(ru_name, city_code, last_date, last_day)
+        except Exception as e:
+            print(f"[MIRROR] Não foi possível atualizar o espelho local: {e}")
+    return last_date
 
+if __name__ == "__main__":
+    # Sincroniza o espelho local: python check_last_menu_date.py [ru ...]
+    import sys
+    for ru in sys.argv[1:] or list(UFSC_MAPPING):
+        archive_mirror.sync_unit(ru, UFSC_MAPPING[ru])
+        print(f"{ru}: {get_last_menu_date(ru, UFSC_MAPPING[ru])}")
@@ -16,6 +16,12 @@ try:
 except ImportError:
     requests = None
 
+# Espelho local do archive (opcional): dias enviados já entram nele sem nova consulta
+try:
+    import archive_mirror
+except ImportError:
+    archive_mirror = None
+
 # Carrega variáveis do .env se disponível
 # TODO: Usar variáveis do github actions
 try:
@@ -85,6 +91,7 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
     
     success_count = 0
     total_count = 0
+    uploaded_days = {}
     
     print(f"[GETTING DATA > {city_code} > {ru_name}] Starting upload...")
     
@@ -138,6 +145,7 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
             if response.status_code == 200:
                 print(f"[GETTING DATA > {city_code} > {ru_name}] Response: {response.status_code}. Finished for {date_str}.")
                 success_count += 1
+                uploaded_days[date_str] = firebase_data
             else:
                 print(f"[GETTING DATA > {city_code} > {ru_name}] Response: {response.status_code}. Error for {date_str}.")
                 print(f"[GETTING DATA > {city_code} > {ru_name}] Error details: {response.text[:200]}...")
@@ -151,6 +159,12 @@ def upload_menu_to_firebase(menu_data: Dict[str, Any], ru_name: str, use_archive
         print(f"[GETTING DATA > {city_code} > {ru_name}] Error during upload: {e}")
         return False
     
+    if use_archive and uploaded_days and archive_mirror is not None:
+        try:
+            archive_mirror.store_days(ru_name, city_code, uploaded_days)
+        except Exception as e:
+            print(f"[MIRROR] Não foi possível atualizar o espelho local: {e}")
+    
     print(f"[GETTING DATA > {city_code} > {ru_name}] Upload summary:")
     print(f"[GETTING DATA > {city_code} > {ru_name}] Total days: {total_count}")
     print(f"[GETTING DATA > {city_code} > {ru_name}] Successful uploads: {success_count}")
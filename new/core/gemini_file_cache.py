@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Cache de uploads da File API do Gemini, indexado pelo hash do conteúdo
+CACHE_PATH = Path(__file__).parent / '.gemini_file_cache.json'
+
+# Margem de segurança antes da expiração (a File API mantém arquivos por 48h)
+EXPIRY_MARGIN = 60 * 60
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def wait_until_active(client, file, initial_delay=0.5, max_delay=8.0, timeout=300):
+    """
+    Aguarda o processamento do arquivo com backoff exponencial em vez de intervalos fixos.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while file.state and file.state.name == "PROCESSING":
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Arquivo {file.name} ainda em processamento após {timeout:.0f}s")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+        file = client.files.get(name=file.name)
+    if file.state and file.state.name == "FAILED":
+        raise ValueError(f"Falha no processamento do arquivo {file.name}")
+    return file
+
+class GeminiFileCache:
+    def __init__(self, cache_path=CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self.entries = {}
+        # Vários sites podem ser formatados em paralelo com o mesmo cache
+        self._lock = threading.RLock()
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception:
+                self.entries = {}
+
+    def save(self):
+        now = time.time()
+        with self._lock:
+            self.entries = {k: v for k, v in self.entries.items() if v.get('expires_at', 0) > now}
+            try:
+                with open(self.cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, indent=2)
+            except Exception as e:
+                print(f"[AI_PARSE] Não foi possível salvar o cache de uploads: {e}")
+
+    def lookup(self, client, content_hash):
+        with self._lock:
+            entry = self.entries.get(content_hash)
+        if not entry or entry.get('expires_at', 0) - EXPIRY_MARGIN <= time.time():
+            return None
+        try:
+            file = client.files.get(name=entry['name'])
+        except Exception:
+            with self._lock:
+                self.entries.pop(content_hash, None)
+            return None
+        if file.state and file.state.name == "FAILED":
+            with self._lock:
+                self.entries.pop(content_hash, None)
+            return None
+        return file
+
+    def get_or_upload(self, client, path):
+        """
+        Retorna o arquivo já enviado com o mesmo conteúdo (se ainda ativo) ou faz o upload.
+        """
+        content_hash = file_sha256(path)
+        file = self.lookup(client, content_hash)
+        if file is not None:
+            print(f"[AI_PARSE] Reutilizando upload de {os.path.basename(path)}: {file.name}")
+        else:
+            file = client.files.upload(file=path)
+        file = wait_until_active(client, file)
+
+        expiration = getattr(file, 'expiration_time', None)
+        expires_at = expiration.timestamp() if isinstance(expiration, datetime) else time.time() + 48 * 60 * 60
+        with self._lock:
+            self.entries[content_hash] = {
+                'name': file.name,
+                'uri': file.uri,
+                'mime_type': file.mime_type,
+                'expires_at': expires_at,
+            }
+            self.save()
+        return file
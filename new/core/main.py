@@ -1,7 +1,10 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 from check_last_menu_date import get_last_menu_date
 from web_scraper import WebScraper
-from ai_parse import format_menu_ai
+from ai_parse import format_menu_ai, format_menus_batch
 
 # Configuração de execução dos scrapers por frequência
 SCRAPER_FREQUENCY_CONFIG = {
@@ -10,6 +13,13 @@ SCRAPER_FREQUENCY_CONFIG = {
     "diario": lambda today: True
 }
 
+# Execução concorrente: threads por etapa e prazo por site (segundos)
+SCRAPE_WORKERS = int(os.environ.get('SCRAPE_WORKERS', 4))
+AI_WORKERS = int(os.environ.get('AI_WORKERS', 3))
+CHECK_TIMEOUT = int(os.environ.get('CHECK_TIMEOUT', 60))
+SCRAPE_TIMEOUT = int(os.environ.get('SCRAPE_TIMEOUT', 180))
+AI_TIMEOUT = int(os.environ.get('AI_TIMEOUT', 300))
+
 # Lista de scrapers configurados
 SITES = [
     {
@@ -69,53 +79,189 @@ SITES = [
     },
 ]
 
-def run_all_scrapes():
+def is_scheduled_today(site, today):
+    freq = site.get('update_frequency', 'diario')
+    if SCRAPER_FREQUENCY_CONFIG.get(freq, lambda t: True)(today):
+        return True
+    print(f"[SKIP] {site['ru_name']} - frequência '{freq}' não permite execução hoje ({today})")
+    return False
+
+def needs_scrape(site, today):
+    """
+    Verifica a última data do cardápio no Firebase; False se já há cardápio com mais de 2 dias de antecedência.
+    """
+    last_date_str = get_last_menu_date(site['ru_name'], site['city_code'], use_archive=True)
+    if last_date_str:
+        try:
+            last_date = datetime.strptime(last_date_str, '%Y-%m-%d').date()
+            if last_date > today + timedelta(days=2):
+                print(f"[SKIP] {site['ru_name']} - última data ({last_date_str}) está há mais de 2 dias no futuro. Não será feito scrape.")
+                return False
+        except Exception:
+            print(f"[WARN] Data inválida encontrada para {site['ru_name']}: {last_date_str}")
+    return True
+
+def scrape_site(site):
+    """
+    Executa o scrape de um site e retorna o conteúdo no formato esperado pela IA.
+    """
+    scraper = WebScraper(
+        site['base_url'],
+        site['scrape_type'],
+        site['city_code'],
+        site['ru_name'],
+        site.get('save_params'),
+        site.get('selection_mode', 'last')
+    )
+    print(f"[SCRAPE] Iniciando scrape para {site['ru_name']}...")
+    result = scraper.scrape()
+    print(f"[SCRAPE] Finalizado {site['ru_name']}: {result}")
+
+    # Extrai conteúdo, pdfs e imagens do resultado do scrape
+    return {
+        "text": result.get('text') if isinstance(result, dict) else str(result),
+        "pdfs": result.get('pdfs') if isinstance(result, dict) else [],
+        "images": result.get('images') if isinstance(result, dict) else [],
+    }
+
+def format_site(site, job):
+    # Chama a IA para formatar o cardápio
+    print(f"[AI_PARSE] Formatando cardápio para {site['ru_name']}...")
+    menu_json = format_menu_ai(job["text"], pdf_paths=job["pdfs"], image_paths=job["images"])
+    print(f"[AI_PARSE] Resultado formatado {site['ru_name']}: {menu_json}")
+    return menu_json
+
+class SiteTasks:
+    """
+    Tarefas de vários sites em um pool limitado, cada uma com seu próprio prazo.
+    O prazo conta a partir do início da execução (não do tempo na fila); tarefas
+    que o estouram são abandonadas e não seguram o restante do lote.
+    """
+    def __init__(self, stage, executor, timeout):
+        self.stage = stage
+        self.executor = executor
+        self.timeout = timeout
+        self.running = {}  # future -> (site, [instante em que começou a rodar])
+
+    def submit(self, site, func, *args):
+        started = []
+
+        def run():
+            started.append(time.monotonic())
+            return func(*args)
+
+        self.running[self.executor.submit(run)] = (site, started)
+
+    def __bool__(self):
+        return bool(self.running)
+
+    def next_deadline(self):
+        deadlines = [started[0] + self.timeout for _, started in self.running.values() if started]
+        return min(deadlines) if deadlines else None
+
+    def pop(self, future):
+        entry = self.running.pop(future, None)
+        return entry[0] if entry else None
+
+    def pop_expired(self, now):
+        """Remove e retorna (future, site) das tarefas que passaram do prazo."""
+        expired = [f for f, (_, started) in self.running.items() if started and now - started[0] > self.timeout]
+        return [(f, self.pop(f)) for f in expired]
+
+def check_sites(sites, today):
+    """
+    Consulta a última data publicada de todos os sites em paralelo. Em caso de erro
+    ou prazo estourado, o site é coletado (mesmo comportamento de quando não há data no Firebase).
+    """
+    if not sites:
+        return []
+    eligible = {site['ru_name']: True for site in sites}
+    executor = ThreadPoolExecutor(max_workers=len(sites), thread_name_prefix="check")
+    try:
+        futures = {executor.submit(needs_scrape, site, today): site for site in sites}
+        done, not_done = wait(futures, timeout=CHECK_TIMEOUT)
+        for future in done:
+            site = futures[future]
+            try:
+                eligible[site['ru_name']] = future.result()
+            except Exception as e:
+                print(f"[WARN] Falha ao verificar última data de {site['ru_name']}: {e}")
+        for future in not_done:
+            print(f"[WARN] Verificação de {futures[future]['ru_name']} excedeu {CHECK_TIMEOUT}s; seguindo com o scrape")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [site for site in sites if eligible[site['ru_name']]]
+
+def run_all_scrapes(batch=False):
+    """
+    Executa os scrapers e formata os cardápios com IA.
+    Com batch=True, os cardápios pendentes são enviados juntos em um único job da Batch API.
+
+    As verificações no Firebase rodam todas em paralelo; em seguida cada site é
+    coletado em um pool de SCRAPE_WORKERS threads e, assim que termina, formatado
+    em um pool de AI_WORKERS threads. Cada etapa tem prazo por site (SCRAPE_TIMEOUT
+    e AI_TIMEOUT), então a duração total fica próxima à do site mais lento. Um site
+    que estoura o prazo é abandonado; a thread presa é liberada pelo timeout das
+    requisições (web_scraper.REQUEST_TIMEOUT e ai_parse.REQUEST_TIMEOUT).
+    """
     results = {}
+    pending_jobs = {}
     today = datetime.today().date()
-    for site in SITES:
-        freq = site.get('update_frequency', 'diario')
-        should_run = SCRAPER_FREQUENCY_CONFIG.get(freq, lambda t: True)(today)
-        if not should_run:
-            print(f"[SKIP] {site['ru_name']} - frequência '{freq}' não permite execução hoje ({today})")
-            continue
-
-        # Verifica a última data do cardápio no Firebase
-        last_date_str = get_last_menu_date(site['ru_name'], site['city_code'], use_archive=True)
-        if last_date_str:
-            try:
-                last_date = datetime.strptime(last_date_str, '%Y-%m-%d').date()
-                if last_date > today + timedelta(days=2):
-                    print(f"[SKIP] {site['ru_name']} - última data ({last_date_str}) está há mais de 2 dias no futuro. Não será feito scrape.")
+    sites = [site for site in SITES if is_scheduled_today(site, today)]
+    sites = check_sites(sites, today)
+    if not sites:
+        return results
+
+    scrape_pool = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scrape")
+    ai_pool = ThreadPoolExecutor(max_workers=AI_WORKERS, thread_name_prefix="ai-parse")
+    scrapes = SiteTasks("scrape", scrape_pool, SCRAPE_TIMEOUT)
+    parses = SiteTasks("ai_parse", ai_pool, AI_TIMEOUT)
+    try:
+        for site in sites:
+            scrapes.submit(site, scrape_site, site)
+
+        while scrapes or parses:
+            deadlines = [d for d in (scrapes.next_deadline(), parses.next_deadline()) if d is not None]
+            # Sem prazo conhecido (tarefas ainda não começaram), confere de novo em 1s
+            timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else 1
+            done, _ = wait(list(scrapes.running) + list(parses.running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage_tasks = scrapes if future in scrapes.running else parses
+                site = stage_tasks.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    print(f"[ERROR] {stage_tasks.stage} de {site['ru_name']} falhou: {e}")
+                    results[site['ru_name']] = None
                     continue
-            except Exception:
-                print(f"[WARN] Data inválida encontrada para {site['ru_name']}: {last_date_str}")
-
-        scraper = WebScraper(
-            site['base_url'],
-            site['scrape_type'],
-            site['city_code'],
-            site['ru_name'],
-            site.get('save_params'),
-            site.get('selection_mode', 'last')
-        )
-        print(f"[SCRAPE] Iniciando scrape para {site['ru_name']}...")
-        result = scraper.scrape()
-        print(f"[SCRAPE] Finalizado {site['ru_name']}: {result}")
-
-        # Extrai conteúdo, pdfs e imagens do resultado do scrape
-        content_text = result.get('text') if isinstance(result, dict) else str(result)
-        pdfs = result.get('pdfs') if isinstance(result, dict) else []
-        images = result.get('images') if isinstance(result, dict) else []
-
-        # Chama a IA para formatar o cardápio
-        print(f"[AI_PARSE] Formatando cardápio para {site['ru_name']}...")
-        menu_json = format_menu_ai(content_text, pdf_paths=pdfs, image_paths=images)
-        results[site['ru_name']] = menu_json
-        print(f"[AI_PARSE] Resultado formatado {site['ru_name']}: {menu_json}")
+                if stage_tasks is parses:
+                    results[site['ru_name']] = value
+                elif batch:
+                    pending_jobs[site['ru_name']] = value
+                else:
+                    # Formata assim que o scrape termina, sem esperar os outros sites
+                    parses.submit(site, format_site, site, value)
+
+            now = time.monotonic()
+            for stage_tasks in (scrapes, parses):
+                for future, site in stage_tasks.pop_expired(now):
+                    print(f"[TIMEOUT] {stage_tasks.stage} de {site['ru_name']} excedeu {stage_tasks.timeout}s; site ignorado nesta execução")
+                    future.cancel()
+                    results[site['ru_name']] = None
+    finally:
+        # Tarefas que estouraram o prazo não são esperadas
+        scrape_pool.shutdown(wait=False, cancel_futures=True)
+        ai_pool.shutdown(wait=False, cancel_futures=True)
+
+    if pending_jobs:
+        print(f"[AI_PARSE] Enviando {len(pending_jobs)} cardápio(s) em lote...")
+        results.update(format_menus_batch(pending_jobs))
     return results
 
 if __name__ == "__main__":
-    all_results = run_all_scrapes()
+    import sys
+    all_results = run_all_scrapes(batch="--batch" in sys.argv[1:])
     print("[SCRAPE] Todos os resultados:")
     for ru, data in all_results.items():
         print(f"RU: {ru}")
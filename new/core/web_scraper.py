@@ -3,8 +3,11 @@ from bs4 import BeautifulSoup, Tag
 from urllib.parse import urljoin
 import os
 
+# Tempo máximo de cada requisição ao site do RU (segundos)
+REQUEST_TIMEOUT = 30
+
 class WebScraper:
-    def __init__(self, base_url, scrape_type, city_code, ru_name, save_params=None, selection_mode="last", content_selector=None):
+    def __init__(self, base_url, scrape_type, city_code, ru_name, save_params=None, selection_mode="last", content_selector=None, timeout=REQUEST_TIMEOUT):
         self.base_url = base_url
         self.scrape_type = scrape_type
         self.city_code = city_code
@@ -12,9 +15,10 @@ class WebScraper:
         self.save_params = save_params or {}
         self.selection_mode = selection_mode
         self.content_selector = content_selector  # Ex: '#conteudo', '.cardapio', etc
+        self.timeout = timeout  # Segundos por requisição (conexão e leitura)
 
     def fetch_html(self):
-        resp = requests.get(self.base_url)
+        resp = requests.get(self.base_url, timeout=self.timeout)
         resp.raise_for_status()
         return resp.text
 
@@ -65,7 +69,7 @@ class WebScraper:
                     url = pdf_links[-1]
             if isinstance(url, str):
                 full_url = url if url.startswith('http') else urljoin(self.base_url, url)
-                resp = requests.get(full_url)
+                resp = requests.get(full_url, timeout=self.timeout)
                 resp.raise_for_status()
                 filename = self.save_params.get('filename', f"cardapio_{self.ru_name}_{os.path.basename(str(url))}")
                 path = self.save_file(resp.content, filename)
@@ -103,7 +107,7 @@ class WebScraper:
                     src = img_links[-1]
             if isinstance(src, str):
                 full_url = src if src.startswith('http') else urljoin(self.base_url, src)
-                resp = requests.get(full_url)
+                resp = requests.get(full_url, timeout=self.timeout)
                 resp.raise_for_status()
                 filename = self.save_params.get('filename', f"cardapio_{self.ru_name}_{os.path.basename(src)}")
                 path = self.save_file(resp.content, filename)
@@ -129,7 +133,7 @@ class WebScraper:
                     url = pdf_links[-1]
             if isinstance(url, str):
                 full_url = url if url.startswith('http') else urljoin(self.base_url, url)
-                resp = requests.get(full_url)
+                resp = requests.get(full_url, timeout=self.timeout)
                 resp.raise_for_status()
                 filename = self.save_params.get('filename', f"cardapio_{self.ru_name}_{os.path.basename(url)}")
                 path = self.save_file(resp.content, filename)
@@ -154,7 +158,7 @@ class WebScraper:
                         src = img_links[-1]
                 if isinstance(src, str):
                     full_url = src if src.startswith('http') else urljoin(self.base_url, src)
-                    resp = requests.get(full_url)
+                    resp = requests.get(full_url, timeout=self.timeout)
                     resp.raise_for_status()
                     filename = self.save_params.get('filename', f"cardapio_{self.ru_name}_{os.path.basename(src)}")
                     path = self.save_file(resp.content, filename)